@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0011_client'),
+        ('accounting', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='income',
+            name='client',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='incomes', to='invoicing.client', verbose_name='Client'),
+        ),
+    ]
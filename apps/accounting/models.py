@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from apps.core.models import TimeStampedModel
@@ -56,6 +56,16 @@ class Income(TimeStampedModel):
         verbose_name="Client name"
     )
     
+    client = models.ForeignKey(
+        'invoicing.Client',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='incomes',
+        verbose_name="Client"
+    )
+    
     pickup_address = models.TextField(
         blank=True,
         verbose_name="Pickup address"
@@ -112,7 +122,14 @@ class Income(TimeStampedModel):
             self.accounting_month = self.date.month
         
         self.clean()
-        super().save(*args, **kwargs)
+        # Derived tables (client stats, dashboard rollups) are kept in step
+        # by signal handlers, which must commit or roll back with the row.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
         return f"{self.get_service_type_display()} - ${self.amount} AUD ({self.date})"
@@ -1,7 +1,7 @@
 from apps.core.services.base import FinancialService, ValidationMixin
 from .models import Income, ServiceTypeChoices
 from typing import Dict, List, Optional
-from django.db.models import QuerySet, Sum, Count, Q
+from django.db.models import QuerySet, Sum, Count, F, Q
 from django.utils import timezone
 from datetime import date
 
@@ -96,10 +96,15 @@ class IncomeService(FinancialService, ValidationMixin):
         return self.create(**data)
     
     def get_top_clients(self, limit: int = 10, year: Optional[int] = None) -> List[Dict]:
-        queryset = self.get_all()
-        if year:
-            queryset = queryset.filter(accounting_year=year)
-        
+        if not year:
+            from apps.invoicing.models import Client
+            return list(
+                Client.objects.filter(income_count__gt=0)
+                .order_by('-income_revenue')
+                .values(client_name=F('name'), total_revenue=F('income_revenue'), service_count=F('income_count'))[:limit]
+            )
+
+        queryset = self.get_all(accounting_year=year)
         return list(
             queryset.exclude(Q(client_name='') | Q(client_name__isnull=True))
             .values('client_name')
@@ -84,6 +84,56 @@ class IncomeViewsTestCase(TestCase):
         self.assertContains(response, 'Test Client')
 
 
+class IncomeKeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        User.objects.create_user(username='admin', email='admin@test.com', password='testpass123')
+        self.client.login(username='admin', password='testpass123')
+        Income.objects.bulk_create([
+            Income(
+                amount=Decimal('100.00'),
+                date=date(2024, 1, 1 + index // 10),
+                accounting_year=2024,
+                accounting_month=1,
+                payment_method=PaymentMethodChoices.CARD,
+                client_name=f'Client {index}'
+            )
+            for index in range(60)
+        ])
+        self.expected = list(Income.objects.order_by('-date', '-created', '-pk').values_list('pk', flat=True))
+
+    def test_cursors_walk_every_row_once_in_order(self):
+        url = reverse('accounting:income_list')
+        seen, cursors = [], []
+        cursor = None
+
+        while True:
+            response = self.client.get(url, {'cursor': cursor} if cursor else {})
+            page = response.context['page_obj']
+            seen.extend(income.pk for income in page)
+            cursors.append(cursor)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(cursors), 3)
+
+        response = self.client.get(url, {'cursor': response.context['page_obj'].previous_cursor})
+        self.assertEqual([income.pk for income in response.context['page_obj']], self.expected[25:50])
+
+    def test_pages_are_read_without_counting(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('accounting:income_list'))
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+
+    def test_malformed_cursor_returns_404(self):
+        response = self.client.get(reverse('accounting:income_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
 def validate_removals_company_setup():
     try:
         service_types = [choice[0] for choice in ServiceTypeChoices.choices]
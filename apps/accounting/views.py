@@ -6,19 +6,22 @@ from django.urls import reverse_lazy
 from django.utils import timezone
 from django.db.models import Sum, Count
 
+from apps.core.mixins import KeysetPaginationMixin
+
 from .models import Income
 from .services import IncomeService
 from .forms import IncomeFilterForm, ProfitFilterForm, IncomeForm
 
 
-class IncomeListView(LoginRequiredMixin, ListView):
+class IncomeListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Income
     template_name = 'accounting/income_list.html'
     context_object_name = 'incomes'
     paginate_by = 25
+    keyset_ordering = ['-date', '-created']
     
     def get_queryset(self):
-        queryset = Income.objects.order_by('-date')
+        queryset = Income.objects.all()
         form = IncomeFilterForm(self.request.GET)
         
         if form.is_valid():
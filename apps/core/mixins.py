@@ -6,6 +6,8 @@ from django.contrib import messages
 from django.urls import reverse_lazy
 from typing import Dict, Any, Optional
 
+from .pagination import InvalidCursor, KeysetPaginator
+
 
 class WestforceLoginRequiredMixin(LoginRequiredMixin):
     login_url = reverse_lazy('authentication:login')
@@ -63,6 +65,27 @@ class TemporalFilterMixin:
         return context
 
 
+class KeysetPaginationMixin:
+    keyset_ordering = None
+    keyset_count = None
+    cursor_kwarg = 'cursor'
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        ordering = self.get_keyset_ordering()
+        if not ordering:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, page_size, ordering, count_mode=self.keyset_count)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor as e:
+            raise Http404(f"Invalid page: {e}")
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
 class BusinessLineHierarchyMixin:
     def resolve_business_line_from_path(self, line_path):
         from apps.business_lines.models import BusinessLine
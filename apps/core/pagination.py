@@ -0,0 +1,149 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+KEYSET_COUNT_MODES = (None, 'exact', 'estimate')
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPage(Sequence):
+    cursor_paginated = True
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Keyset page of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Seek-method paginator: each page is read with a range filter on the
+    ordering columns instead of an OFFSET, so deep pages cost the same as
+    the first one and no COUNT(*) is issued unless `count_mode` asks for it.
+    """
+
+    def __init__(self, queryset, per_page, ordering, count_mode=None):
+        if count_mode not in KEYSET_COUNT_MODES:
+            raise ValueError(f"Unknown count mode: {count_mode}")
+
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.count_mode = count_mode
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        # The primary key makes the ordering total, so rows sharing the
+        # other values are neither skipped nor repeated between pages.
+        if not any(name in ('pk', queryset.model._meta.pk.name) for name, _ in self.fields):
+            self.fields.append(('pk', self.fields[-1][1]))
+
+    @property
+    def count_is_estimate(self):
+        return self.count_mode == 'estimate' and connections[self.queryset.db].vendor == 'postgresql'
+
+    @cached_property
+    def count(self):
+        if self.count_mode is None:
+            return None
+        queryset = self.queryset.order_by()
+        if self.count_is_estimate:
+            plan = json.loads(queryset.explain(format='json'))
+            return int(plan[0]['Plan']['Plan Rows'])
+        return queryset.count()
+
+    def page(self, cursor=None):
+        direction, values = self.decode_cursor(cursor) if cursor else ('next', None)
+        backwards = direction == 'prev'
+
+        queryset = self.queryset.order_by(*(
+            f"{'-' if descending != backwards else ''}{name}" for name, descending in self.fields
+        ))
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, backwards))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if backwards:
+            if not has_more:
+                # Paging back reached the start of the listing; serve the
+                # regular first page rather than a short one.
+                return self.page()
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        return KeysetPage(
+            rows,
+            self,
+            next_cursor=self.encode_cursor('next', rows[-1]) if rows and has_next else None,
+            previous_cursor=self.encode_cursor('prev', rows[0]) if rows and has_previous else None,
+        )
+
+    def _seek_filter(self, values, backwards):
+        condition = Q()
+        for index, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != backwards else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for previous_name, previous_value in zip(
+                (field for field, _ in self.fields[:index]), values[:index]
+            ):
+                step &= Q(**{previous_name: previous_value})
+            condition |= step
+        return condition
+
+    def encode_cursor(self, direction, obj):
+        values = []
+        for name, _ in self.fields:
+            value = getattr(obj, name)
+            values.append(value.isoformat() if isinstance(value, date) else value)
+        payload = json.dumps([direction, values], separators=(',', ':'), default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, values = json.loads(payload)
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+            raise InvalidCursor('Malformed cursor')
+
+        if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != len(self.fields):
+            raise InvalidCursor('Cursor does not match this listing')
+
+        opts = self.queryset.model._meta
+        try:
+            return direction, [
+                (opts.pk if name == 'pk' else opts.get_field(name)).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+        except ValidationError:
+            raise InvalidCursor('Cursor does not match this listing')
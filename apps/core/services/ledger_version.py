@@ -0,0 +1,40 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+class LedgerVersion:
+    """Global version replaced on every ledger write (income, expense, invoice).
+
+    Caches that include the current version in their keys never serve results
+    computed before the latest write, without needing a TTL.
+    """
+
+    CACHE_KEY = 'core:ledger_version'
+
+    @classmethod
+    def current(cls):
+        version = cache.get(cls.CACHE_KEY)
+        if version is None:
+            cache.add(cls.CACHE_KEY, cls._new_version(), None)
+            version = cache.get(cls.CACHE_KEY)
+        return version
+
+    @classmethod
+    def bump(cls):
+        # A fresh value rather than cache.incr, which is a get then a set on
+        # the database cache: two concurrent bumps could both write N + 1 and
+        # a result computed between them would be cached under the new key.
+        version = cls._new_version()
+        cache.set(cls.CACHE_KEY, version, None)
+        return version
+
+    @classmethod
+    def bump_on_commit(cls):
+        transaction.on_commit(cls.bump)
+
+    @staticmethod
+    def _new_version():
+        # Never reused, including after the key is evicted from the cache.
+        return uuid.uuid4().hex
@@ -27,8 +27,7 @@ class CompanySeeder(BaseSeeder):
             bank_name='Commonwealth Bank',
             bsb='066-123',
             account_number='12345678',
-            invoice_prefix='WF',
-            current_number=0
+            invoice_prefix='WF'
         )
         
         self.log_success(f'Created company: {company.business_name}')
@@ -1,3 +1,13 @@
 from django.contrib import admin
+from .models import LedgerMonthlyRollup
 
-# Register your models here.
+
+@admin.register(LedgerMonthlyRollup)
+class LedgerMonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ['year', 'month', 'kind', 'service_type', 'category', 'total', 'count']
+    list_filter = ['kind', 'year']
+    list_select_related = ['category']
+    readonly_fields = ['kind', 'year', 'month', 'service_type', 'category', 'total', 'count']
+
+    def has_add_permission(self, request):
+        return False
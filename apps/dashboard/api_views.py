@@ -1,8 +1,11 @@
+import os
+
 from django.http import JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_GET
 from datetime import datetime
-from .services import ExpenseDistributionService, ServiceRevenueService
+from .services import DashboardOrchestrator, ExpenseDistributionService, ServiceRevenueService
 
 
 def parse_date_filters(request):
@@ -30,7 +33,7 @@ def parse_date_filters(request):
 @login_required
 def expense_distribution_data(request):
     service = ExpenseDistributionService()
-    data = service.get_data(**parse_date_filters(request))
+    data = service.get_cached_data(**parse_date_filters(request))
     return JsonResponse(data, safe=False)
 
 
@@ -38,5 +41,12 @@ def expense_distribution_data(request):
 @login_required
 def service_revenue_data(request):
     service = ServiceRevenueService()
-    data = service.get_data(**parse_date_filters(request))
+    data = service.get_cached_data(**parse_date_filters(request))
     return JsonResponse(data, safe=False)
+
+
+@require_GET
+@staff_member_required
+def cache_stats(request):
+    # Counts cover the worker process that served this request only.
+    return JsonResponse({'worker_pid': os.getpid(), 'caches': DashboardOrchestrator().cache_stats()})
@@ -0,0 +1,174 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.accounting.models import Income, ServiceTypeChoices
+from apps.dashboard.models import LedgerMonthlyRollup
+from apps.dashboard.services import DashboardOrchestrator
+from apps.expenses.models import Expense, ExpenseCategory
+
+BENCHMARK_TAG = 'DASHBOARD-BENCHMARK'
+
+
+class Command(BaseCommand):
+    help = 'Compares serial and concurrent dashboard widget computation latency, optionally on a seeded multi-year ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--years',
+            type=int,
+            default=0,
+            help='Seed this many years of synthetic income and expenses before measuring (removed afterwards)'
+        )
+        parser.add_argument(
+            '--rows-per-month',
+            type=int,
+            default=300,
+            help='Synthetic income and expense rows per month when seeding'
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=5,
+            help='Timed page computations per mode'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=5,
+            help='Threads used in concurrent mode'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the seeded rows instead of removing them'
+        )
+
+    def handle(self, *args, **options):
+        if options['years'] and not settings.DEBUG and settings.ENVIRONMENT == 'production':
+            self.stdout.write(self.style.ERROR('❌ Cannot seed benchmark data in production environment'))
+            return
+
+        # Seeded rows are committed so that the worker threads, which use
+        # their own connections, can see them.
+        created_category = None
+        if options['years']:
+            created_category = self._seed(options['years'], options['rows_per_month'])
+
+        try:
+            self._benchmark(options['runs'], options['workers'])
+        finally:
+            if options['years'] and not options['keep']:
+                self._remove_seed(created_category)
+
+    def _benchmark(self, runs, workers):
+        self.stdout.write(
+            f'⏱️  Dashboard benchmark: {Income.objects.count()} incomes, {Expense.objects.count()} expenses, '
+            f'{runs} runs, {workers} workers (cache bypassed)'
+        )
+
+        serial = DashboardOrchestrator(workers=0, use_cache=False)
+        self.stdout.write(f'{"widget":>22} {"serial ms":>10}')
+        for service in serial.services:
+            started = time.perf_counter()
+            service.get_data()
+            self.stdout.write(f'{service.cache_name:>22} {(time.perf_counter() - started) * 1000:>10.1f}')
+
+        concurrent = DashboardOrchestrator(workers=workers, widget_timeout=60, use_cache=False)
+        # Warm up both paths, including the thread pool and its connections.
+        serial.get_dashboard_data()
+        concurrent.get_dashboard_data()
+
+        serial_times, serial_degraded = self._time_runs(serial, runs)
+        concurrent_times, concurrent_degraded = self._time_runs(concurrent, runs)
+
+        self.stdout.write(f'{"mode":>22} {"median ms":>10} {"mean ms":>10} {"degraded":>9}')
+        for label, times, degraded in [
+            ('serial', serial_times, serial_degraded),
+            (f'concurrent ({workers})', concurrent_times, concurrent_degraded),
+        ]:
+            self.stdout.write(
+                f'{label:>22} {statistics.median(times):>10.1f} {statistics.mean(times):>10.1f} {degraded:>9}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Speedup: {statistics.median(serial_times) / statistics.median(concurrent_times):.2f}x'
+        ))
+
+    @staticmethod
+    def _time_runs(orchestrator, runs):
+        times = []
+        degraded = 0
+        for _ in range(runs):
+            started = time.perf_counter()
+            data = orchestrator.get_dashboard_data()
+            times.append((time.perf_counter() - started) * 1000)
+            degraded += len(data['unavailable'])
+        return times, degraded
+
+    def _seed(self, years, rows_per_month):
+        today = timezone.localdate()
+        first_day = today.replace(year=today.year - years)
+        days = (today - first_day).days + 1
+        rows = rows_per_month * 12 * years
+        rng = random.Random(42)
+
+        category, created = ExpenseCategory.objects.get_or_create(
+            slug='dashboard-benchmark',
+            defaults={'name': 'Dashboard benchmark', 'category_type': 'VARIABLE'}
+        )
+        categories = list(ExpenseCategory.objects.filter(is_active=True)) or [category]
+        service_types = [choice for choice, _ in ServiceTypeChoices.choices]
+
+        def random_day():
+            return first_day + timedelta(days=rng.randrange(days))
+
+        self.stdout.write(f'🌱 Seeding {rows} incomes and {rows} expenses over {years} years...')
+        started = time.monotonic()
+        with transaction.atomic():
+            incomes = []
+            for _ in range(rows):
+                day = random_day()
+                incomes.append(Income(
+                    service_type=rng.choice(service_types),
+                    amount=Decimal(rng.randrange(10000, 500000)) / 100,
+                    date=day,
+                    accounting_year=day.year,
+                    accounting_month=day.month,
+                    client_name=f'Benchmark client {rng.randrange(500)}',
+                    reference_number=BENCHMARK_TAG,
+                ))
+            Income.objects.bulk_create(incomes, batch_size=2000)
+
+            expenses = []
+            for _ in range(rows):
+                day = random_day()
+                expenses.append(Expense(
+                    category=rng.choice(categories),
+                    amount=Decimal(rng.randrange(1000, 200000)) / 100,
+                    date=day,
+                    accounting_year=day.year,
+                    accounting_month=day.month,
+                    description='Benchmark expense',
+                    invoice_number=BENCHMARK_TAG,
+                ))
+            Expense.objects.bulk_create(expenses, batch_size=2000)
+            # bulk_create skips the signals that maintain the rollups.
+            LedgerMonthlyRollup.objects.rebuild()
+        self.stdout.write(f'   done in {time.monotonic() - started:.1f}s')
+        return category if created else None
+
+    def _remove_seed(self, category):
+        self.stdout.write('🧹 Removing benchmark rows...')
+        with transaction.atomic():
+            Income.objects.filter(reference_number=BENCHMARK_TAG).delete()
+            Expense.objects.filter(invoice_number=BENCHMARK_TAG).delete()
+            if category:
+                category.delete()
+            LedgerMonthlyRollup.objects.rebuild()
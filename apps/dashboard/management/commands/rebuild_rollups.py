@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.dashboard.models import LedgerMonthlyRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the monthly ledger rollups from the income and expense tables (repair after bulk edits)'
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔄 Rebuilding monthly ledger rollups...')
+        started = time.monotonic()
+        count = LedgerMonthlyRollup.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {count} rollup rows rebuilt in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:21
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('expenses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('INCOME', 'Income'), ('EXPENSE', 'Expense')], max_length=10, verbose_name='Kind')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Year')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Month')),
+                ('service_type', models.CharField(blank=True, max_length=20, verbose_name='Service type')),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Total')),
+                ('count', models.IntegerField(default=0, verbose_name='Count')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='expenses.expensecategory', verbose_name='Category')),
+            ],
+            options={
+                'verbose_name': 'Ledger monthly rollup',
+                'verbose_name_plural': 'Ledger monthly rollups',
+                'ordering': ['year', 'month', 'kind'],
+                'indexes': [models.Index(fields=['kind', 'year', 'month'], name='dashboard_rollup_period_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ledgermonthlyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'INCOME')), fields=('year', 'month', 'service_type'), name='dashboard_rollup_income_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgermonthlyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'EXPENSE')), fields=('year', 'month', 'category'), name='dashboard_rollup_expense_unique'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    LedgerMonthlyRollup = apps.get_model('dashboard', 'LedgerMonthlyRollup')
+    sources = [
+        ('INCOME', apps.get_model('accounting', 'Income'), 'service_type'),
+        ('EXPENSE', apps.get_model('expenses', 'Expense'), 'category_id'),
+    ]
+
+    rollups = []
+    for kind, model, dimension in sources:
+        rows = model.objects.order_by().values('accounting_year', 'accounting_month', dimension).annotate(
+            total=models.Sum('amount'), count=models.Count('pk')
+        )
+        for row in rows:
+            rollups.append(LedgerMonthlyRollup(
+                kind=kind,
+                year=row['accounting_year'],
+                month=row['accounting_month'],
+                total=row['total'],
+                count=row['count'],
+                **({'service_type': row[dimension] or ''} if kind == 'INCOME' else {'category_id': row[dimension]})
+            ))
+    LedgerMonthlyRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+def clear_rollups(apps, schema_editor):
+    apps.get_model('dashboard', 'LedgerMonthlyRollup').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_ledger_monthly_rollup'),
+        ('accounting', '0002_income_client'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, clear_rollups),
+    ]
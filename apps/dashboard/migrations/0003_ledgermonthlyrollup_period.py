@@ -0,0 +1,31 @@
+import datetime
+
+from django.db import migrations, models
+
+
+def fill_periods(apps, schema_editor):
+    LedgerMonthlyRollup = apps.get_model('dashboard', 'LedgerMonthlyRollup')
+    months = LedgerMonthlyRollup.objects.order_by().values_list('year', 'month').distinct()
+    for year, month in list(months):
+        LedgerMonthlyRollup.objects.filter(year=year, month=month).update(period=datetime.date(year, month, 1))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_backfill_ledger_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ledgermonthlyrollup',
+            name='period',
+            field=models.DateField(null=True, verbose_name='Period'),
+        ),
+        migrations.RunPython(fill_periods, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ledgermonthlyrollup',
+            name='period',
+            field=models.DateField(verbose_name='Period'),
+        ),
+    ]
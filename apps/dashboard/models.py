@@ -1,3 +1,194 @@
-from django.db import models
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your models here.
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q, Sum
+
+from apps.accounting.models import Income
+from apps.core.services.ledger_version import LedgerVersion
+from apps.expenses.models import Expense, ExpenseCategory
+
+ROLLUP_KINDS = [
+    ('INCOME', 'Income'),
+    ('EXPENSE', 'Expense'),
+]
+
+# kind -> (source model, dimension column on the rollup and on the source)
+ROLLUP_SOURCES = {
+    'INCOME': (Income, 'service_type'),
+    'EXPENSE': (Expense, 'category'),
+}
+
+
+def month_end(day):
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+class LedgerMonthlyRollupQuerySet(models.QuerySet):
+    def apply(self, kind, year, month, dimension, amount, count):
+        key = self.model.key_filter(kind, year, month, dimension)
+        delta = {'total': F('total') + amount, 'count': F('count') + count}
+        if self.filter(**key).update(**delta):
+            return
+        try:
+            with transaction.atomic():
+                self.create(total=amount, count=count, period=date(year, month, 1), **key)
+        except IntegrityError:
+            self.filter(**key).update(**delta)
+
+    def rebuild(self):
+        with transaction.atomic():
+            self.all().delete()
+            rollups = []
+            for kind, (model, dimension) in ROLLUP_SOURCES.items():
+                rows = model.objects.order_by().values('accounting_year', 'accounting_month', dimension).annotate(
+                    total=Sum('amount'), count=Count('pk')
+                )
+                rollups += [
+                    self.model(
+                        kind=kind,
+                        year=row['accounting_year'],
+                        month=row['accounting_month'],
+                        period=date(row['accounting_year'], row['accounting_month'], 1),
+                        total=row['total'],
+                        count=row['count'],
+                        **self.model.dimension_value(kind, row[dimension])
+                    )
+                    for row in rows
+                ]
+            LedgerVersion.bump_on_commit()
+            return len(self.bulk_create(rollups, batch_size=1000))
+
+    def summarise(self, kind, start_date=None, end_date=None, group_by=()):
+        """Sum and count of one ledger kind, grouped by any of year, month,
+        service_type or category. Whole months inside the range are read from
+        the rollup; partial months at either edge come from the source table.
+        """
+        model, _ = ROLLUP_SOURCES[kind]
+        rollups, partial = self.split_range(start_date, end_date)
+
+        querysets = [(rollups.filter(kind=kind), {}, Sum('total'), Sum('count'))]
+        for first, last in partial:
+            querysets.append((
+                model.objects.filter(date__range=(first, last)),
+                {'year': F('accounting_year'), 'month': F('accounting_month')},
+                Sum('amount'),
+                Count('pk')
+            ))
+
+        rows = defaultdict(lambda: {'total': Decimal('0.00'), 'count': 0})
+        for queryset, aliases, total, count in querysets:
+            queryset = queryset.order_by()
+            if not group_by:
+                results = [queryset.aggregate(row_total=total, row_count=count)]
+            else:
+                results = queryset.values(
+                    *[field for field in group_by if field not in aliases],
+                    **{field: aliases[field] for field in group_by if field in aliases}
+                ).annotate(row_total=total, row_count=count)
+            for row in results:
+                key = tuple(row[field] for field in group_by)
+                rows[key]['total'] += row['row_total'] or 0
+                rows[key]['count'] += row['row_count'] or 0
+
+        return [
+            {**dict(zip(group_by, key)), **values}
+            for key, values in rows.items() if values['count']
+        ]
+
+    def split_range(self, start_date=None, end_date=None):
+        """Rollup rows for the whole months between the dates, and the
+        (first, last) day ranges of partial months at either edge, which must
+        be read from the source tables.
+        """
+        full_from, full_to, partial = self._split_range(start_date, end_date)
+        if full_from and full_to and full_from > full_to:
+            return self.none(), partial
+
+        rollups = self.all()
+        if full_from:
+            rollups = rollups.filter(Q(year__gt=full_from.year) | Q(year=full_from.year, month__gte=full_from.month))
+        if full_to:
+            rollups = rollups.filter(Q(year__lt=full_to.year) | Q(year=full_to.year, month__lte=full_to.month))
+        return rollups, partial
+
+    @staticmethod
+    def _split_range(start_date, end_date):
+        # Returns the whole-month span for the rollup and the partial edge
+        # ranges; a span that ends before it starts means no whole months.
+        if start_date and end_date and (start_date.year, start_date.month) == (end_date.year, end_date.month):
+            if start_date.day == 1 and end_date == month_end(end_date):
+                return start_date, end_date, []
+            return start_date, start_date - timedelta(days=1), [(start_date, end_date)]
+
+        partial = []
+        full_from, full_to = start_date, end_date
+        if start_date and start_date.day != 1:
+            partial.append((start_date, month_end(start_date)))
+            full_from = month_end(start_date) + timedelta(days=1)
+        if end_date and end_date != month_end(end_date):
+            partial.append((end_date.replace(day=1), end_date))
+            full_to = end_date.replace(day=1) - timedelta(days=1)
+        return full_from, full_to, partial
+
+
+class LedgerMonthlyRollup(models.Model):
+    kind = models.CharField(max_length=10, choices=ROLLUP_KINDS, verbose_name="Kind")
+    year = models.PositiveSmallIntegerField(verbose_name="Year")
+    month = models.PositiveSmallIntegerField(verbose_name="Month")
+    # First day of the month, so the rollup can be bucketed like a dated table
+    period = models.DateField(verbose_name="Period")
+    service_type = models.CharField(max_length=20, blank=True, verbose_name="Service type")
+    category = models.ForeignKey(
+        ExpenseCategory,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Category"
+    )
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), verbose_name="Total")
+    count = models.IntegerField(default=0, verbose_name="Count")
+
+    objects = LedgerMonthlyRollupQuerySet.as_manager()
+
+    @staticmethod
+    def dimension_value(kind, value):
+        return {'service_type': value or ''} if kind == 'INCOME' else {'category_id': value}
+
+    @classmethod
+    def key_filter(cls, kind, year, month, dimension):
+        key = {'kind': kind, 'year': year, 'month': month, 'service_type': '', 'category_id': None}
+        key.update(cls.dimension_value(kind, dimension))
+        return key
+
+    @staticmethod
+    def entry_for(kind, values):
+        # (year, month, dimension) bucket and amount of one ledger row
+        dimension = values['service_type'] if kind == 'INCOME' else values['category_id']
+        return (values['accounting_year'], values['accounting_month'], dimension), Decimal(str(values['amount']))
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.year}-{self.month:02d}: ${self.total} ({self.count})"
+
+    class Meta:
+        ordering = ['year', 'month', 'kind']
+        verbose_name = "Ledger monthly rollup"
+        verbose_name_plural = "Ledger monthly rollups"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['year', 'month', 'service_type'],
+                condition=Q(kind='INCOME'),
+                name='dashboard_rollup_income_unique'
+            ),
+            models.UniqueConstraint(
+                fields=['year', 'month', 'category'],
+                condition=Q(kind='EXPENSE'),
+                name='dashboard_rollup_expense_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'year', 'month'], name='dashboard_rollup_period_idx'),
+        ]
@@ -1,34 +1,177 @@
+import logging
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connection
+
 from .financial import FinancialMetricsService
 from .cashflow import CashFlowService
 from .service_revenue import ServiceRevenueService
 from .expense_trends import ExpenseTrendService
 from .expense_distribution import ExpenseDistributionService
+from .cache import DashboardCache
+from .timeseries import TimeSeries, TimeSeriesService
+
+logger = logging.getLogger(__name__)
 
 
 class DashboardOrchestrator:
     
-    def __init__(self):
+    CACHE_NAME = 'dashboard'
+    
+    _executors = {}
+    _executors_lock = threading.Lock()
+    
+    def __init__(self, workers=None, widget_timeout=None, use_cache=True):
         self.financial_service = FinancialMetricsService()
         self.cashflow_service = CashFlowService()
         self.service_revenue_service = ServiceRevenueService()
         self.expense_trend_service = ExpenseTrendService()
         self.expense_distribution_service = ExpenseDistributionService()
+        self.workers = settings.DASHBOARD_WORKERS if workers is None else workers
+        self.widget_timeout = settings.DASHBOARD_WIDGET_TIMEOUT if widget_timeout is None else widget_timeout
+        self.use_cache = use_cache
+    
+    @property
+    def services(self):
+        return [service for _, service in self.widgets]
+    
+    @property
+    def widgets(self):
+        # Context key for each widget; the financial metrics are merged into
+        # the page context rather than nested under a key.
+        return [
+            (None, self.financial_service),
+            ('cashflow_data', self.cashflow_service),
+            ('service_revenue', self.service_revenue_service),
+            ('expense_trends', self.expense_trend_service),
+            ('expense_distribution', self.expense_distribution_service),
+        ]
     
     def get_dashboard_data(self, **filters):
-        return {
-            **self.financial_service.get_data(**filters),
-            'cashflow_data': self.cashflow_service.get_data(**filters),
-            'service_revenue': self.service_revenue_service.get_data(**filters),
-            'expense_trends': self.expense_trend_service.get_data(**filters),
-            'expense_distribution': self.expense_distribution_service.get_data(**filters),
+        if not self.use_cache:
+            return self._compute_dashboard_data(**filters)
+        
+        params = {
+            f"{service.cache_name}_{key}": value
+            for service in self.services
+            for key, value in service.get_cache_params().items()
         }
+        # A page with a degraded widget is served once but never cached.
+        return DashboardCache.get_or_compute(
+            self.CACHE_NAME,
+            lambda: self._compute_dashboard_data(**filters),
+            cache_if=lambda data: not data['unavailable'],
+            **params,
+            **filters
+        )
+    
+    def _compute_dashboard_data(self, **filters):
+        if self.workers > 1:
+            results = self._compute_concurrently(filters)
+        else:
+            results = {service.cache_name: self._get_widget_data(service, filters) for service in self.services}
+        
+        data = {'unavailable': {}}
+        for key, service in self.widgets:
+            if service.cache_name in results:
+                widget_data = results[service.cache_name]
+            else:
+                data['unavailable'][service.cache_name] = True
+                widget_data = service.get_placeholder()
+            if key is None:
+                data.update(widget_data)
+            else:
+                data[key] = widget_data
+        return data
+    
+    def _compute_concurrently(self, filters):
+        # Widgets run on a process-wide pool so concurrent page loads share
+        # one bound on threads and database connections. Each widget's
+        # timeout starts when a worker picks it up. A widget still queued
+        # after one timeout per round of this page's widgets is cancelled,
+        # so a pool held by overrunning widgets cannot stall the page. A
+        # widget that fails, overruns or is cancelled is left out.
+        executor = self._get_executor(self.workers)
+        submitted = time.monotonic()
+        queue_limit = self.widget_timeout * math.ceil(len(self.services) / self.workers)
+        started = {}
+        futures = {
+            executor.submit(self._run_widget, service, filters, started): service.cache_name
+            for service in self.services
+        }
+        
+        def deadline(name):
+            if name in started:
+                return started[name] + self.widget_timeout
+            return submitted + queue_limit
+        
+        results = {}
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+            for future in [future for future in pending if deadline(futures[future]) <= now]:
+                pending.discard(future)
+                if future.cancel():
+                    logger.warning(f"Dashboard widget {futures[future]} was still queued after {queue_limit}s")
+                else:
+                    logger.warning(f"Dashboard widget {futures[future]} timed out after {self.widget_timeout}s")
+            if not pending:
+                break
+            
+            timeout = min(deadline(futures[future]) for future in pending) - now
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    results[futures[future]] = future.result()
+                except Exception:
+                    logger.exception(f"Error computing dashboard widget {futures[future]}")
+        return results
+    
+    def _run_widget(self, service, filters, started):
+        # Pool threads sit outside the request cycle, so nothing else closes
+        # the connection each one opens. An overrunning widget keeps its
+        # thread until it returns; on PostgreSQL the statement timeout ends
+        # its queries at the widget timeout, so only Python-side work can
+        # hold a slot for longer.
+        started[service.cache_name] = time.monotonic()
+        try:
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET statement_timeout = %s', [int(self.widget_timeout * 1000)])
+            return self._get_widget_data(service, filters)
+        finally:
+            connection.close()
+    
+    def _get_widget_data(self, service, filters):
+        if self.use_cache:
+            return service.get_cached_data(**filters)
+        return service.get_data(**filters)
+    
+    @classmethod
+    def _get_executor(cls, workers):
+        with cls._executors_lock:
+            if workers not in cls._executors:
+                cls._executors[workers] = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix='dashboard-widget'
+                )
+            return cls._executors[workers]
+    
+    def cache_stats(self):
+        return DashboardCache.stats([self.CACHE_NAME] + [service.cache_name for service in self.services])
 
 
 __all__ = [
+    'DashboardCache',
     'DashboardOrchestrator',
     'FinancialMetricsService',
     'CashFlowService',
     'ServiceRevenueService',
     'ExpenseTrendService',
     'ExpenseDistributionService',
+    'TimeSeries',
+    'TimeSeriesService',
 ]
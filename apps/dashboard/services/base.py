@@ -4,10 +4,27 @@ from django.db.models import QuerySet
 
 
 class BaseAnalyticsService(ABC):
+    cache_name = None
     
     @abstractmethod
     def get_data(self, **filters) -> Any:
         pass
+    
+    def get_cache_params(self) -> Dict:
+        return {}
+    
+    def get_placeholder(self) -> Any:
+        # Empty data in the widget's shape, shown when it is unavailable.
+        return []
+    
+    def get_cached_data(self, **filters) -> Any:
+        from .cache import DashboardCache
+        return DashboardCache.get_or_compute(
+            self.cache_name,
+            lambda: self.get_data(**filters),
+            **self.get_cache_params(),
+            **filters
+        )
 
 
 class BaseAggregationService(ABC):
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.core.services.ledger_version import LedgerVersion
+
+MISSING = object()
+
+
+class DashboardCache:
+    CACHE_PREFIX = 'dashboard'
+    # Correctness comes from the ledger version in the key; the timeout only
+    # lets superseded entries age out of the cache.
+    TIMEOUT = 60 * 60 * 24
+
+    # Hit and miss counts are kept in process memory, per worker. Counting
+    # in the shared cache would write to the database cache table on every
+    # read, hits included.
+    _counts = Counter()
+    _counts_lock = threading.Lock()
+
+    @classmethod
+    def get_or_compute(cls, name: str, compute: Callable[[], Any], cache_if: Callable[[Any], bool] = None,
+                       **params) -> Any:
+        key = cls.make_key(name, params)
+        result = cache.get(key, MISSING)
+        if result is not MISSING:
+            cls._count(name, 'hits')
+            return result
+
+        cls._count(name, 'misses')
+        result = compute()
+        if cache_if is None or cache_if(result):
+            cache.set(key, result, cls.TIMEOUT)
+        return result
+
+    @classmethod
+    def make_key(cls, name: str, params: Dict) -> str:
+        # Widgets are relative to today (month to date, last 12 months), so
+        # the date is part of the key alongside the ledger version.
+        normalised = json.dumps(
+            {key: value for key, value in params.items() if value not in (None, '')},
+            sort_keys=True,
+            default=str
+        )
+        digest = hashlib.md5(normalised.encode('utf-8')).hexdigest()
+        return f"{cls.CACHE_PREFIX}:{name}:{LedgerVersion.current()}:{timezone.localdate().isoformat()}:{digest}"
+
+    @classmethod
+    def stats(cls, names: Iterable[str]) -> Dict[str, Dict]:
+        with cls._counts_lock:
+            counts = dict(cls._counts)
+        stats = {}
+        for name in names:
+            hits = counts.get((name, 'hits'), 0)
+            misses = counts.get((name, 'misses'), 0)
+            stats[name] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            }
+        return stats
+
+    @classmethod
+    def reset_stats(cls, names: Iterable[str] = None):
+        with cls._counts_lock:
+            if names is None:
+                cls._counts.clear()
+            for name in names or ():
+                for stat in ('hits', 'misses'):
+                    cls._counts.pop((name, stat), None)
+
+    @classmethod
+    def _count(cls, name: str, stat: str):
+        with cls._counts_lock:
+            cls._counts[(name, stat)] += 1
@@ -1,10 +1,11 @@
-from django.db.models import Sum
 from typing import List, Dict
-from apps.expenses.models import Expense
+from apps.dashboard.models import LedgerMonthlyRollup
+from apps.expenses.models import ExpenseCategory
 from .base import BaseAnalyticsService, BaseAggregationService
 
 
 class ExpenseDistributionService(BaseAnalyticsService, BaseAggregationService):
+    cache_name = 'expense_distribution'
     
     def get_data(self, **filters) -> List[Dict]:
         start_date = filters.get('start_date')
@@ -22,23 +23,24 @@ class ExpenseDistributionService(BaseAnalyticsService, BaseAggregationService):
         return categories
     
     def _get_category_totals(self, start_date=None, end_date=None) -> List[Dict]:
-        queryset = Expense.objects.select_related('category').filter(
-            category__is_active=True
+        totals = LedgerMonthlyRollup.objects.summarise(
+            'EXPENSE', start_date, end_date, group_by=('category',)
+        )
+        names = dict(
+            ExpenseCategory.objects.filter(
+                is_active=True,
+                pk__in=[row['category'] for row in totals]
+            ).values_list('pk', 'name')
         )
         
-        queryset = self._apply_date_filters(queryset, start_date, end_date)
-        
-        category_totals = queryset.values(
-            'category__id',
-            'category__name'
-        ).annotate(
-            total=Sum('amount'),
-        ).order_by('-total')
-        
-        return [
-            {
-                'name': item['category__name'],
-                'total': float(item['total'] or 0),
-            }
-            for item in category_totals if item['total']
-        ]
+        return sorted(
+            (
+                {
+                    'name': names[row['category']],
+                    'total': float(row['total']),
+                }
+                for row in totals if row['category'] in names and row['total']
+            ),
+            key=lambda category: category['total'],
+            reverse=True
+        )
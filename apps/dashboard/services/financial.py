@@ -1,49 +1,53 @@
-from django.db.models import Sum
+from decimal import Decimal
+
+from django.db.models import Q, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from apps.accounting.models import Income
-from apps.expenses.models import Expense
+from apps.dashboard.models import LedgerMonthlyRollup, ROLLUP_SOURCES
 from .base import BaseAnalyticsService
 
 
 class FinancialMetricsService(BaseAnalyticsService):
+    cache_name = 'financial_metrics'
     
     def __init__(self):
         self.today = timezone.now().date()
         self.month_start = self.today.replace(day=1)
     
-    def get_data(self, **filters):
+    METRICS = [
+        'total_income', 'monthly_income',
+        'total_expenses', 'monthly_expenses',
+        'total_profit', 'monthly_profit',
+        'profit_margin', 'monthly_profit_margin',
+    ]
+    
+    def get_placeholder(self):
+        return dict.fromkeys(self.METRICS)
+    
+    def get_data(self, start_date=None, end_date=None, **filters):
+        totals = self._get_totals(start_date, end_date)
         return {
-            **self._get_income_metrics(),
-            **self._get_expense_metrics(),
-            **self._get_profit_metrics(),
+            **self._get_income_metrics(totals['INCOME']),
+            **self._get_expense_metrics(totals['EXPENSE']),
+            **self._get_profit_metrics(totals),
         }
     
-    def _get_income_metrics(self) -> dict:
-        total = self._aggregate_income()
-        monthly = self._aggregate_income(start_date=self.month_start)
-        
+    def _get_income_metrics(self, totals: dict) -> dict:
         return {
-            'total_income': total,
-            'monthly_income': monthly,
+            'total_income': totals['total'],
+            'monthly_income': totals['monthly'],
         }
     
-    def _get_expense_metrics(self) -> dict:
-        total = self._aggregate_expenses()
-        monthly = self._aggregate_expenses(start_date=self.month_start)
-        
+    def _get_expense_metrics(self, totals: dict) -> dict:
         return {
-            'total_expenses': total,
-            'monthly_expenses': monthly,
+            'total_expenses': totals['total'],
+            'monthly_expenses': totals['monthly'],
         }
     
-    def _get_profit_metrics(self) -> dict:
-        total_income = self._aggregate_income()
-        total_expenses = self._aggregate_expenses()
-        monthly_income = self._aggregate_income(start_date=self.month_start)
-        monthly_expenses = self._aggregate_expenses(start_date=self.month_start)
-        
-        total_profit = total_income - total_expenses
-        monthly_profit = monthly_income - monthly_expenses
+    def _get_profit_metrics(self, totals: dict) -> dict:
+        total_income, monthly_income = totals['INCOME']['total'], totals['INCOME']['monthly']
+        total_profit = total_income - totals['EXPENSE']['total']
+        monthly_profit = monthly_income - totals['EXPENSE']['monthly']
         
         profit_margin = (total_profit / total_income * 100) if total_income > 0 else 0
         monthly_profit_margin = (monthly_profit / monthly_income * 100) if monthly_income > 0 else 0
@@ -55,18 +59,48 @@ class FinancialMetricsService(BaseAnalyticsService):
             'monthly_profit_margin': monthly_profit_margin,
         }
     
-    def _aggregate_income(self, start_date=None, end_date=None) -> float:
-        queryset = Income.objects.all()
-        if start_date:
-            queryset = queryset.filter(date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(date__lte=end_date)
-        return float(queryset.aggregate(total=Sum('amount'))['total'] or 0)
+    def _get_totals(self, start_date=None, end_date=None) -> dict:
+        """Total and month-to-date sums per ledger kind in at most two queries:
+        whole months of the range from the rollup, and the partial edge months
+        plus month to date from the source tables in one UNION ALL.
+        """
+        totals = {kind: {'total': 0.0, 'monthly': 0.0} for kind in ROLLUP_SOURCES}
+        rollups, partial = LedgerMonthlyRollup.objects.split_range(start_date, end_date)
+        
+        whole_months = rollups.aggregate(**{
+            kind: Sum('total', filter=Q(kind=kind)) for kind in ROLLUP_SOURCES
+        })
+        for kind, total in whole_months.items():
+            totals[kind]['total'] += float(total or 0)
+        
+        edge_filter = Q()
+        for first, last in partial:
+            edge_filter |= Q(date__range=(first, last))
+        
+        month_from = max(self.month_start, start_date or self.month_start)
+        month_to = min(self.today, end_date or self.today)
+        month_filter = Q(date__range=(month_from, month_to)) if month_from <= month_to else Q()
+        
+        if not edge_filter and not month_filter:
+            return totals
+        
+        source_rows = None
+        for kind, (model, _) in ROLLUP_SOURCES.items():
+            rows = model.objects.filter(edge_filter | month_filter).order_by().annotate(
+                kind=Value(kind)
+            ).values('kind').annotate(
+                edge=self._conditional_sum(edge_filter),
+                monthly=self._conditional_sum(month_filter),
+            )
+            source_rows = rows if source_rows is None else source_rows.union(rows, all=True)
+        
+        for row in source_rows:
+            totals[row['kind']]['total'] += float(row['edge'])
+            totals[row['kind']]['monthly'] += float(row['monthly'])
+        return totals
     
-    def _aggregate_expenses(self, start_date=None, end_date=None) -> float:
-        queryset = Expense.objects.all()
-        if start_date:
-            queryset = queryset.filter(date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(date__lte=end_date)
-        return float(queryset.aggregate(total=Sum('amount'))['total'] or 0)
+    @staticmethod
+    def _conditional_sum(condition):
+        if not condition:
+            return Value(Decimal('0.00'))
+        return Coalesce(Sum('amount', filter=condition), Value(Decimal('0.00')))
@@ -1,10 +1,11 @@
-from django.db.models import Sum, Count, Avg
-from typing import List, Dict
-from apps.accounting.models import Income, ServiceTypeChoices
+from typing import List, Dict, Optional
+from apps.accounting.models import ServiceTypeChoices
+from apps.dashboard.models import LedgerMonthlyRollup
 from .base import BaseAnalyticsService, BaseAggregationService
 
 
 class ServiceRevenueService(BaseAnalyticsService, BaseAggregationService):
+    cache_name = 'service_revenue'
     
     def get_data(self, **filters) -> List[Dict]:
         start_date = filters.get('start_date')
@@ -12,9 +13,15 @@ class ServiceRevenueService(BaseAnalyticsService, BaseAggregationService):
         
         services = []
         total_revenue = 0.0
+        totals = {
+            row['service_type']: row
+            for row in LedgerMonthlyRollup.objects.summarise(
+                'INCOME', start_date, end_date, group_by=('service_type',)
+            )
+        }
         
         for service_type, service_label in ServiceTypeChoices.choices:
-            data = self._calculate_service_metrics(service_type, start_date, end_date)
+            data = self._calculate_service_metrics(totals.get(service_type))
             
             if data['revenue'] > 0:
                 services.append({
@@ -28,19 +35,10 @@ class ServiceRevenueService(BaseAnalyticsService, BaseAggregationService):
         
         return sorted(services, key=lambda x: x['revenue'], reverse=True)
     
-    def _calculate_service_metrics(self, service_type: str, start_date=None, end_date=None) -> Dict:
-        queryset = Income.objects.filter(service_type=service_type)
-        queryset = self._apply_date_filters(queryset, start_date, end_date)
-        
-        aggregation = queryset.aggregate(
-            total_revenue=Sum('amount'),
-            count=Count('id'),
-            avg_revenue=Avg('amount')
-        )
-        
-        revenue = float(aggregation['total_revenue'] or 0)
-        count = aggregation['count'] or 0
-        avg_revenue = float(aggregation['avg_revenue'] or 0)
+    def _calculate_service_metrics(self, totals: Optional[Dict] = None) -> Dict:
+        revenue = float(totals['total']) if totals else 0.0
+        count = totals['count'] if totals else 0
+        avg_revenue = revenue / count if count else 0.0
         
         return {
             'revenue': revenue,
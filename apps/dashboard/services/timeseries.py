@@ -0,0 +1,150 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+from django.db.models import DateField, QuerySet, Sum
+from django.db.models.functions import Trunc
+
+GRAINS = ['day', 'week', 'month', 'quarter', 'financial_year']
+
+# Australian financial years run from July to June.
+FINANCIAL_YEAR_START_MONTH = 7
+
+# Financial years are folded together from months in Python, since there is
+# no portable SQL truncation to a July year start.
+SQL_GRAINS = {
+    'day': 'day',
+    'week': 'week',
+    'month': 'month',
+    'quarter': 'quarter',
+    'financial_year': 'month',
+}
+
+
+class TimeSeries:
+    """Dense matrix of values per period and dimension key, with every period
+    of the range present and missing cells filled in.
+    """
+
+    def __init__(self, grain: str, periods: List[date], values: Dict[Any, List], fill=Decimal('0.00')):
+        self.grain = grain
+        self.periods = periods
+        self.values = values
+        self.fill = fill
+
+    @property
+    def keys(self) -> List:
+        return list(self.values)
+
+    @property
+    def labels(self) -> List[str]:
+        return [TimeSeriesService.label(period, self.grain) for period in self.periods]
+
+    def column(self, key) -> List:
+        return self.values.get(key, [self.fill] * len(self.periods))
+
+    def totals(self) -> Dict:
+        return {key: sum(values, self.fill) for key, values in self.values.items()}
+
+    def rows(self) -> Iterable:
+        # (period, label, {key: value}) for each period in order
+        for index, period in enumerate(self.periods):
+            yield period, TimeSeriesService.label(period, self.grain), {
+                key: values[index] for key, values in self.values.items()
+            }
+
+
+class TimeSeriesService:
+
+    @classmethod
+    def build(cls, queryset: QuerySet, date_field: str, grain: str = 'month', start_date=None, end_date=None,
+              dimensions=(), value=Sum('amount'), fill=Decimal('0.00')) -> TimeSeries:
+        """Group the queryset by period and dimensions in one query and spread
+        the result over every period from start_date to end_date (or the
+        data's own range). Keys are the dimension value, or a tuple of values
+        when there are several or none. Dates in the rollup table are month
+        starts, so it only supports month and coarser grains.
+        """
+        if grain not in GRAINS:
+            raise ValueError(f"Unknown time series grain: {grain}")
+
+        if start_date:
+            queryset = queryset.filter(**{f'{date_field}__gte': cls.period_start(start_date, grain)})
+        if end_date:
+            queryset = queryset.filter(**{f'{date_field}__lte': end_date})
+
+        rows = (
+            queryset.order_by()
+            .annotate(series_bucket=Trunc(date_field, SQL_GRAINS[grain], output_field=DateField()))
+            .values('series_bucket', *dimensions)
+            .annotate(series_value=value)
+        )
+
+        cells = defaultdict(lambda: fill)
+        keys = {}
+        for row in rows:
+            bucket = row['series_bucket']
+            if isinstance(bucket, datetime):
+                bucket = bucket.date()
+            key = row[dimensions[0]] if len(dimensions) == 1 else tuple(row[field] for field in dimensions)
+            keys[key] = None
+            cells[(cls.period_start(bucket, grain), key)] += row['series_value'] or fill
+
+        periods = cls.periods(
+            start_date or min((period for period, _ in cells), default=None),
+            end_date or max((period for period, _ in cells), default=None),
+            grain
+        )
+        return TimeSeries(
+            grain,
+            periods,
+            {key: [cells.get((period, key), fill) for period in periods] for key in keys},
+            fill
+        )
+
+    @classmethod
+    def periods(cls, start_date, end_date, grain: str) -> List[date]:
+        if start_date is None or end_date is None:
+            return []
+        periods = []
+        period = cls.period_start(start_date, grain)
+        while period <= end_date:
+            periods.append(period)
+            period = cls.shift(period, grain, 1)
+        return periods
+
+    @staticmethod
+    def period_start(day: date, grain: str) -> date:
+        if grain == 'day':
+            return day
+        if grain == 'week':
+            return day - timedelta(days=day.weekday())
+        if grain == 'month':
+            return day.replace(day=1)
+        if grain == 'quarter':
+            return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+        year = day.year if day.month >= FINANCIAL_YEAR_START_MONTH else day.year - 1
+        return date(year, FINANCIAL_YEAR_START_MONTH, 1)
+
+    @classmethod
+    def shift(cls, period: date, grain: str, count: int) -> date:
+        """Start of the period count periods after (or before) the given one."""
+        period = cls.period_start(period, grain)
+        if grain in ('day', 'week'):
+            return period + timedelta(days=count * (7 if grain == 'week' else 1))
+        months = {'month': 1, 'quarter': 3, 'financial_year': 12}[grain] * count
+        month_index = period.month - 1 + months
+        return date(period.year + month_index // 12, month_index % 12 + 1, 1)
+
+    @staticmethod
+    def label(period: date, grain: str) -> str:
+        if grain == 'day':
+            return period.strftime('%d %b %Y')
+        if grain == 'week':
+            return f"Week of {period:%d %b %Y}"
+        if grain == 'month':
+            return period.strftime('%b %Y')
+        if grain == 'quarter':
+            return f"Q{(period.month - 1) // 3 + 1} {period.year}"
+        return f"FY{period.year}-{(period.year + 1) % 100:02d}"
@@ -0,0 +1,76 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.accounting.models import Income
+from apps.core.services.ledger_version import LedgerVersion
+from apps.expenses.models import Expense, ExpenseCategory
+from apps.invoicing.models import Invoice, InvoiceItem
+
+from .models import LedgerMonthlyRollup
+
+ROLLUP_KIND_BY_MODEL = {Income: 'INCOME', Expense: 'EXPENSE'}
+ROLLUP_ENTRY_FIELDS = {
+    'INCOME': ['accounting_year', 'accounting_month', 'service_type', 'amount'],
+    'EXPENSE': ['accounting_year', 'accounting_month', 'category_id', 'amount'],
+}
+
+
+def rollup_entry(kind, instance):
+    return LedgerMonthlyRollup.entry_for(kind, {
+        field: getattr(instance, field) for field in ROLLUP_ENTRY_FIELDS[kind]
+    })
+
+
+@receiver(pre_save, sender=Income)
+@receiver(pre_save, sender=Expense)
+def remember_rollup_entry(sender, instance, raw=False, **kwargs):
+    instance._previous_rollup_entry = None
+    if raw or instance.pk is None:
+        return
+
+    kind = ROLLUP_KIND_BY_MODEL[sender]
+    previous = sender.objects.filter(pk=instance.pk).values(*ROLLUP_ENTRY_FIELDS[kind]).first()
+    if previous:
+        instance._previous_rollup_entry = LedgerMonthlyRollup.entry_for(kind, previous)
+
+
+@receiver(post_save, sender=Income)
+@receiver(post_save, sender=Expense)
+def apply_rollup_entry(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    kind = ROLLUP_KIND_BY_MODEL[sender]
+    key, amount = rollup_entry(kind, instance)
+    previous = getattr(instance, '_previous_rollup_entry', None)
+    instance._previous_rollup_entry = None
+
+    if previous and previous[0] == key:
+        if previous[1] != amount:
+            LedgerMonthlyRollup.objects.apply(kind, *key, amount - previous[1], 0)
+        return
+    if previous:
+        LedgerMonthlyRollup.objects.apply(kind, *previous[0], -previous[1], -1)
+    LedgerMonthlyRollup.objects.apply(kind, *key, amount, 1)
+
+
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Expense)
+def remove_rollup_entry(sender, instance, **kwargs):
+    kind = ROLLUP_KIND_BY_MODEL[sender]
+    key, amount = rollup_entry(kind, instance)
+    LedgerMonthlyRollup.objects.apply(kind, *key, -amount, -1)
+
+
+@receiver(post_save, sender=Income)
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=InvoiceItem)
+@receiver(post_save, sender=ExpenseCategory)
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=InvoiceItem)
+@receiver(post_delete, sender=ExpenseCategory)
+def bump_ledger_version(sender, **kwargs):
+    LedgerVersion.bump_on_commit()
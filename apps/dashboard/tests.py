@@ -0,0 +1,334 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from decimal import Decimal
+from datetime import date
+
+from apps.accounting.models import Income, PaymentMethodChoices, ServiceTypeChoices
+from apps.core.services.ledger_version import LedgerVersion
+from apps.dashboard.models import LedgerMonthlyRollup
+from apps.dashboard.services import (
+    CashFlowService, DashboardCache, DashboardOrchestrator, ExpenseTrendService, FinancialMetricsService, TimeSeriesService
+)
+from apps.expenses.models import Expense, ExpenseCategory
+
+
+def create_income(amount, day, service_type=ServiceTypeChoices.LOCAL_MOVE):
+    return Income.objects.create(
+        service_type=service_type,
+        amount=Decimal(amount),
+        date=day,
+        payment_method=PaymentMethodChoices.CARD,
+        client_name='John Smith'
+    )
+
+
+class LedgerMonthlyRollupTestCase(TestCase):
+    def setUp(self):
+        self.fuel = ExpenseCategory.objects.create(name='Fuel', category_type='VARIABLE')
+        self.rent = ExpenseCategory.objects.create(name='Rent', category_type='FIXED')
+
+    def rollup(self, kind='INCOME'):
+        return {
+            (row.year, row.month, row.service_type or row.category_id): (row.total, row.count)
+            for row in LedgerMonthlyRollup.objects.filter(kind=kind, count__gt=0)
+        }
+
+    def test_rollups_follow_saves_moves_and_deletes(self):
+        first = create_income('100.00', date(2025, 3, 10))
+        create_income('50.00', date(2025, 3, 20))
+        storage = create_income('30.00', date(2025, 4, 2), ServiceTypeChoices.STORAGE)
+        self.assertEqual(self.rollup(), {
+            (2025, 3, 'local'): (Decimal('150.00'), 2),
+            (2025, 4, 'storage'): (Decimal('30.00'), 1),
+        })
+
+        first.amount = Decimal('120.00')
+        first.save()
+        storage.date = date(2025, 5, 1)
+        storage.save()
+        self.assertEqual(self.rollup(), {
+            (2025, 3, 'local'): (Decimal('170.00'), 2),
+            (2025, 5, 'storage'): (Decimal('30.00'), 1),
+        })
+
+        Income.objects.filter(date__month=3).delete()
+        self.assertEqual(self.rollup(), {(2025, 5, 'storage'): (Decimal('30.00'), 1)})
+
+        expense = Expense.objects.create(category=self.fuel, amount=Decimal('80.00'), date=date(2025, 3, 5), description='Diesel')
+        expense.category = self.rent
+        expense.save()
+        self.assertEqual(self.rollup('EXPENSE'), {(2025, 3, self.rent.pk): (Decimal('80.00'), 1)})
+
+    def test_summarise_reads_partial_months_from_source(self):
+        for amount, day in [('10.00', date(2025, 2, 27)), ('20.00', date(2025, 3, 1)),
+                            ('40.00', date(2025, 3, 31)), ('80.00', date(2025, 4, 14)),
+                            ('160.00', date(2025, 4, 15))]:
+            create_income(amount, day)
+
+        for start, end in [(None, None), (date(2025, 2, 28), date(2025, 4, 14)), (date(2025, 3, 31), date(2025, 4, 1)),
+                           (date(2025, 3, 1), date(2025, 3, 31)), (date(2025, 4, 15), None)]:
+            incomes = Income.objects.all()
+            if start:
+                incomes = incomes.filter(date__gte=start)
+            if end:
+                incomes = incomes.filter(date__lte=end)
+            expected = incomes.aggregate(total=Sum('amount'), count=Count('pk'))
+            rows = LedgerMonthlyRollup.objects.summarise('INCOME', start, end)
+            actual = rows[0] if rows else {'total': None, 'count': 0}
+            self.assertEqual((actual['total'], actual['count']), (expected['total'], expected['count']), (start, end))
+
+    def test_rebuild_repairs_bulk_changes(self):
+        create_income('100.00', date(2025, 3, 10))
+        Income.objects.update(amount=Decimal('75.00'))
+
+        LedgerMonthlyRollup.objects.rebuild()
+        self.assertEqual(self.rollup(), {(2025, 3, 'local'): (Decimal('75.00'), 1)})
+
+
+class DashboardCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        DashboardCache.reset_stats()
+        create_income('100.00', date.today())
+
+    def test_repeat_loads_are_served_from_cache(self):
+        orchestrator = DashboardOrchestrator()
+        first = orchestrator.get_dashboard_data()
+
+        with self.assertNumQueries(0), mock.patch.multiple(cache, add=mock.DEFAULT, set=mock.DEFAULT, incr=mock.DEFAULT) as writes:
+            self.assertEqual(DashboardOrchestrator().get_dashboard_data(), first)
+        self.assertFalse([method for method, patched in writes.items() if patched.called])
+
+        stats = orchestrator.cache_stats()
+        self.assertEqual((stats['dashboard']['hits'], stats['dashboard']['misses']), (1, 1))
+        self.assertEqual((stats['cashflow']['hits'], stats['cashflow']['misses']), (0, 1))
+
+    def test_ledger_writes_invalidate_cached_results(self):
+        self.assertEqual(DashboardOrchestrator().get_dashboard_data()['total_income'], 100.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_income('50.00', date.today())
+        self.assertEqual(DashboardOrchestrator().get_dashboard_data()['total_income'], 150.0)
+
+    def test_bumps_replace_the_version_without_incrementing(self):
+        versions = {LedgerVersion.current()}
+        with mock.patch.object(cache, 'incr', side_effect=AssertionError('incr is not atomic')):
+            versions.update(LedgerVersion.bump() for _ in range(3))
+        self.assertEqual(len(versions), 4)
+        self.assertIn(LedgerVersion.current(), versions)
+
+    def test_category_changes_invalidate_cached_results(self):
+        fuel = ExpenseCategory.objects.create(name='Fuel', category_type='VARIABLE')
+        Expense.objects.create(category=fuel, amount=Decimal('25.00'), date=date.today(), description='Diesel')
+        self.assertEqual(DashboardOrchestrator().get_dashboard_data()['expense_distribution'][0]['name'], 'Fuel')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fuel.name = 'Diesel'
+            fuel.save()
+        self.assertEqual(DashboardOrchestrator().get_dashboard_data()['expense_distribution'][0]['name'], 'Diesel')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fuel.is_active = False
+            fuel.save()
+        self.assertEqual(DashboardOrchestrator().get_dashboard_data()['expense_distribution'], [])
+
+    def test_filters_are_part_of_the_key(self):
+        service = DashboardOrchestrator().service_revenue_service
+        all_time = service.get_cached_data()
+        filtered = service.get_cached_data(start_date=date.today().replace(day=1), end_date=None)
+
+        self.assertEqual(all_time, filtered)
+        self.assertEqual(service.get_cached_data(start_date=date(1990, 1, 1), end_date=date(1990, 1, 31)), [])
+        self.assertEqual(DashboardOrchestrator().cache_stats()['service_revenue']['misses'], 3)
+
+
+class BlockedExpenseTrendService(ExpenseTrendService):
+    def __init__(self, release):
+        super().__init__()
+        self.release = release
+
+    def get_data(self, **filters):
+        self.release.wait(5)
+        return super().get_data(**filters)
+
+
+class SlowWidgetOrchestrator(DashboardOrchestrator):
+    def _get_widget_data(self, service, filters):
+        time.sleep(0.3)
+        return super()._get_widget_data(service, filters)
+
+
+class ConcurrentDashboardTestCase(TransactionTestCase):
+    # Worker threads use their own connections, so the data must be committed.
+
+    def setUp(self):
+        cache.clear()
+        DashboardCache.reset_stats()
+        fuel = ExpenseCategory.objects.create(name='Fuel', category_type='VARIABLE')
+        create_income('100.00', date.today())
+        create_income('40.00', date.today(), ServiceTypeChoices.STORAGE)
+        Expense.objects.create(category=fuel, amount=Decimal('25.00'), date=date.today(), description='Diesel')
+
+    def test_concurrent_mode_matches_serial(self):
+        serial = DashboardOrchestrator(workers=0, use_cache=False).get_dashboard_data()
+        concurrent = DashboardOrchestrator(workers=3, widget_timeout=10, use_cache=False).get_dashboard_data()
+
+        self.assertEqual(concurrent, serial)
+        self.assertEqual(concurrent['unavailable'], {})
+        self.assertEqual(concurrent['total_income'], 140.0)
+
+    def test_slow_widget_degrades_without_being_cached(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        orchestrator = DashboardOrchestrator(workers=3, widget_timeout=0.5)
+        orchestrator.expense_trend_service = BlockedExpenseTrendService(release)
+
+        with self.assertLogs('apps.dashboard.services', 'WARNING'):
+            data = orchestrator.get_dashboard_data()
+        self.assertEqual(data['unavailable'], {'expense_trends': True})
+        self.assertEqual(data['expense_trends'], {'categories': [], 'monthly_trends': []})
+        self.assertEqual(data['total_income'], 140.0)
+
+        release.set()
+        data = orchestrator.get_dashboard_data()
+        self.assertEqual(data['unavailable'], {})
+        self.assertEqual(data['expense_trends']['categories'][0]['name'], 'Fuel')
+        self.assertEqual(orchestrator.cache_stats()['dashboard']['misses'], 2)
+
+    def test_queued_widgets_get_their_own_timeout(self):
+        # Two workers run the five widgets in three rounds; together they take
+        # longer than one widget timeout, but none of them overruns.
+        orchestrator = SlowWidgetOrchestrator(workers=2, widget_timeout=0.5, use_cache=False)
+
+        data = orchestrator.get_dashboard_data()
+        self.assertEqual(data['unavailable'], {})
+        self.assertEqual(data['total_income'], 140.0)
+
+    def test_failing_widget_degrades_to_placeholder(self):
+        orchestrator = DashboardOrchestrator(workers=3, widget_timeout=10)
+        orchestrator.financial_service.get_data = lambda **filters: 1 / 0
+
+        with self.assertLogs('apps.dashboard.services', 'ERROR'):
+            data = orchestrator.get_dashboard_data()
+        self.assertEqual(data['unavailable'], {'financial_metrics': True})
+        self.assertIsNone(data['total_income'])
+        self.assertEqual(len(data['service_revenue']), 2)
+
+    def test_dashboard_page_marks_unavailable_widgets(self):
+        user = get_user_model().objects.create_user(username='owner', password='secret', email='owner@example.com')
+        self.client.force_login(user)
+        with mock.patch.object(ExpenseTrendService, 'get_data', side_effect=RuntimeError('widget failed')), \
+                self.settings(DASHBOARD_WORKERS=2), self.assertLogs('apps.dashboard.services', 'ERROR'):
+            response = self.client.get(reverse('dashboard:home'))
+
+        self.assertContains(response, 'Temporarily unavailable', count=1)
+        self.assertContains(response, 'id="cashFlowChart"')
+        self.assertNotContains(response, 'id="expenseTrendsChart"')
+
+
+class TimeSeriesTestCase(TestCase):
+    def setUp(self):
+        create_income('100.00', date(2025, 6, 30))
+        create_income('50.00', date(2025, 7, 1))
+        create_income('20.00', date(2025, 9, 15), ServiceTypeChoices.STORAGE)
+
+    def test_buckets_are_gap_filled_from_one_query(self):
+        with self.assertNumQueries(1):
+            series = TimeSeriesService.build(
+                Income.objects.all(), 'date', 'month', start_date=date(2025, 6, 10), end_date=date(2025, 10, 5),
+                dimensions=('service_type',)
+            )
+
+        self.assertEqual(series.labels, ['Jun 2025', 'Jul 2025', 'Aug 2025', 'Sep 2025', 'Oct 2025'])
+        self.assertEqual(series.column('local'), [Decimal('100.00'), Decimal('50.00'), 0, 0, 0])
+        self.assertEqual(series.column('storage'), [0, 0, 0, Decimal('20.00'), 0])
+        self.assertEqual(series.column('interstate'), [0] * 5)
+        self.assertEqual(series.totals(), {'local': Decimal('150.00'), 'storage': Decimal('20.00')})
+
+    def test_financial_years_quarters_and_weeks(self):
+        financial_years = TimeSeriesService.build(Income.objects.all(), 'date', 'financial_year')
+        self.assertEqual(financial_years.labels, ['FY2024-25', 'FY2025-26'])
+        self.assertEqual(financial_years.column(()), [Decimal('100.00'), Decimal('70.00')])
+
+        quarters = TimeSeriesService.build(Income.objects.all(), 'date', 'quarter')
+        self.assertEqual(quarters.labels, ['Q2 2025', 'Q3 2025'])
+        self.assertEqual(quarters.column(()), [Decimal('100.00'), Decimal('70.00')])
+
+        weeks = TimeSeriesService.build(
+            Income.objects.all(), 'date', 'week', start_date=date(2025, 6, 30), end_date=date(2025, 7, 13)
+        )
+        self.assertEqual(weeks.periods, [date(2025, 6, 30), date(2025, 7, 7)])
+        self.assertEqual(weeks.column(()), [Decimal('150.00'), 0])
+
+    def test_dashboard_series_cover_whole_months(self):
+        fuel = ExpenseCategory.objects.create(name='Fuel', category_type='VARIABLE')
+        Expense.objects.create(category=fuel, amount=Decimal('30.00'), date=date(2025, 7, 20), description='Diesel')
+
+        cashflow = CashFlowService(months_back=4)
+        cashflow.today = date(2025, 9, 30)
+        cashflow.start_date = date(2025, 6, 1)
+        with self.assertNumQueries(1):
+            data = cashflow.get_data()
+        self.assertEqual(data, [
+            {'month': 'Jun 2025', 'income': 100.0, 'expenses': 0.0, 'cash_flow': 100.0},
+            {'month': 'Jul 2025', 'income': 50.0, 'expenses': 30.0, 'cash_flow': 20.0},
+            {'month': 'Aug 2025', 'income': 0.0, 'expenses': 0.0, 'cash_flow': 0.0},
+            {'month': 'Sep 2025', 'income': 20.0, 'expenses': 0.0, 'cash_flow': 20.0},
+        ])
+
+        trends = ExpenseTrendService(months_back=2)
+        trends.today = date(2025, 8, 31)
+        trends.start_date = date(2025, 7, 1)
+        with self.assertNumQueries(2):
+            data = trends.get_data()
+        self.assertEqual(data['categories'], [{'id': fuel.pk, 'name': 'Fuel', 'total': 30.0}])
+        self.assertEqual(data['monthly_trends'], [
+            {'month': 'Jul 2025', 'categories': {fuel.pk: 30.0}},
+            {'month': 'Aug 2025', 'categories': {fuel.pk: 0.0}},
+        ])
+
+
+class FinancialMetricsTestCase(TestCase):
+    def setUp(self):
+        fuel = ExpenseCategory.objects.create(name='Fuel', category_type='VARIABLE')
+        create_income('1000.00', date(2025, 3, 10))
+        create_income('200.00', date(2025, 5, 3))
+        create_income('100.00', date(2025, 5, 20))
+        create_income('400.00', date(2025, 5, 28))
+        Expense.objects.create(category=fuel, amount=Decimal('300.00'), date=date(2025, 3, 12), description='Diesel')
+        Expense.objects.create(category=fuel, amount=Decimal('50.00'), date=date(2025, 5, 4), description='Diesel')
+
+        self.service = FinancialMetricsService()
+        self.service.today = date(2025, 5, 21)
+        self.service.month_start = date(2025, 5, 1)
+
+    def test_metrics_take_at_most_two_queries(self):
+        with self.assertNumQueries(2):
+            data = self.service.get_data()
+
+        self.assertEqual(data['total_income'], 1700.0)
+        self.assertEqual(data['total_expenses'], 350.0)
+        self.assertEqual(data['total_profit'], 1350.0)
+        # Month to date stops at today, so the 28 May income is excluded.
+        self.assertEqual(data['monthly_income'], 300.0)
+        self.assertEqual(data['monthly_expenses'], 50.0)
+        self.assertEqual(data['monthly_profit_margin'], 250.0 / 300.0 * 100)
+
+    def test_date_filters_are_honoured(self):
+        with self.assertNumQueries(2):
+            data = self.service.get_data(start_date=date(2025, 3, 11), end_date=date(2025, 5, 19))
+
+        self.assertEqual(data['total_income'], 200.0)
+        self.assertEqual(data['total_expenses'], 350.0)
+        self.assertEqual(data['monthly_income'], 200.0)
+
+        with self.assertNumQueries(1):
+            data = self.service.get_data(start_date=date(2025, 3, 1), end_date=date(2025, 4, 30))
+        self.assertEqual((data['total_income'], data['monthly_income']), (1000.0, 0.0))
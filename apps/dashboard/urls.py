@@ -7,4 +7,5 @@ urlpatterns = [
     path('', views.dashboard_home, name='home'),
     path('api/expense-distribution/', api_views.expense_distribution_data, name='api_expense_distribution'),
     path('api/service-revenue/', api_views.service_revenue_data, name='api_service_revenue'),
+    path('api/cache-stats/', api_views.cache_stats, name='api_cache_stats'),
 ]
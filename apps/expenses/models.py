@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 from apps.core.models import TimeStampedModel
 import os
@@ -127,7 +127,14 @@ class Expense(TimeStampedModel):
         if self.date:
             self.accounting_year = self.date.year
             self.accounting_month = self.date.month
-        super().save(*args, **kwargs)
+        # Dashboard rollups are kept in step by signal handlers, which must
+        # commit or roll back with the row.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
         return f"{self.category.name} - ${self.amount} AUD ({self.date})"
@@ -7,7 +7,7 @@ from django.shortcuts import get_object_or_404
 
 from apps.expenses.models import Expense, ExpenseCategory
 from apps.expenses.forms import ExpenseForm, ExpenseCategoryForm
-from apps.core.mixins import TemporalFilterMixin
+from apps.core.mixins import KeysetPaginationMixin, TemporalFilterMixin
 from apps.core.constants import SUCCESS_MESSAGES
 from apps.core.services.temporal_service import parse_temporal_filters, get_temporal_context
 
@@ -116,11 +116,12 @@ class ExpenseCategoryByTypeView(LoginRequiredMixin, TemplateView):
         return context
 
 
-class ExpenseListView(LoginRequiredMixin, TemporalFilterMixin, ListView):
+class ExpenseListView(LoginRequiredMixin, TemporalFilterMixin, KeysetPaginationMixin, ListView):
     model = Expense
     template_name = 'expenses/expense_list.html'
     context_object_name = 'expenses'
     paginate_by = 25
+    keyset_ordering = ['-date', '-created']
     
     def get_queryset(self):
         queryset = super().get_queryset()
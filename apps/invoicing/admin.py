@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Company, Invoice, InvoiceItem
+from .models import (
+    BankStatementImport, BankStatementLine, BASPeriodSnapshot, Client, Company, Invoice, InvoiceItem,
+    InvoicePDFJob, InvoiceReferenceCounter, RecurringInvoiceTemplate, RecurringInvoiceTemplateItem
+)
+from .reconciliation_service import BankReconciliationService
 
 
 class InvoiceItemInline(admin.TabularInline):
@@ -14,7 +18,6 @@ class CompanyAdmin(admin.ModelAdmin):
     list_display = ['business_name', 'legal_form', 'abn', 'gst_registered', 'city', 'state']
     list_filter = ['legal_form', 'gst_registered', 'state']
     search_fields = ['business_name', 'abn', 'acn']
-    readonly_fields = ['current_number']
     fieldsets = (
         ('Business Information', {
             'fields': ('legal_form', 'business_name', 'legal_name', 'abn', 'acn', 'gst_registered')
@@ -29,17 +32,37 @@ class CompanyAdmin(admin.ModelAdmin):
             'fields': ('bank_name', 'bsb', 'account_number')
         }),
         ('Invoice Configuration', {
-            'fields': ('invoice_prefix', 'current_number', 'logo')
+            'fields': ('invoice_prefix', 'logo')
         }),
     )
 
 
+@admin.register(Client)
+class ClientAdmin(admin.ModelAdmin):
+    list_display = [
+        'name', 'abn', 'client_type', 'invoice_count', 'income_count', 'lifetime_revenue',
+        'open_balance', 'last_invoice_date'
+    ]
+    list_filter = ['client_type']
+    search_fields = ['name', 'abn']
+    readonly_fields = [
+        'invoice_count', 'income_count', 'invoice_revenue', 'income_revenue', 'lifetime_revenue',
+        'open_balance', 'last_invoice_date'
+    ]
+    actions = ['recalculate_stats']
+
+    @admin.action(description='Recalculate stats')
+    def recalculate_stats(self, request, queryset):
+        updated = queryset.refresh_stats()
+        self.message_user(request, f"{updated} clients recalculated.")
+
+
 @admin.register(Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
-    list_display = ['reference', 'client_name', 'issue_date', 'due_date', 'total_amount', 'status', 'payment_date']
+    list_display = ['reference', 'client_name', 'issue_date', 'due_date', 'grand_total', 'status', 'payment_date']
     list_filter = ['status', 'client_type', 'issue_date']
     search_fields = ['reference', 'client_name', 'client_abn', 'payment_reference']
-    readonly_fields = ['reference', 'payment_reference', 'subtotal', 'gst_amount', 'total_amount', 'is_tax_invoice', 'retention_date']
+    readonly_fields = ['reference', 'payment_reference', 'subtotal_ex_gst', 'gst_total', 'grand_total', 'is_tax_invoice', 'retention_date']
     date_hierarchy = 'issue_date'
     inlines = [InvoiceItemInline]
     
@@ -57,7 +80,7 @@ class InvoiceAdmin(admin.ModelAdmin):
             'fields': ('notes',)
         }),
         ('Totals', {
-            'fields': ('subtotal', 'gst_amount', 'total_amount', 'is_tax_invoice'),
+            'fields': ('subtotal_ex_gst', 'gst_total', 'grand_total', 'is_tax_invoice'),
             'classes': ('collapse',)
         }),
         ('Compliance', {
@@ -69,12 +92,117 @@ class InvoiceAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('company')
+
 
 @admin.register(InvoiceItem)
 class InvoiceItemAdmin(admin.ModelAdmin):
     list_display = ['invoice', 'description', 'quantity', 'unit_price', 'gst_rate', 'total']
+    list_select_related = ['invoice']
     search_fields = ['invoice__reference', 'description']
     
     def total(self, obj):
         return f"${obj.total:.2f}"
     total.short_description = 'Total'
+
+
+@admin.register(BASPeriodSnapshot)
+class BASPeriodSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['period', 'period_type', 'start_date', 'end_date', 'invoice_count', 'g1_total_sales_inc_gst', 'gst_on_sales_1a', 'closed_by', 'created']
+    list_filter = ['period_type']
+    date_hierarchy = 'start_date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(InvoicePDFJob)
+class InvoicePDFJobAdmin(admin.ModelAdmin):
+    list_display = ['invoice', 'status', 'attempts', 'run_after', 'claimed_at', 'modified']
+    list_filter = ['status']
+    list_select_related = ['invoice']
+    search_fields = ['invoice__reference']
+    readonly_fields = ['invoice', 'attempts', 'claimed_at', 'last_error']
+    actions = ['retry_jobs']
+
+    @admin.action(description='Re-queue selected jobs')
+    def retry_jobs(self, request, queryset):
+        InvoicePDFJob.enqueue(queryset.values_list('invoice_id', flat=True))
+
+
+@admin.register(InvoiceReferenceCounter)
+class InvoiceReferenceCounterAdmin(admin.ModelAdmin):
+    list_display = ['prefix', 'year', 'last_number']
+    list_filter = ['year']
+    readonly_fields = ['prefix', 'year', 'last_number']
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(BankStatementImport)
+class BankStatementImportAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'file_format', 'matched_count', 'review_count', 'skipped_count', 'imported_by', 'created']
+    list_filter = ['file_format']
+    readonly_fields = ['filename', 'file_format', 'matched_count', 'review_count', 'skipped_count', 'imported_by']
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(BankStatementLine)
+class BankStatementLineAdmin(admin.ModelAdmin):
+    list_display = ['transaction_date', 'amount', 'description', 'status', 'invoice', 'review_note']
+    list_filter = ['status', 'statement']
+    list_select_related = ['invoice']
+    search_fields = ['description', 'bank_reference', 'invoice__reference']
+    raw_id_fields = ['invoice']
+    readonly_fields = [
+        'statement', 'line_number', 'transaction_date', 'amount', 'description',
+        'bank_reference', 'review_note'
+    ]
+    fields = readonly_fields[:6] + ['invoice', 'status', 'review_note']
+    actions = ['mark_invoices_paid', 'ignore_lines']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Mark the linked invoices as paid')
+    def mark_invoices_paid(self, request, queryset):
+        paid = BankReconciliationService.resolve_lines(queryset)
+        self.message_user(request, f"{paid} invoices marked as paid.")
+
+    @admin.action(description='Ignore selected lines')
+    def ignore_lines(self, request, queryset):
+        queryset.filter(status='REVIEW').update(status='IGNORED')
+
+
+class RecurringInvoiceTemplateItemInline(admin.TabularInline):
+    model = RecurringInvoiceTemplateItem
+    extra = 1
+    fields = ['description', 'quantity', 'unit_price', 'gst_treatment']
+
+
+@admin.register(RecurringInvoiceTemplate)
+class RecurringInvoiceTemplateAdmin(admin.ModelAdmin):
+    list_display = ['name', 'client_name', 'frequency', 'next_issue_date', 'end_date', 'invoice_status', 'is_active']
+    list_filter = ['frequency', 'is_active', 'invoice_status']
+    search_fields = ['name', 'client_name', 'client_abn']
+    readonly_fields = ['next_issue_date']
+    inlines = [RecurringInvoiceTemplateItemInline]
+
+    fieldsets = (
+        ('Schedule', {
+            'fields': ('name', 'company', 'frequency', 'start_date', 'end_date', 'next_issue_date', 'is_active')
+        }),
+        ('Client Details', {
+            'fields': ('client_type', 'client_name', 'client_abn', 'client_address')
+        }),
+        ('Generated Invoices', {
+            'fields': ('invoice_status', 'payment_terms', 'notes')
+        }),
+    )
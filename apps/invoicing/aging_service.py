@@ -0,0 +1,110 @@
+import csv
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Case, Count, DecimalField, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import OPEN_INVOICE_STATUSES, Invoice
+
+MONEY_FIELD = DecimalField(max_digits=14, decimal_places=2)
+
+AGING_BUCKETS = [
+    ('current', 'Current'),
+    ('days_1_30', '1–30 days'),
+    ('days_31_60', '31–60 days'),
+    ('days_61_90', '61–90 days'),
+    ('days_90_plus', '90+ days'),
+]
+
+
+class ARAgingService:
+    CACHE_TIMEOUT = 120
+    CACHE_PREFIX = 'invoicing:ar_aging'
+
+    @classmethod
+    def get_report(cls, as_of=None):
+        as_of = as_of or timezone.localdate()
+        key = f"{cls.CACHE_PREFIX}:{cls._generation()}:{as_of.isoformat()}"
+        return cache.get_or_set(key, lambda: cls.build_report(as_of), cls.CACHE_TIMEOUT)
+
+    @classmethod
+    def invalidate(cls):
+        try:
+            cache.incr(f"{cls.CACHE_PREFIX}:generation")
+        except ValueError:
+            cache.set(f"{cls.CACHE_PREFIX}:generation", 1, None)
+
+    @classmethod
+    def _generation(cls):
+        return cache.get_or_set(f"{cls.CACHE_PREFIX}:generation", 0, None)
+
+    @classmethod
+    def build_report(cls, as_of):
+        """Ages the invoices issued on or before as_of by their due date.
+
+        Whether an invoice is open comes from its current status, not its
+        status on as_of, so a past as_of leaves out invoices paid since.
+        """
+        rows = Invoice.objects.filter(
+            status__in=OPEN_INVOICE_STATUSES,
+            issue_date__lte=as_of
+        ).values('client_name', 'client_abn').annotate(
+            invoice_count=Count('pk'),
+            total=Sum('grand_total', output_field=MONEY_FIELD),
+            **cls._bucket_aggregates(as_of)
+        ).order_by('-total', 'client_name')
+
+        money_fields = [key for key, _ in AGING_BUCKETS] + ['total']
+        clients = []
+        totals = {'invoice_count': 0, **{field: Decimal('0.00') for field in money_fields}}
+        for row in rows:
+            for field in money_fields:
+                row[field] = (row[field] or Decimal('0.00')).quantize(Decimal('0.01'))
+                totals[field] += row[field]
+            totals['invoice_count'] += row['invoice_count']
+            clients.append(row)
+
+        return {
+            'as_of': as_of,
+            'buckets': AGING_BUCKETS,
+            'clients': clients,
+            'totals': totals,
+        }
+
+    @staticmethod
+    def _bucket_aggregates(as_of):
+        # Buckets compare due_date with fixed cut-off dates instead of
+        # computing an age per row, which keeps the CASE portable and lets
+        # the database compare against the indexed column directly.
+        day_30, day_60, day_90 = (as_of - timedelta(days=days) for days in (30, 60, 90))
+        conditions = {
+            'current': Q(due_date__isnull=True) | Q(due_date__gte=as_of),
+            'days_1_30': Q(due_date__lt=as_of, due_date__gte=day_30),
+            'days_31_60': Q(due_date__lt=day_30, due_date__gte=day_60),
+            'days_61_90': Q(due_date__lt=day_60, due_date__gte=day_90),
+            'days_90_plus': Q(due_date__lt=day_90),
+        }
+        return {
+            key: Sum(
+                Case(When(conditions[key], then='grand_total'), default=Value(Decimal('0.00'))),
+                output_field=MONEY_FIELD
+            )
+            for key, _ in AGING_BUCKETS
+        }
+
+    @staticmethod
+    def write_csv(report, output):
+        writer = csv.writer(output)
+        writer.writerow(['Client', 'ABN', 'Invoices', *[label for _, label in AGING_BUCKETS], 'Total'])
+        for row in report['clients']:
+            writer.writerow([
+                row['client_name'], row['client_abn'], row['invoice_count'],
+                *[f"{row[key]:.2f}" for key, _ in AGING_BUCKETS], f"{row['total']:.2f}"
+            ])
+        totals = report['totals']
+        writer.writerow([
+            'Total', '', totals['invoice_count'],
+            *[f"{totals[key]:.2f}" for key, _ in AGING_BUCKETS], f"{totals['total']:.2f}"
+        ])
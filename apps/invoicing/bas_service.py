@@ -1,9 +1,15 @@
 from decimal import Decimal
-from datetime import date, timedelta
-from django.db.models import Sum, Q, Case, When, DecimalField
-from django.utils import timezone
+from datetime import date, datetime, timedelta
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, Exists, ExpressionWrapper, F, OuterRef, Q, Sum
+from django.db.models.functions import TruncMonth
 
-from .models import Invoice, InvoiceItem
+from .constants import GST_RATE
+from .models import BAS_REPORTABLE_STATUSES as REPORTABLE_STATUSES, BASPeriodSnapshot, Invoice, InvoiceItem
+
+MONEY_FIELD = DecimalField(max_digits=14, decimal_places=2)
+PERIOD_GRAIN_MONTHS = {'monthly': 1, 'quarterly': 3, 'annual': 12}
 
 
 class BASReportingService:
@@ -11,21 +17,7 @@ class BASReportingService:
     @classmethod
     def get_quarterly_gst_report(cls, year, quarter):
         start_date, end_date = cls._get_quarter_dates(year, quarter)
-        
-        invoices = Invoice.objects.filter(
-            issue_date__range=[start_date, end_date],
-            status__in=['SENT', 'PAID', 'OVERDUE']
-        ).prefetch_related('items')
-        
-        bas_data = cls._calculate_bas_fields(invoices)
-        
-        return {
-            'period': f'Q{quarter} {year}',
-            'start_date': start_date,
-            'end_date': end_date,
-            'invoice_count': invoices.count(),
-            **bas_data
-        }
+        return cls._build_period_report('quarterly', f'Q{quarter} {year}', start_date, end_date)
     
     @classmethod
     def get_monthly_gst_report(cls, year, month):
@@ -35,85 +27,223 @@ class BASReportingService:
         else:
             end_date = date(year, month + 1, 1) - timedelta(days=1)
         
-        invoices = Invoice.objects.filter(
-            issue_date__range=[start_date, end_date],
-            status__in=['SENT', 'PAID', 'OVERDUE']
-        ).prefetch_related('items')
+        return cls._build_period_report('monthly', f'{month:02d}/{year}', start_date, end_date)
+    
+    @classmethod
+    def _build_period_report(cls, period_type, period, start_date, end_date, use_snapshot=True):
+        if use_snapshot:
+            snapshot = BASPeriodSnapshot.objects.filter(period_type=period_type, start_date=start_date).first()
+            if snapshot:
+                return snapshot.as_report()
         
-        bas_data = cls._calculate_bas_fields(invoices)
+        totals = cls._reportable_invoices(start_date, end_date).aggregate(**cls._bas_aggregates())
+        return cls._build_report(period, start_date, end_date, totals)
+    
+    @classmethod
+    def close_period(cls, year, quarter=None, month=None, closed_by=None):
+        if quarter:
+            period_type = 'quarterly'
+            start_date, end_date = cls._get_quarter_dates(year, quarter)
+            period = f'Q{quarter} {year}'
+        elif month:
+            period_type = 'monthly'
+            start_date = date(year, month, 1)
+            end_date = cls._add_months(start_date, 1) - timedelta(days=1)
+            period = f'{month:02d}/{year}'
+        else:
+            raise ValueError('A quarter or month is required to close a BAS period')
         
-        return {
-            'period': f'{month:02d}/{year}',
-            'start_date': start_date,
-            'end_date': end_date,
-            'invoice_count': invoices.count(),
-            **bas_data
-        }
+        try:
+            with transaction.atomic():
+                report = cls._build_period_report(period_type, period, start_date, end_date, use_snapshot=False)
+                snapshot = BASPeriodSnapshot.from_report(period_type, report, closed_by=closed_by)
+                snapshot.save()
+        except IntegrityError:
+            raise ValidationError(f'BAS period {period} is already closed.')
+        
+        return snapshot
     
     @classmethod
     def get_annual_gst_summary(cls, year):
         start_date = date(year, 1, 1)
         end_date = date(year, 12, 31)
         
-        invoices = Invoice.objects.filter(
-            issue_date__range=[start_date, end_date],
-            status__in=['SENT', 'PAID', 'OVERDUE']
-        ).prefetch_related('items')
-        
-        quarterly_data = []
-        for quarter in range(1, 5):
-            q_data = cls.get_quarterly_gst_report(year, quarter)
-            quarterly_data.append(q_data)
+        snapshots = {
+            (snapshot.period_type, snapshot.start_date): snapshot.as_report()
+            for snapshot in BASPeriodSnapshot.objects.filter(start_date__range=[start_date, end_date])
+        }
+        # Closed periods come from their snapshots. Months that were not
+        # closed on their own are reported live, even inside a closed quarter.
+        breakdown = cls.get_period_breakdown(start_date, end_date, grains=('monthly', 'quarterly'))
+        for period_type in ('monthly', 'quarterly'):
+            breakdown[period_type] = [
+                snapshots.get((period_type, report['start_date']), report)
+                for report in breakdown[period_type]
+            ]
         
-        total_g1 = sum(q['G1_total_sales_inc_gst'] for q in quarterly_data)
-        total_g2 = sum(q['G2_export_sales'] for q in quarterly_data)
-        total_g3 = sum(q['G3_gst_free_sales'] for q in quarterly_data)
-        total_1a = sum(q['1A_gst_on_sales'] for q in quarterly_data)
+        annual_data = cls._combine_reports(str(year), start_date, end_date, breakdown['quarterly'])
         
         return {
+            **annual_data,
             'year': year,
-            'quarterly_breakdown': quarterly_data,
-            'annual_G1_total_sales_inc_gst': total_g1,
-            'annual_G2_export_sales': total_g2,
-            'annual_G3_gst_free_sales': total_g3,
-            'annual_1A_gst_on_sales': total_1a,
-            'total_invoice_count': invoices.count(),
+            'quarterly_breakdown': breakdown['quarterly'],
+            'monthly_breakdown': breakdown['monthly'],
+            'annual_G1_total_sales_inc_gst': annual_data['G1_total_sales_inc_gst'],
+            'annual_G2_export_sales': annual_data['G2_export_sales'],
+            'annual_G3_gst_free_sales': annual_data['G3_gst_free_sales'],
+            'annual_1A_gst_on_sales': annual_data['1A_gst_on_sales'],
+            'total_invoice_count': annual_data['invoice_count'],
+        }
+    
+    @staticmethod
+    def _combine_reports(period, start_date, end_date, reports):
+        combined = {
+            key: sum((report[key] for report in reports), Decimal('0.00'))
+            for key in BASPeriodSnapshot.REPORT_FIELDS
+            if key != 'invoice_count'
+        }
+        return {
+            'period': period,
+            'start_date': start_date,
+            'end_date': end_date,
+            'invoice_count': sum(report['invoice_count'] for report in reports),
+            **combined,
+            'is_closed': all(report.get('is_closed') for report in reports),
         }
     
     @classmethod
-    def _calculate_bas_fields(cls, invoices):
-        g1_total = Decimal('0.00')
-        g2_export = Decimal('0.00')
-        g3_gst_free = Decimal('0.00')
-        g4_input_taxed = Decimal('0.00')
-        gst_on_sales = Decimal('0.00')
-        taxable_sales = Decimal('0.00')
+    def get_period_breakdown(cls, start_date, end_date, grains=('monthly', 'quarterly', 'annual')):
+        monthly_totals = {
+            cls._as_date(row.pop('month')): row
+            for row in cls._reportable_invoices(start_date, end_date)
+            .annotate(month=TruncMonth('issue_date'))
+            .values('month')
+            .annotate(**cls._bas_aggregates())
+            .order_by('month')
+        }
         
-        for invoice in invoices:
-            invoice_total = invoice.total_amount
-            invoice_gst = invoice.gst_amount
-            invoice_subtotal = invoice.subtotal
-            
-            has_gst_free = False
-            has_input_taxed = False
-            
-            for item in invoice.items.all():
-                if item.gst_treatment == 'GST_FREE':
-                    has_gst_free = True
-                    g3_gst_free += item.subtotal
-                elif item.gst_treatment == 'INPUT_TAXED':
-                    has_input_taxed = True
-                    g4_input_taxed += item.subtotal
+        return {
+            grain: cls._rollup_buckets(monthly_totals, start_date, end_date, grain)
+            for grain in grains
+        }
+    
+    @classmethod
+    def _rollup_buckets(cls, monthly_totals, start_date, end_date, grain):
+        months_per_bucket = PERIOD_GRAIN_MONTHS[grain]
+        bucket_start = cls._bucket_start(start_date, months_per_bucket)
+        buckets = []
+        
+        while bucket_start <= end_date:
+            next_start = cls._add_months(bucket_start, months_per_bucket)
+            totals = {key: None for key in cls._bas_aggregates()}
             
-            g1_total += invoice_total
-            gst_on_sales += invoice_gst
+            month = bucket_start
+            while month < next_start:
+                for key, value in monthly_totals.get(month, {}).items():
+                    if value is not None:
+                        totals[key] = (totals[key] or 0) + value
+                month = cls._add_months(month, 1)
             
-            if not has_gst_free and not has_input_taxed:
-                taxable_sales += invoice_subtotal
+            buckets.append(cls._build_report(
+                cls._bucket_label(bucket_start, grain),
+                max(bucket_start, start_date),
+                min(next_start - timedelta(days=1), end_date),
+                totals
+            ))
+            bucket_start = next_start
+        
+        return buckets
+    
+    @staticmethod
+    def _bucket_start(day, months_per_bucket):
+        month_index = (day.month - 1) // months_per_bucket * months_per_bucket
+        return date(day.year, month_index + 1, 1)
+    
+    @staticmethod
+    def _add_months(day, months):
+        month_index = day.month - 1 + months
+        return date(day.year + month_index // 12, month_index % 12 + 1, 1)
+    
+    @staticmethod
+    def _bucket_label(bucket_start, grain):
+        if grain == 'monthly':
+            return f'{bucket_start.month:02d}/{bucket_start.year}'
+        if grain == 'quarterly':
+            return f'Q{(bucket_start.month - 1) // 3 + 1} {bucket_start.year}'
+        return str(bucket_start.year)
+    
+    @staticmethod
+    def _as_date(value):
+        return value.date() if isinstance(value, datetime) else value
+    
+    @staticmethod
+    def _reportable_invoices(start_date, end_date):
+        return Invoice.objects.filter(
+            issue_date__range=[start_date, end_date],
+            status__in=REPORTABLE_STATUSES
+        )
+    
+    @classmethod
+    def _build_report(cls, period, start_date, end_date, totals):
+        return {
+            'period': period,
+            'start_date': start_date,
+            'end_date': end_date,
+            'invoice_count': totals['invoice_count'] or 0,
+            **cls._calculate_bas_fields(totals)
+        }
+    
+    @staticmethod
+    def _bas_aggregates():
+        line_subtotal = ExpressionWrapper(
+            F('items__quantity') * F('items__unit_price'),
+            output_field=MONEY_FIELD
+        )
+        has_non_taxable_items = Exists(
+            InvoiceItem.objects.filter(invoice=OuterRef('pk')).exclude(gst_treatment='TAXABLE')
+        )
+        
+        return {
+            'invoice_count': Count('pk', distinct=True),
+            'sales_ex_gst': Sum(line_subtotal, output_field=MONEY_FIELD),
+            'taxable_ex_gst': Sum(
+                line_subtotal,
+                filter=Q(items__gst_treatment='TAXABLE'),
+                output_field=MONEY_FIELD
+            ),
+            'taxable_only_invoices_ex_gst': Sum(
+                line_subtotal,
+                filter=Q(~has_non_taxable_items, items__gst_treatment='TAXABLE'),
+                output_field=MONEY_FIELD
+            ),
+            'gst_free_ex_gst': Sum(
+                line_subtotal,
+                filter=Q(items__gst_treatment='GST_FREE'),
+                output_field=MONEY_FIELD
+            ),
+            'input_taxed_ex_gst': Sum(
+                line_subtotal,
+                filter=Q(items__gst_treatment='INPUT_TAXED'),
+                output_field=MONEY_FIELD
+            ),
+        }
+    
+    @staticmethod
+    def _to_money(value):
+        return (value or Decimal('0.00')).quantize(Decimal('0.01'))
+    
+    @classmethod
+    def _calculate_bas_fields(cls, totals):
+        zero = Decimal('0.00')
+        sales_ex_gst = cls._to_money(totals['sales_ex_gst'])
+        g3_gst_free = cls._to_money(totals['gst_free_ex_gst'])
+        g4_input_taxed = cls._to_money(totals['input_taxed_ex_gst'])
+        taxable_sales = cls._to_money(totals['taxable_only_invoices_ex_gst'])
+        gst_on_sales = cls._to_money(totals['taxable_ex_gst']) * GST_RATE / 100
         
         return {
-            'G1_total_sales_inc_gst': g1_total,
-            'G2_export_sales': g2_export,
+            'G1_total_sales_inc_gst': sales_ex_gst + gst_on_sales,
+            'G2_export_sales': zero,
             'G3_gst_free_sales': g3_gst_free,
             'G4_input_taxed_sales': g4_input_taxed,
             '1A_gst_on_sales': gst_on_sales,
@@ -38,6 +38,41 @@ GST_TREATMENT = [
 ]
 
 
+PDF_JOB_STATUS = [
+    ('PENDING', 'Pending'),
+    ('RUNNING', 'Running'),
+    ('DONE', 'Done'),
+    ('FAILED', 'Failed'),
+]
+
+
+BANK_LINE_STATUS = [
+    ('MATCHED', 'Matched'),
+    ('REVIEW', 'Needs review'),
+    ('RESOLVED', 'Resolved'),
+    ('IGNORED', 'Ignored'),
+]
+
+
+RECURRING_FREQUENCIES = [
+    ('MONTHLY', 'Monthly'),
+    ('QUARTERLY', 'Quarterly'),
+    ('YEARLY', 'Yearly'),
+]
+
+
+RECURRING_INVOICE_STATUS = [
+    ('DRAFT', 'Draft'),
+    ('SENT', 'Sent'),
+]
+
+
+BAS_PERIOD_TYPES = [
+    ('monthly', 'Monthly'),
+    ('quarterly', 'Quarterly'),
+]
+
+
 GST_RATE_CHOICES = [
     (GST_RATE, '10% (Standard GST)'),
     (GST_FREE_RATE, '0% (GST-free)'),
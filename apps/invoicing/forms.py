@@ -4,6 +4,7 @@ from django.forms import inlineformset_factory
 
 from .models import Company, Invoice, InvoiceItem
 from .constants import AUSTRALIAN_STATES
+from .import_service import InvoiceImportService
 from .validators import AustralianBusinessValidator
 
 FORM_CONTROL = 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-primary-500 dark:bg-gray-700 dark:border-gray-600 dark:text-white'
@@ -13,7 +14,7 @@ CURRENCY_INPUT = 'w-full pl-8 pr-3 py-2 border border-gray-300 rounded-md focus:
 class CompanyForm(forms.ModelForm):
     class Meta:
         model = Company
-        exclude = ['current_number']
+        fields = '__all__'
         widgets = {
             'legal_form': forms.Select(attrs={'class': FORM_CONTROL}),
             'business_name': forms.TextInput(attrs={'class': FORM_CONTROL, 'placeholder': 'Trading name'}),
@@ -85,6 +86,27 @@ class InvoiceForm(forms.ModelForm):
         return client_abn
 
 
+class InvoiceImportForm(forms.Form):
+    file = forms.FileField(
+        label='Import file',
+        help_text='CSV (one row per line item, grouped by invoice_id), JSON array or JSON Lines',
+        widget=forms.ClearableFileInput(attrs={'class': FORM_CONTROL, 'accept': '.csv,.json,.jsonl,.ndjson'})
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        label='Validate only',
+        widget=forms.CheckboxInput(attrs={'class': 'h-4 w-4 text-primary-600 focus:ring-primary-500 border-gray-300 rounded'})
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        try:
+            self.cleaned_data['file_format'] = InvoiceImportService.detect_format(upload.name)
+        except ValueError:
+            raise ValidationError('Upload a .csv, .json, .jsonl or .ndjson file.')
+        return upload
+
+
 class InvoiceItemForm(forms.ModelForm):
     class Meta:
         model = InvoiceItem
@@ -113,6 +135,10 @@ class BaseInvoiceItemFormSet(forms.BaseInlineFormSet):
         if any(self.errors):
             return
         
+        if self.instance.pk and Invoice.objects.get(pk=self.instance.pk).is_in_closed_bas_period():
+            if any(form.has_changed() for form in self.forms):
+                raise ValidationError('Line items cannot be changed on an invoice in a closed BAS period.')
+        
         valid_forms = 0
         for form in self.forms:
             if form.cleaned_data.get('DELETE', False):
@@ -0,0 +1,345 @@
+import csv
+import json
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from apps.core.services.ledger_version import LedgerVersion
+
+from .aging_service import ARAgingService
+from .constants import CLIENT_TYPES, GST_TREATMENT, INVOICE_STATUS
+from .models import (
+    BAS_REPORTABLE_STATUSES, BASPeriodSnapshot, Client, Invoice, InvoiceItem,
+    InvoiceReferenceCounter, calculate_invoice_totals, normalise_client_name
+)
+from .validators import AustralianBusinessValidator
+
+IMPORT_FORMATS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.jsonl': 'json',
+    '.ndjson': 'json',
+}
+
+
+class InvoiceImportReport:
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def add_error(self, row, messages):
+        self.errors.append({'row': row, 'errors': list(messages)})
+
+
+class InvoiceImportService:
+    CHUNK_SIZE = 500
+    GROUP_COLUMN = 'invoice_id'
+    INVOICE_COLUMNS = [
+        'issue_date', 'client_type', 'client_name', 'client_abn', 'client_address',
+        'status', 'payment_terms', 'payment_date', 'notes',
+    ]
+    ITEM_COLUMNS = ['description', 'quantity', 'unit_price', 'gst_treatment']
+
+    def __init__(self, company, chunk_size=CHUNK_SIZE, dry_run=False):
+        self.company = company
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.closed_periods = list(BASPeriodSnapshot.objects.values_list('start_date', 'end_date'))
+        self.today = date.today()
+        self.clients = {}
+
+    @staticmethod
+    def detect_format(filename):
+        for extension, file_format in IMPORT_FORMATS.items():
+            if filename.lower().endswith(extension):
+                return file_format
+        raise ValueError(f"Unsupported import file: {filename}")
+
+    def import_stream(self, stream, file_format):
+        records = self.iter_csv(stream) if file_format == 'csv' else self.iter_json(stream)
+        report = InvoiceImportReport()
+        batch = []
+
+        try:
+            for row, data in records:
+                try:
+                    batch.append((row, *self._build_invoice(data)))
+                except ValidationError as e:
+                    report.add_error(row, e.messages)
+                    continue
+
+                if len(batch) >= self.chunk_size:
+                    self._flush(batch, report)
+                    batch = []
+        except (csv.Error, json.JSONDecodeError, UnicodeDecodeError) as e:
+            report.add_error(None, [f"Could not parse file: {e}"])
+
+        if batch:
+            self._flush(batch, report)
+        return report
+
+    @classmethod
+    def iter_csv(cls, stream):
+        reader = csv.DictReader(stream)
+        current_key = None
+        current = None
+
+        for data in reader:
+            key = (data.get(cls.GROUP_COLUMN) or '').strip() or f"line-{reader.line_num}"
+            if key != current_key:
+                if current:
+                    yield current
+                current_key = key
+                current = (reader.line_num, {
+                    **{column: data.get(column) for column in cls.INVOICE_COLUMNS},
+                    'items': [],
+                })
+            current[1]['items'].append({column: data.get(column) for column in cls.ITEM_COLUMNS})
+
+        if current:
+            yield current
+
+    @staticmethod
+    def iter_json(stream, chunk_size=65536):
+        # Accepts a top-level JSON array or JSON Lines and decodes one invoice
+        # object at a time, so the whole file never has to sit in memory.
+        decoder = json.JSONDecoder()
+        buffer = ''
+        in_array = None
+        eof = False
+        row = 0
+
+        while True:
+            buffer = buffer.lstrip()
+            if buffer:
+                if in_array is None:
+                    in_array = buffer[0] == '['
+                    if in_array:
+                        buffer = buffer[1:]
+                        continue
+                if in_array and buffer[0] == ',':
+                    buffer = buffer[1:]
+                    continue
+                if in_array and buffer[0] == ']':
+                    return
+                try:
+                    value, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    row += 1
+                    buffer = buffer[end:]
+                    yield row, value
+                    continue
+            elif eof:
+                return
+
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+
+    def _build_invoice(self, data):
+        if not isinstance(data, dict):
+            raise ValidationError('Each invoice must be an object')
+
+        errors = []
+        issue_date = self._parse_date(data.get('issue_date'), 'issue_date', errors, required=True)
+        payment_date = self._parse_date(data.get('payment_date'), 'payment_date', errors)
+        client_type = self._text(data.get('client_type')).upper()
+        status = self._text(data.get('status')).upper() or 'DRAFT'
+        client_name = self._text(data.get('client_name'))
+        client_address = self._text(data.get('client_address'))
+        client_abn = self._text(data.get('client_abn'))
+
+        if client_type not in dict(CLIENT_TYPES):
+            errors.append(f"client_type: must be one of {', '.join(dict(CLIENT_TYPES))}")
+        if status not in dict(INVOICE_STATUS):
+            errors.append(f"status: must be one of {', '.join(dict(INVOICE_STATUS))}")
+        if not client_name:
+            errors.append('client_name: required')
+        if not client_address:
+            errors.append('client_address: required')
+
+        if client_abn:
+            try:
+                client_abn = AustralianBusinessValidator.validate_abn(client_abn)
+            except ValidationError as e:
+                errors.append(f"client_abn: {e.messages[0]}")
+        elif client_type == 'BUSINESS':
+            errors.append('client_abn: ABN is required for business clients')
+
+        items = [self._build_item(index, item, errors) for index, item in enumerate(data.get('items') or [], 1)]
+        if not items:
+            errors.append('items: at least one line item is required')
+
+        if issue_date and status in BAS_REPORTABLE_STATUSES and any(
+            start <= issue_date <= end for start, end in self.closed_periods
+        ):
+            errors.append('issue_date: falls in a closed BAS period')
+
+        if errors:
+            raise ValidationError(errors)
+
+        invoice = Invoice(
+            company=self.company,
+            issue_date=issue_date,
+            client_type=client_type,
+            client_name=client_name,
+            client_abn=client_abn,
+            client_address=client_address,
+            status=status,
+            payment_date=payment_date,
+            notes=self._text(data.get('notes')),
+        )
+        payment_terms = self._text(data.get('payment_terms'))
+        if payment_terms:
+            invoice.payment_terms = payment_terms
+
+        try:
+            invoice.due_date = invoice.calculate_due_date()
+            invoice.retention_date = invoice.calculate_retention_date()
+        except ValueError as e:
+            raise ValidationError(f"issue_date: {e}")
+
+        if invoice.status == 'SENT' and invoice.due_date < self.today:
+            invoice.status = 'OVERDUE'
+
+        totals = calculate_invoice_totals(
+            (item.quantity, item.unit_price, item.gst_treatment) for item in items
+        )
+        for field, value in totals.items():
+            setattr(invoice, field, value)
+
+        return invoice, items
+
+    def _build_item(self, index, data, errors):
+        if not isinstance(data, dict):
+            errors.append(f"items[{index}]: must be an object")
+            return None
+
+        description = self._text(data.get('description'))
+        gst_treatment = self._text(data.get('gst_treatment')).upper() or 'TAXABLE'
+
+        try:
+            quantity = int(self._text(data.get('quantity')) or 1)
+            if quantity <= 0:
+                raise ValueError
+        except ValueError:
+            errors.append(f"items[{index}].quantity: must be a positive whole number")
+            quantity = None
+
+        try:
+            unit_price = Decimal(self._text(data.get('unit_price'))).quantize(Decimal('0.01'))
+            if unit_price <= 0:
+                raise InvalidOperation
+        except InvalidOperation:
+            errors.append(f"items[{index}].unit_price: must be a positive amount")
+            unit_price = None
+
+        if not description:
+            errors.append(f"items[{index}].description: required")
+        if gst_treatment not in dict(GST_TREATMENT):
+            errors.append(f"items[{index}].gst_treatment: must be one of {', '.join(dict(GST_TREATMENT))}")
+
+        return InvoiceItem(
+            description=description,
+            quantity=quantity,
+            unit_price=unit_price,
+            gst_treatment=gst_treatment
+        )
+
+    def _flush(self, batch, report):
+        if self.dry_run:
+            report.created += len(batch)
+            return
+
+        try:
+            with transaction.atomic():
+                self._insert(batch)
+        except IntegrityError:
+            # Clients created inside the rolled back transaction are gone.
+            self.clients.clear()
+            for entry in batch:
+                try:
+                    with transaction.atomic():
+                        self._insert([entry])
+                except IntegrityError as e:
+                    self.clients.clear()
+                    report.add_error(entry[0], [str(e)])
+                else:
+                    report.created += 1
+        else:
+            report.created += len(batch)
+
+    def _insert(self, batch):
+        invoices = [invoice for _, invoice, _ in batch]
+        for invoice in invoices:
+            invoice.pk = None
+            invoice._state.adding = True
+
+        by_year = defaultdict(list)
+        for invoice in invoices:
+            invoice.reference = None
+            invoice.payment_reference = ''
+            if invoice.status != 'DRAFT':
+                by_year[invoice.issue_date.year].append(invoice)
+
+        for year, year_invoices in by_year.items():
+            references = InvoiceReferenceCounter.allocate(
+                self.company.invoice_prefix, year, count=len(year_invoices)
+            )
+            for invoice, reference in zip(year_invoices, references):
+                invoice.reference = reference
+                invoice.payment_reference = invoice.generate_payment_reference()
+
+        for invoice in invoices:
+            invoice.client = self._resolve_client(invoice)
+
+        Invoice.objects.bulk_create(invoices)
+        transaction.on_commit(ARAgingService.invalidate)
+        LedgerVersion.bump_on_commit()
+
+        items = []
+        for _, invoice, invoice_items in batch:
+            for item in invoice_items:
+                item.pk = None
+                item._state.adding = True
+                item.invoice = invoice
+                items.append(item)
+        InvoiceItem.objects.bulk_create(items)
+        Client.objects.filter(pk__in={invoice.client_id for invoice in invoices}).refresh_stats()
+
+    def _resolve_client(self, invoice):
+        # Rows in one file usually repeat a handful of clients, so each
+        # distinct client is resolved against the database only once.
+        key = (invoice.client_abn, normalise_client_name(invoice.client_name))
+        if key not in self.clients:
+            self.clients[key] = Client.objects.resolve(
+                invoice.client_name, invoice.client_abn, invoice.client_type, invoice.client_address
+            )
+        return self.clients[key]
+
+    @staticmethod
+    def _text(value):
+        return '' if value is None else str(value).strip()
+
+    @classmethod
+    def _parse_date(cls, value, field, errors, required=False):
+        value = cls._text(value)
+        if not value:
+            if required:
+                errors.append(f"{field}: required")
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            errors.append(f"{field}: expected YYYY-MM-DD")
+            return None
@@ -0,0 +1,98 @@
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from apps.invoicing.utils import InvoiceLayout, render_invoice_pdf, render_invoice_pdf_canvas
+
+
+class Command(BaseCommand):
+    help = 'Measures per-invoice PDF render time for the platypus renderer (fresh vs per-process layout) and the canvas renderer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batches',
+            type=int,
+            nargs='+',
+            default=[1, 100, 1000],
+            help='Batch sizes to render'
+        )
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=3,
+            help='Line items per synthetic invoice'
+        )
+
+    def handle(self, *args, **options):
+        render_data = self._build_render_data(options['items'])
+        # Warm up font metrics and imports so the first batch is not penalised.
+        render_invoice_pdf(render_data)
+
+        self.stdout.write('⏱️  Invoice PDF render benchmark (ms per invoice)')
+        self.stdout.write(f'{"batch":>8} {"fresh layout":>14} {"shared layout":>14} {"canvas":>10} {"speedup":>9}')
+
+        for batch_size in options['batches']:
+            fresh = self._time_batch(batch_size, lambda: render_invoice_pdf(render_data, InvoiceLayout()))
+            shared = self._time_batch(batch_size, lambda: render_invoice_pdf(render_data))
+            fast = self._time_batch(
+                batch_size,
+                lambda: render_invoice_pdf_canvas(render_data, max_items=len(render_data['items']))
+            )
+            self.stdout.write(
+                f'{batch_size:>8} {fresh:>14.2f} {shared:>14.2f} {fast:>10.2f} {fresh / fast:>8.2f}x'
+            )
+
+    @staticmethod
+    def _time_batch(batch_size, render):
+        started = time.perf_counter()
+        for _ in range(batch_size):
+            render()
+        return (time.perf_counter() - started) * 1000 / batch_size
+
+    @staticmethod
+    def _build_render_data(item_count):
+        items = [
+            {
+                'description': f'Removal service {index + 1}\nTwo movers and truck',
+                'quantity': Decimal('2.00'),
+                'unit_price': Decimal('150.00'),
+                'gst_rate': Decimal('10'),
+                'total': Decimal('330.00'),
+            }
+            for index in range(item_count)
+        ]
+        subtotal = Decimal('300.00') * item_count
+        return {
+            'reference': '2025-0001/25',
+            'issue_date': date(2025, 7, 1),
+            'is_tax_invoice': True,
+            'tax_invoice_note': 'This is a tax invoice for GST purposes.',
+            'client_name': 'Benchmark Client Pty Ltd',
+            'client_address': '1 George St\nSydney NSW 2000',
+            'client_abn': '51 824 753 556',
+            'payment_terms': 'Payment due within 14 days',
+            'subtotal': subtotal,
+            'gst_amount': subtotal / 10,
+            'total_amount': subtotal * Decimal('1.1'),
+            'items': items,
+            'company': {
+                'business_name': 'Westforce Removals',
+                'legal_name': 'Westforce Removals Pty Ltd',
+                'legal_form_display': 'Pty Ltd',
+                'abn': '12 345 678 901',
+                'acn': '345 678 901',
+                'gst_registered': True,
+                'address': '10 Example Rd',
+                'city': 'Perth',
+                'state': 'WA',
+                'postal_code': '6000',
+                'phone': '08 9000 0000',
+                'email': 'accounts@example.com',
+                'website': 'example.com',
+                'bank_name': 'Example Bank',
+                'bsb': '123-456',
+                'account_number': '12345678',
+            },
+        }
@@ -0,0 +1,29 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.invoicing.bas_service import BASReportingService
+
+
+class Command(BaseCommand):
+    help = 'Freezes the BAS figures of a lodged month or quarter into a snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, required=True, help='Calendar year of the period')
+        period = parser.add_mutually_exclusive_group(required=True)
+        period.add_argument('--quarter', type=int, choices=range(1, 5), help='Quarter to close (1-4)')
+        period.add_argument('--month', type=int, choices=range(1, 13), help='Month to close (1-12)')
+
+    def handle(self, *args, **options):
+        try:
+            snapshot = BASReportingService.close_period(
+                options['year'],
+                quarter=options['quarter'],
+                month=options['month']
+            )
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+
+        self.stdout.write(self.style.SUCCESS(f'🔒 BAS period {snapshot.period} closed'))
+        self.stdout.write(f'   • Invoices: {snapshot.invoice_count}')
+        self.stdout.write(f'   • G1 Total sales: ${snapshot.g1_total_sales_inc_gst:,.2f}')
+        self.stdout.write(f'   • 1A GST on sales: ${snapshot.gst_on_sales_1a:,.2f}')
@@ -0,0 +1,64 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.invoicing.recurring_service import RecurringInvoiceService
+
+
+class Command(BaseCommand):
+    help = 'Generates every recurring invoice due on or before the run date (safe to re-run, run daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Run date as YYYY-MM-DD (defaults to today)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=RecurringInvoiceService.CHUNK_SIZE,
+            help='Templates processed per transaction'
+        )
+        parser.add_argument(
+            '--queue-pdfs',
+            action='store_true',
+            help='Queue PDF rendering for the generated invoices'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be generated without writing anything'
+        )
+
+    def handle(self, *args, **options):
+        run_date = timezone.localdate()
+        if options['date']:
+            try:
+                run_date = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--date must be in YYYY-MM-DD format')
+
+        service = RecurringInvoiceService(
+            run_date=run_date,
+            chunk_size=options['chunk_size'],
+            queue_pdfs=options['queue_pdfs'],
+            dry_run=options['dry_run']
+        )
+
+        self.stdout.write(f'🔁 Generating recurring invoices due by {run_date:%d/%m/%Y}...')
+        started = time.monotonic()
+        report = service.generate()
+        elapsed = time.monotonic() - started
+
+        for error in report.errors[:20]:
+            self.stdout.write(self.style.WARNING(f'   • {error["template"]}: {"; ".join(error["errors"])}'))
+        if report.failed > 20:
+            self.stdout.write(f'   • ... and {report.failed - 20} more')
+
+        action = 'would be generated' if options['dry_run'] else 'generated'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {report.created} invoices {action} from {report.templates} templates '
+            f'({report.skipped} already issued) in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,78 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.invoicing.import_service import InvoiceImportService
+from apps.invoicing.models import Company
+
+
+class Command(BaseCommand):
+    help = 'Bulk-imports invoices with their line items from a CSV, JSON or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import (.csv, .json, .jsonl or .ndjson)')
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='Company ID the invoices belong to (defaults to the only configured company)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=InvoiceImportService.CHUNK_SIZE,
+            help='Invoices inserted per transaction'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file without writing anything'
+        )
+        parser.add_argument(
+            '--error-report',
+            help='Write rejected rows and their errors to this CSV file'
+        )
+
+    def handle(self, *args, **options):
+        company = self._get_company(options['company'])
+        try:
+            file_format = InvoiceImportService.detect_format(options['path'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        service = InvoiceImportService(company, chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+
+        self.stdout.write(f'📥 Importing invoices from {options["path"]}...')
+        started = time.monotonic()
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                report = service.import_stream(stream, file_format)
+        except OSError as e:
+            raise CommandError(str(e))
+        elapsed = time.monotonic() - started
+
+        for error in report.errors[:20]:
+            self.stdout.write(self.style.WARNING(f'   • Row {error["row"]}: {"; ".join(error["errors"])}'))
+        if report.failed > 20:
+            self.stdout.write(f'   • ... and {report.failed - 20} more')
+
+        if options['error_report'] and report.errors:
+            with open(options['error_report'], 'w', newline='', encoding='utf-8') as output:
+                writer = csv.writer(output)
+                writer.writerow(['row', 'errors'])
+                for error in report.errors:
+                    writer.writerow([error['row'], '; '.join(error['errors'])])
+
+        action = 'validated' if options['dry_run'] else 'imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {report.created} invoices {action}, {report.failed} rejected in {elapsed:.1f}s'
+        ))
+
+    def _get_company(self, company_id):
+        companies = Company.objects.all()
+        if company_id:
+            companies = companies.filter(pk=company_id)
+        company = companies.order_by('pk').first()
+        if company is None:
+            raise CommandError('No company configured for the import')
+        return company
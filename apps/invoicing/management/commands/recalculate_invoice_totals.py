@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.invoicing.models import Invoice, InvoiceItem, calculate_invoice_totals
+
+TOTAL_FIELDS = ['subtotal_ex_gst', 'gst_total', 'grand_total']
+
+
+class Command(BaseCommand):
+    help = 'Recalculates the stored subtotal, GST and grand total columns on invoices from their items'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of invoices processed per batch'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report invoices with stale totals without updating them'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        self.stdout.write('🧮 Recalculating stored invoice totals...')
+
+        checked = 0
+        repaired = 0
+        invoice_ids = list(Invoice.objects.order_by('pk').values_list('pk', flat=True))
+
+        for start in range(0, len(invoice_ids), batch_size):
+            batch_ids = invoice_ids[start:start + batch_size]
+            stale = self._find_stale_invoices(batch_ids)
+            checked += len(batch_ids)
+            repaired += len(stale)
+
+            if stale and not dry_run:
+                with transaction.atomic():
+                    Invoice.objects.bulk_update(stale, TOTAL_FIELDS)
+
+        action = 'would be repaired' if dry_run else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'✅ {checked} invoices checked, {repaired} {action}'))
+
+    def _find_stale_invoices(self, invoice_ids):
+        lines = {invoice_id: [] for invoice_id in invoice_ids}
+        items = InvoiceItem.objects.filter(invoice_id__in=invoice_ids).values_list(
+            'invoice_id', 'quantity', 'unit_price', 'gst_treatment'
+        )
+        for invoice_id, quantity, unit_price, gst_treatment in items:
+            lines[invoice_id].append((quantity, unit_price, gst_treatment))
+
+        stale = []
+        for invoice in Invoice.objects.filter(pk__in=invoice_ids).only('pk', 'reference', *TOTAL_FIELDS):
+            totals = calculate_invoice_totals(lines[invoice.pk])
+            if any(getattr(invoice, field) != value for field, value in totals.items()):
+                self.stdout.write(
+                    f'   • {invoice.reference or f"DRAFT #{invoice.pk}"}: '
+                    f'{invoice.grand_total} -> {totals["grand_total"]}'
+                )
+                for field, value in totals.items():
+                    setattr(invoice, field, value)
+                stale.append(invoice)
+        return stale
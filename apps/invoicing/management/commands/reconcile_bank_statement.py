@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.invoicing.reconciliation_service import BankReconciliationService
+
+
+class Command(BaseCommand):
+    help = 'Matches a CSV or OFX bank statement against open invoices and marks the matches as paid'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Statement file to reconcile (.csv, .ofx or .qfx)')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=BankReconciliationService.CHUNK_SIZE,
+            help='Statement lines matched and written per transaction'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be matched without writing anything'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            file_format = BankReconciliationService.detect_format(options['path'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        service = BankReconciliationService(chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+
+        self.stdout.write(f'🏦 Reconciling {options["path"]}...')
+        started = time.monotonic()
+        try:
+            with open(options['path'], encoding='utf-8-sig', errors='replace', newline='') as stream:
+                report = service.reconcile_stream(stream, file_format, filename=options['path'])
+        except OSError as e:
+            raise CommandError(str(e))
+        elapsed = time.monotonic() - started
+
+        for error in report.errors[:20]:
+            self.stdout.write(self.style.WARNING(f'   • Row {error["row"]}: {"; ".join(error["errors"])}'))
+        if report.failed > 20:
+            self.stdout.write(f'   • ... and {report.failed - 20} more')
+
+        action = 'would be marked paid' if options['dry_run'] else 'marked paid'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {report.matched} invoices {action}, {report.review} lines queued for review, '
+            f'{report.skipped} debits skipped, {report.duplicates} already imported in {elapsed:.1f}s'
+        ))
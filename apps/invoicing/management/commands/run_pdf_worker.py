@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.invoicing.models import BAS_REPORTABLE_STATUSES, Company, Invoice, InvoicePDFJob
+from apps.invoicing.services import InvoicePDFQueue
+
+
+class Command(BaseCommand):
+    help = 'Pre-renders queued invoice PDFs so downloads and bulk exports hit a finished file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10,
+            help='Number of jobs claimed per batch'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait when the queue is empty'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the jobs that are due now and exit'
+        )
+        parser.add_argument(
+            '--requeue-company',
+            type=int,
+            metavar='COMPANY_ID',
+            help='Queue every sent or paid invoice of a company for re-rendering before starting'
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue_company']:
+            self._requeue_company(options['requeue_company'])
+
+        self.stdout.write('🖨️  PDF worker started')
+        totals = {'done': 0, 'retried': 0, 'failed': 0}
+
+        try:
+            while True:
+                results = InvoicePDFQueue.run_batch(options['batch_size'])
+                for key, value in results.items():
+                    totals[key] += value
+
+                if not any(results.values()):
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {totals["done"]} rendered, {totals["retried"]} scheduled for retry, {totals["failed"]} failed'
+        ))
+
+    def _requeue_company(self, company_id):
+        if not Company.objects.filter(pk=company_id).exists():
+            raise CommandError(f'Company {company_id} does not exist')
+
+        invoice_ids = Invoice.objects.filter(
+            company_id=company_id,
+            status__in=BAS_REPORTABLE_STATUSES
+        ).values_list('pk', flat=True)
+        jobs = InvoicePDFJob.enqueue(invoice_ids)
+        self.stdout.write(f'   • {len(jobs)} invoices queued for re-rendering')
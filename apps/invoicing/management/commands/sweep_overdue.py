@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.services.ledger_version import LedgerVersion
+from apps.invoicing.models import Invoice
+
+
+class Command(BaseCommand):
+    help = 'Marks every sent invoice past its due date as overdue in a single UPDATE (run daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report how many invoices would be marked overdue without updating them'
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+
+        if options['dry_run']:
+            count = Invoice.objects.filter(status='SENT', due_date__lt=today).count()
+            self.stdout.write(f'⏰ {count} sent invoices are past due as of {today:%d/%m/%Y}')
+            return
+
+        count = Invoice.objects.sweep_overdue(today)
+        if count:
+            LedgerVersion.bump()
+        self.stdout.write(self.style.SUCCESS(f'✅ {count} invoices marked overdue as of {today:%d/%m/%Y}'))
@@ -0,0 +1,53 @@
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import migrations, models
+
+
+def backfill_invoice_totals(apps, schema_editor):
+    Invoice = apps.get_model('invoicing', 'Invoice')
+    InvoiceItem = apps.get_model('invoicing', 'InvoiceItem')
+
+    totals = {}
+    items = InvoiceItem.objects.values_list('invoice_id', 'quantity', 'unit_price', 'gst_treatment')
+    for invoice_id, quantity, unit_price, gst_treatment in items.iterator():
+        subtotal, taxable = totals.get(invoice_id, (Decimal('0.00'), Decimal('0.00')))
+        line_subtotal = quantity * unit_price
+        if gst_treatment == 'TAXABLE':
+            taxable += line_subtotal
+        totals[invoice_id] = (subtotal + line_subtotal, taxable)
+
+    to_update = []
+    for invoice in Invoice.objects.filter(pk__in=totals.keys()).only('pk'):
+        subtotal, taxable = totals[invoice.pk]
+        gst = (taxable * Decimal('10.00') / 100).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        invoice.subtotal_ex_gst = subtotal
+        invoice.gst_total = gst
+        invoice.grand_total = subtotal + gst
+        to_update.append(invoice)
+
+    Invoice.objects.bulk_update(to_update, ['subtotal_ex_gst', 'gst_total', 'grand_total'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='grand_total',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='Total (inc GST)'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='gst_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='GST total'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='subtotal_ex_gst',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='Subtotal (ex GST)'),
+        ),
+        migrations.RunPython(backfill_invoice_totals, migrations.RunPython.noop),
+    ]
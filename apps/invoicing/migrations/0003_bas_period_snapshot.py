@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('invoicing', '0002_invoice_stored_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BASPeriodSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created date')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='Modified date')),
+                ('period_type', models.CharField(choices=[('monthly', 'Monthly'), ('quarterly', 'Quarterly')], max_length=10, verbose_name='Period type')),
+                ('period', models.CharField(max_length=20, verbose_name='Period')),
+                ('start_date', models.DateField(db_index=True, verbose_name='Start date')),
+                ('end_date', models.DateField(db_index=True, verbose_name='End date')),
+                ('invoice_count', models.PositiveIntegerField(default=0, verbose_name='Invoice count')),
+                ('g1_total_sales_inc_gst', models.DecimalField(decimal_places=3, max_digits=14, verbose_name='G1 Total sales (inc GST)')),
+                ('g2_export_sales', models.DecimalField(decimal_places=3, max_digits=14, verbose_name='G2 Export sales')),
+                ('g3_gst_free_sales', models.DecimalField(decimal_places=3, max_digits=14, verbose_name='G3 GST-free sales')),
+                ('g4_input_taxed_sales', models.DecimalField(decimal_places=3, max_digits=14, verbose_name='G4 Input taxed sales')),
+                ('gst_on_sales_1a', models.DecimalField(decimal_places=3, max_digits=14, verbose_name='1A GST on sales')),
+                ('taxable_sales_ex_gst', models.DecimalField(decimal_places=3, max_digits=14, verbose_name='Taxable sales (ex GST)')),
+                ('total_sales_ex_gst', models.DecimalField(decimal_places=3, max_digits=14, verbose_name='Total sales (ex GST)')),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Closed by')),
+            ],
+            options={
+                'verbose_name': 'BAS period snapshot',
+                'verbose_name_plural': 'BAS period snapshots',
+                'ordering': ['-start_date', 'period_type'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='basperiodsnapshot',
+            constraint=models.UniqueConstraint(fields=('period_type', 'start_date'), name='bas_snapshot_unique_period'),
+        ),
+        migrations.AddConstraint(
+            model_name='basperiodsnapshot',
+            constraint=models.CheckConstraint(check=models.Q(('end_date__gte', models.F('start_date'))), name='bas_snapshot_end_after_start'),
+        ),
+    ]
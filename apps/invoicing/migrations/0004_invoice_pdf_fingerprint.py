@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0003_bas_period_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Content hash of the data the stored PDF was rendered from', max_length=64, verbose_name='PDF fingerprint'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.16 on 2026-10-17 12:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0004_invoice_pdf_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoicePDFJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created date')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='Modified date')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Run after')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='Claimed at')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last error')),
+                ('invoice', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pdf_job', to='invoicing.invoice')),
+            ],
+            options={
+                'verbose_name': 'Invoice PDF job',
+                'verbose_name_plural': 'Invoice PDF jobs',
+                'ordering': ['run_after'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='invoicing_pdfjob_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.16 on 2026-10-17 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0005_invoice_pdf_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceReferenceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=10, verbose_name='Invoice prefix')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Year')),
+                ('last_number', models.PositiveIntegerField(default=0, verbose_name='Last number issued')),
+            ],
+            options={
+                'verbose_name': 'Invoice reference counter',
+                'verbose_name_plural': 'Invoice reference counters',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='invoicereferencecounter',
+            constraint=models.UniqueConstraint(fields=('prefix', 'year'), name='invoice_reference_counter_unique'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0006_invoice_reference_counter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(condition=models.Q(('status__in', ['SENT', 'OVERDUE'])), fields=['due_date'], name='invoicing_i_open_due_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Trigram indexes are PostgreSQL-only. They are built on UPPER(column::text),
+# which is the expression Django generates for icontains, so the planner can
+# use them for the existing substring filters as well as fuzzy matching.
+SEARCH_INDEXES = [
+    (
+        'invoicing_i_reference_trgm_idx',
+        'CREATE INDEX IF NOT EXISTS invoicing_i_reference_trgm_idx ON invoicing_invoice '
+        'USING gin (UPPER(reference::text) gin_trgm_ops)',
+    ),
+    (
+        'invoicing_i_client_name_trgm_idx',
+        'CREATE INDEX IF NOT EXISTS invoicing_i_client_name_trgm_idx ON invoicing_invoice '
+        'USING gin (UPPER(client_name::text) gin_trgm_ops)',
+    ),
+    (
+        'invoicing_i_client_abn_prefix_idx',
+        'CREATE INDEX IF NOT EXISTS invoicing_i_client_abn_prefix_idx ON invoicing_invoice '
+        '(client_abn varchar_pattern_ops)',
+    ),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for _, sql in SEARCH_INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0007_invoice_open_due_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
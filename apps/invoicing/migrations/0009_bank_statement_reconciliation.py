@@ -0,0 +1,59 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('invoicing', '0008_invoice_search_trigram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankStatementImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created date')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='Modified date')),
+                ('filename', models.CharField(max_length=255, verbose_name='File name')),
+                ('file_format', models.CharField(max_length=10, verbose_name='Format')),
+                ('matched_count', models.PositiveIntegerField(default=0, verbose_name='Matched lines')),
+                ('review_count', models.PositiveIntegerField(default=0, verbose_name='Lines for review')),
+                ('skipped_count', models.PositiveIntegerField(default=0, verbose_name='Skipped lines')),
+                ('imported_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Imported by')),
+            ],
+            options={
+                'verbose_name': 'Bank statement import',
+                'verbose_name_plural': 'Bank statement imports',
+                'ordering': ['-created'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BankStatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created date')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='Modified date')),
+                ('line_number', models.PositiveIntegerField(verbose_name='Line')),
+                ('transaction_date', models.DateField(verbose_name='Transaction date')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Amount')),
+                ('description', models.CharField(blank=True, max_length=255, verbose_name='Description')),
+                ('bank_reference', models.CharField(blank=True, max_length=100, verbose_name='Bank transaction ID')),
+                ('line_hash', models.CharField(editable=False, max_length=64, unique=True)),
+                ('status', models.CharField(choices=[('MATCHED', 'Matched'), ('REVIEW', 'Needs review'), ('RESOLVED', 'Resolved'), ('IGNORED', 'Ignored')], default='REVIEW', max_length=10, verbose_name='Status')),
+                ('review_note', models.CharField(blank=True, max_length=255, verbose_name='Review note')),
+                ('invoice', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bank_lines', to='invoicing.invoice', verbose_name='Invoice')),
+                ('statement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='invoicing.bankstatementimport')),
+            ],
+            options={
+                'verbose_name': 'Bank statement line',
+                'verbose_name_plural': 'Bank statement lines',
+                'ordering': ['transaction_date', 'line_number'],
+                'indexes': [models.Index(fields=['status', 'transaction_date'], name='invoicing_bankline_status_idx')],
+            },
+        ),
+    ]
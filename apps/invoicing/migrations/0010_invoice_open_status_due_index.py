@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0009_bank_statement_reconciliation'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='invoice',
+            name='invoicing_i_open_due_idx',
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(condition=models.Q(('status__in', ['SENT', 'OVERDUE'])), fields=['status', 'due_date'], name='invoicing_i_open_st_due_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:13
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0010_invoice_open_status_due_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Client',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created date')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='Modified date')),
+                ('name', models.CharField(max_length=255, verbose_name='Name')),
+                ('normalised_name', models.CharField(db_index=True, editable=False, max_length=255)),
+                ('abn', models.CharField(blank=True, max_length=11, verbose_name='ABN')),
+                ('client_type', models.CharField(blank=True, choices=[('BUSINESS', 'Business (ABN holder)'), ('INDIVIDUAL', 'Individual')], max_length=20, verbose_name='Client type')),
+                ('address', models.TextField(blank=True, verbose_name='Address')),
+                ('invoice_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='Invoices')),
+                ('income_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='Income records')),
+                ('invoice_revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14, verbose_name='Invoiced revenue')),
+                ('income_revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14, verbose_name='Income revenue')),
+                ('lifetime_revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14, verbose_name='Lifetime revenue')),
+                ('open_balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14, verbose_name='Open balance')),
+                ('last_invoice_date', models.DateField(blank=True, editable=False, null=True, verbose_name='Last invoice')),
+            ],
+            options={
+                'verbose_name': 'Client',
+                'verbose_name_plural': 'Clients',
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['-lifetime_revenue'], name='invoicing_client_lifetime_idx'), models.Index(fields=['-income_revenue'], name='invoicing_client_income_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='client',
+            constraint=models.UniqueConstraint(condition=models.Q(('abn', ''), _negated=True), fields=('abn',), name='invoicing_client_abn_unique'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='client',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='invoices', to='invoicing.client', verbose_name='Client'),
+        ),
+    ]
@@ -0,0 +1,133 @@
+import re
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+REPORTABLE_STATUSES = ['SENT', 'PAID', 'OVERDUE']
+OPEN_STATUSES = ['SENT', 'OVERDUE']
+COMPANY_NAME_SUFFIXES = {'pty', 'ltd', 'limited', 'proprietary'}
+
+
+def normalise_client_name(name):
+    words = re.sub(r'[^a-z0-9]+', ' ', (name or '').lower()).split()
+    while len(words) > 1 and words[-1] in COMPANY_NAME_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+class ClientIndex:
+    # In-memory copy of ClientQuerySet.resolve(): ABN first, then normalised
+    # name, reusing a name-only client the first time its ABN shows up.
+    def __init__(self, Client):
+        self.Client = Client
+        self.by_abn = {}
+        self.by_name = {}
+        self.clients = []
+
+    def resolve(self, name, abn='', client_type='', address=''):
+        abn = re.sub(r'\D', '', abn or '')
+        normalised = normalise_client_name(name)
+        if not abn and not normalised:
+            return None
+
+        if abn and abn in self.by_abn:
+            return self.by_abn[abn]
+
+        candidates = self.by_name.get(normalised, []) if normalised else []
+        client = next((c for c in candidates if not abn or not c.abn), None)
+        if client:
+            if abn and not client.abn:
+                client.abn = abn
+                self.by_abn[abn] = client
+            return client
+
+        client = self.Client(
+            name=(name or '').strip() or abn,
+            normalised_name=normalised,
+            abn=abn,
+            client_type=client_type,
+            address=address
+        )
+        self.clients.append(client)
+        if abn:
+            self.by_abn[abn] = client
+        if normalised:
+            self.by_name.setdefault(normalised, []).append(client)
+        return client
+
+
+def backfill_clients(apps, schema_editor):
+    Client = apps.get_model('invoicing', 'Client')
+    Invoice = apps.get_model('invoicing', 'Invoice')
+    Income = apps.get_model('accounting', 'Income')
+
+    index = ClientIndex(Client)
+    invoice_links = []
+    income_links = []
+
+    invoices = Invoice.objects.order_by('issue_date', 'pk').values_list(
+        'pk', 'client_name', 'client_abn', 'client_type', 'client_address'
+    )
+    for pk, name, abn, client_type, address in invoices.iterator(chunk_size=2000):
+        client = index.resolve(name, abn, client_type, address)
+        if client:
+            invoice_links.append((pk, client))
+
+    incomes = Income.objects.exclude(client_name='').order_by('date', 'pk').values_list('pk', 'client_name')
+    for pk, name in incomes.iterator(chunk_size=2000):
+        client = index.resolve(name)
+        if client:
+            income_links.append((pk, client))
+
+    Client.objects.bulk_create(index.clients, batch_size=500)
+    Invoice.objects.bulk_update(
+        [Invoice(pk=pk, client_id=client.pk) for pk, client in invoice_links], ['client'], batch_size=500
+    )
+    Income.objects.bulk_update(
+        [Income(pk=pk, client_id=client.pk) for pk, client in income_links], ['client'], batch_size=500
+    )
+
+    money = models.DecimalField(max_digits=14, decimal_places=2)
+    count = models.IntegerField()
+
+    def total(queryset, aggregate, output_field):
+        return Coalesce(
+            models.Subquery(queryset.annotate(value=aggregate).values('value')),
+            models.Value(0, output_field=output_field),
+            output_field=output_field
+        )
+
+    client_invoices = Invoice.objects.filter(
+        client=models.OuterRef('pk'), status__in=REPORTABLE_STATUSES
+    ).order_by().values('client')
+    client_incomes = Income.objects.filter(client=models.OuterRef('pk')).order_by().values('client')
+    invoice_revenue = total(client_invoices, models.Sum('grand_total'), money)
+    income_revenue = total(client_incomes, models.Sum('amount'), money)
+
+    Client.objects.update(
+        invoice_count=total(client_invoices, models.Count('pk'), count),
+        income_count=total(client_incomes, models.Count('pk'), count),
+        invoice_revenue=invoice_revenue,
+        income_revenue=income_revenue,
+        lifetime_revenue=invoice_revenue + income_revenue,
+        open_balance=total(client_invoices.filter(status__in=OPEN_STATUSES), models.Sum('grand_total'), money),
+        last_invoice_date=models.Subquery(client_invoices.order_by('-issue_date').values('issue_date')[:1]),
+    )
+
+
+def unlink_clients(apps, schema_editor):
+    apps.get_model('invoicing', 'Invoice').objects.update(client=None)
+    apps.get_model('accounting', 'Income').objects.update(client=None)
+    apps.get_model('invoicing', 'Client').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0011_client'),
+        ('accounting', '0002_income_client'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_clients, unlink_clients),
+    ]
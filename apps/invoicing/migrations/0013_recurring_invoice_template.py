@@ -0,0 +1,89 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:16
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0012_backfill_clients'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringInvoiceTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created date')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='Modified date')),
+                ('name', models.CharField(max_length=200, verbose_name='Name')),
+                ('client_type', models.CharField(choices=[('BUSINESS', 'Business (ABN holder)'), ('INDIVIDUAL', 'Individual')], max_length=20, verbose_name='Client type')),
+                ('client_name', models.CharField(max_length=200, verbose_name='Client name')),
+                ('client_abn', models.CharField(blank=True, max_length=14, verbose_name='Client ABN')),
+                ('client_address', models.TextField(verbose_name='Client address')),
+                ('payment_terms', models.TextField(default='Payment due within 30 days', verbose_name='Payment terms')),
+                ('notes', models.TextField(blank=True, verbose_name='Notes for generated invoices')),
+                ('invoice_status', models.CharField(choices=[('DRAFT', 'Draft'), ('SENT', 'Sent')], default='SENT', max_length=20, verbose_name='Generated invoice status')),
+                ('frequency', models.CharField(choices=[('MONTHLY', 'Monthly'), ('QUARTERLY', 'Quarterly'), ('YEARLY', 'Yearly')], default='MONTHLY', max_length=20, verbose_name='Frequency')),
+                ('start_date', models.DateField(verbose_name='First issue date')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='Last issue date')),
+                ('next_issue_date', models.DateField(editable=False, help_text='Advanced each time an invoice is generated', verbose_name='Next issue date')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Active')),
+            ],
+            options={
+                'verbose_name': 'Recurring invoice template',
+                'verbose_name_plural': 'Recurring invoice templates',
+                'ordering': ['next_issue_date', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecurringInvoiceTemplateItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.TextField(verbose_name='Description')),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='Quantity')),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Unit price (ex GST)')),
+                ('gst_treatment', models.CharField(choices=[('TAXABLE', 'Taxable (10% GST)'), ('GST_FREE', 'GST-free (health, education, exports)'), ('INPUT_TAXED', 'Input taxed (financial supplies, residential rent)')], default='TAXABLE', max_length=20, verbose_name='GST treatment')),
+            ],
+            options={
+                'verbose_name': 'Recurring invoice item',
+                'verbose_name_plural': 'Recurring invoice items',
+            },
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='recurring_period',
+            field=models.DateField(blank=True, editable=False, help_text='Scheduled issue date this invoice was generated for', null=True, verbose_name='Recurring period'),
+        ),
+        migrations.AddField(
+            model_name='recurringinvoicetemplateitem',
+            name='template',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='invoicing.recurringinvoicetemplate'),
+        ),
+        migrations.AddField(
+            model_name='recurringinvoicetemplate',
+            name='client',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recurring_templates', to='invoicing.client', verbose_name='Client'),
+        ),
+        migrations.AddField(
+            model_name='recurringinvoicetemplate',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_templates', to='invoicing.company'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='recurring_template',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='invoices', to='invoicing.recurringinvoicetemplate', verbose_name='Recurring template'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringinvoicetemplate',
+            index=models.Index(fields=['is_active', 'next_issue_date'], name='invoicing_recurring_due_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='invoice',
+            constraint=models.UniqueConstraint(condition=models.Q(('recurring_template__isnull', False)), fields=('recurring_template', 'recurring_period'), name='invoicing_invoice_recurring_unique'),
+        ),
+    ]
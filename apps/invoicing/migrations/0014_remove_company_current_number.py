@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:44
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0013_recurring_invoice_template'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='company',
+            name='current_number_non_negative',
+        ),
+        migrations.RemoveField(
+            model_name='company',
+            name='current_number',
+        ),
+    ]
@@ -1,14 +1,20 @@
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
-from decimal import Decimal
+from django.db.models.functions import Coalesce
+from decimal import Decimal, ROUND_HALF_UP
 from datetime import date
+import calendar
+import re
 
 from apps.core.models import TimeStampedModel
 from .constants import (
     LEGAL_FORMS, CLIENT_TYPES, INVOICE_STATUS, GST_RATE_CHOICES,
     AUSTRALIAN_STATES, GST_RATE, TAX_INVOICE_THRESHOLD, GST_TREATMENT,
-    RECORD_RETENTION_YEARS, GST_FREE_RATE
+    RECORD_RETENTION_YEARS, GST_FREE_RATE, BAS_PERIOD_TYPES, PDF_JOB_STATUS,
+    BANK_LINE_STATUS, RECURRING_FREQUENCIES, RECURRING_INVOICE_STATUS
 )
 from .validators import (
     AustralianBusinessValidator, AustralianPostcodeValidator,
@@ -16,6 +22,70 @@ from .validators import (
 )
 
 
+def calculate_invoice_totals(lines):
+    subtotal = Decimal('0.00')
+    taxable = Decimal('0.00')
+    for quantity, unit_price, gst_treatment in lines:
+        line_subtotal = quantity * unit_price
+        subtotal += line_subtotal
+        if gst_treatment == 'TAXABLE':
+            taxable += line_subtotal
+
+    gst = (taxable * GST_RATE / 100).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    return {
+        'subtotal_ex_gst': subtotal,
+        'gst_total': gst,
+        'grand_total': subtotal + gst,
+    }
+
+
+BAS_REPORTABLE_STATUSES = ['SENT', 'PAID', 'OVERDUE']
+
+
+OPEN_INVOICE_STATUSES = ['SENT', 'OVERDUE']
+
+
+COMPANY_NAME_SUFFIXES = {'pty', 'ltd', 'limited', 'proprietary'}
+
+
+class InvoiceQuerySet(models.QuerySet):
+    def overdue(self, today=None):
+        today = today or timezone.localdate()
+        return self.filter(
+            models.Q(status='OVERDUE') | models.Q(status='SENT', due_date__lt=today)
+        )
+
+    def sweep_overdue(self, today=None):
+        today = today or timezone.localdate()
+        return self.filter(status='SENT', due_date__lt=today).update(
+            status='OVERDUE',
+            modified=timezone.now()
+        )
+
+    def mark_paid(self, payments):
+        # payments maps invoice pk -> payment date; one UPDATE covers them
+        # all, with one CASE branch per distinct payment date.
+        by_date = {}
+        for pk, payment_date in payments.items():
+            by_date.setdefault(payment_date, []).append(pk)
+        if not by_date:
+            return 0
+
+        invoices = self.filter(pk__in=list(payments), status__in=OPEN_INVOICE_STATUSES)
+        client_ids = list(invoices.exclude(client=None).order_by().values_list('client_id', flat=True).distinct())
+        paid = invoices.update(
+            status='PAID',
+            payment_date=models.Case(
+                *[models.When(pk__in=pks, then=models.Value(payment_date)) for payment_date, pks in by_date.items()],
+                output_field=models.DateField()
+            ),
+            modified=timezone.now()
+        )
+        if client_ids:
+            Client.objects.filter(pk__in=client_ids).refresh_stats()
+        return paid
+
+
 class Company(TimeStampedModel):
     legal_form = models.CharField(
         max_length=20,
@@ -85,10 +155,6 @@ class Company(TimeStampedModel):
         default="INV",
         verbose_name="Invoice prefix"
     )
-    current_number = models.IntegerField(
-        default=0,
-        validators=[MinValueValidator(0)]
-    )
     logo = models.ImageField(upload_to='company/logos/', blank=True, null=True)
 
     def clean(self):
@@ -130,10 +196,199 @@ class Company(TimeStampedModel):
         indexes = [
             models.Index(fields=['abn'], name='invoicing_c_abn_idx'),
         ]
+
+
+def normalise_client_name(name):
+    words = re.sub(r'[^a-z0-9]+', ' ', (name or '').lower()).split()
+    while len(words) > 1 and words[-1] in COMPANY_NAME_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+class ClientQuerySet(models.QuerySet):
+    def resolve(self, name, abn='', client_type='', address=''):
+        # Clients are deduplicated by ABN first, then by normalised name. A
+        # name match is only reused for an ABN if it has no ABN of its own.
+        abn = re.sub(r'\D', '', abn or '')
+        normalised = normalise_client_name(name)
+        if not abn and not normalised:
+            return None
+
+        if abn:
+            client = self.filter(abn=abn).first()
+            if client:
+                return client
+
+        client = None
+        if normalised:
+            named = self.filter(normalised_name=normalised)
+            if abn:
+                named = named.filter(abn='')
+            client = named.order_by('pk').first()
+
+        if client:
+            if abn:
+                self.filter(pk=client.pk, abn='').update(abn=abn)
+                client.abn = abn
+            return client
+
+        try:
+            with transaction.atomic():
+                return self.create(
+                    name=(name or '').strip() or abn,
+                    normalised_name=normalised,
+                    abn=abn,
+                    client_type=client_type,
+                    address=address
+                )
+        except IntegrityError:
+            return self.get(abn=abn)
+
+    def refresh_stats(self):
+        from apps.accounting.models import Income
+
+        def total(queryset, aggregate, output_field):
+            return Coalesce(
+                models.Subquery(queryset.annotate(value=aggregate).values('value')),
+                models.Value(0, output_field=output_field),
+                output_field=output_field
+            )
+
+        money = models.DecimalField(max_digits=14, decimal_places=2)
+        count = models.IntegerField()
+        invoices = Invoice.objects.filter(
+            client=models.OuterRef('pk'),
+            status__in=BAS_REPORTABLE_STATUSES
+        ).order_by().values('client')
+        incomes = Income.objects.filter(client=models.OuterRef('pk')).order_by().values('client')
+        invoice_revenue = total(invoices, models.Sum('grand_total'), money)
+        income_revenue = total(incomes, models.Sum('amount'), money)
+
+        return self.update(
+            invoice_count=total(invoices, models.Count('pk'), count),
+            income_count=total(incomes, models.Count('pk'), count),
+            invoice_revenue=invoice_revenue,
+            income_revenue=income_revenue,
+            lifetime_revenue=invoice_revenue + income_revenue,
+            open_balance=total(invoices.filter(status__in=OPEN_INVOICE_STATUSES), models.Sum('grand_total'), money),
+            last_invoice_date=models.Subquery(
+                invoices.order_by('-issue_date').values('issue_date')[:1]
+            ),
+            modified=timezone.now()
+        )
+
+
+class Client(TimeStampedModel):
+    name = models.CharField(max_length=255, verbose_name="Name")
+    normalised_name = models.CharField(max_length=255, db_index=True, editable=False)
+    abn = models.CharField(max_length=11, blank=True, verbose_name="ABN")
+    client_type = models.CharField(max_length=20, choices=CLIENT_TYPES, blank=True, verbose_name="Client type")
+    address = models.TextField(blank=True, verbose_name="Address")
+
+    invoice_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Invoices")
+    income_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Income records")
+    invoice_revenue = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal('0.00'), editable=False,
+        verbose_name="Invoiced revenue"
+    )
+    income_revenue = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal('0.00'), editable=False,
+        verbose_name="Income revenue"
+    )
+    lifetime_revenue = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal('0.00'), editable=False,
+        verbose_name="Lifetime revenue"
+    )
+    open_balance = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal('0.00'), editable=False,
+        verbose_name="Open balance"
+    )
+    last_invoice_date = models.DateField(null=True, blank=True, editable=False, verbose_name="Last invoice")
+
+    objects = ClientQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.normalised_name = normalise_client_name(self.name)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.name} (ABN {self.abn})" if self.abn else self.name
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Client"
+        verbose_name_plural = "Clients"
         constraints = [
-            models.CheckConstraint(
-                check=models.Q(current_number__gte=0),
-                name='current_number_non_negative'
+            models.UniqueConstraint(
+                fields=['abn'],
+                condition=~models.Q(abn=''),
+                name='invoicing_client_abn_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['-lifetime_revenue'], name='invoicing_client_lifetime_idx'),
+            models.Index(fields=['-income_revenue'], name='invoicing_client_income_idx'),
+        ]
+
+
+class InvoiceReferenceCounter(models.Model):
+    prefix = models.CharField(max_length=10, verbose_name="Invoice prefix")
+    year = models.PositiveSmallIntegerField(verbose_name="Year")
+    last_number = models.PositiveIntegerField(default=0, verbose_name="Last number issued")
+
+    @staticmethod
+    def format_reference(prefix, number, year):
+        return f"{prefix}{number:04d}/{year % 100}"
+
+    @classmethod
+    def allocate(cls, prefix, year, count=1):
+        """Reserve `count` consecutive references for the prefix and year.
+
+        The counter row stays locked until the caller's transaction commits,
+        so callers allocate as the last write of the transaction. A rolled
+        back caller releases its numbers without leaving a gap.
+        """
+        last_number = cls._increment(prefix, year, count)
+        if last_number is None:
+            # First reference of the year: seed from the references already issued.
+            last_number = cls._increment(prefix, year, count, cls._highest_issued_number(prefix, year))
+
+        return [
+            cls.format_reference(prefix, number, year)
+            for number in range(last_number - count + 1, last_number + 1)
+        ]
+
+    @classmethod
+    def _increment(cls, prefix, year, count, seed=None):
+        with transaction.atomic():
+            if not cls.objects.filter(prefix=prefix, year=year).update(last_number=models.F('last_number') + count):
+                if seed is None:
+                    return None
+                cls.objects.get_or_create(prefix=prefix, year=year, defaults={'last_number': seed})
+                cls.objects.filter(prefix=prefix, year=year).update(last_number=models.F('last_number') + count)
+            return cls.objects.values_list('last_number', flat=True).get(prefix=prefix, year=year)
+
+    @staticmethod
+    def _highest_issued_number(prefix, year):
+        suffix = f"/{year % 100}"
+        pattern = re.compile(rf"^{re.escape(prefix)}(\d+){re.escape(suffix)}$")
+        references = Invoice.objects.filter(
+            reference__startswith=prefix,
+            reference__endswith=suffix
+        ).values_list('reference', flat=True)
+        numbers = [int(match.group(1)) for match in map(pattern.match, references) if match]
+        return max(numbers, default=0)
+
+    def __str__(self):
+        return f"{self.prefix} {self.year}: {self.last_number}"
+
+    class Meta:
+        verbose_name = "Invoice reference counter"
+        verbose_name_plural = "Invoice reference counters"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['prefix', 'year'],
+                name='invoice_reference_counter_unique'
             ),
         ]
 
@@ -156,6 +411,15 @@ class Invoice(TimeStampedModel):
         db_index=True
     )
     
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='invoices',
+        verbose_name="Client"
+    )
     client_type = models.CharField(
         max_length=20,
         choices=CLIENT_TYPES,
@@ -170,6 +434,23 @@ class Invoice(TimeStampedModel):
         db_index=True
     )
     client_address = models.TextField(verbose_name="Client address")
+
+    recurring_template = models.ForeignKey(
+        'RecurringInvoiceTemplate',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='invoices',
+        verbose_name="Recurring template"
+    )
+    recurring_period = models.DateField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Recurring period",
+        help_text='Scheduled issue date this invoice was generated for'
+    )
     
     status = models.CharField(
         max_length=20,
@@ -199,6 +480,13 @@ class Invoice(TimeStampedModel):
         help_text='Internal notes (not shown on invoice)'
     )
     pdf_file = models.FileField(upload_to='invoices/pdfs/', blank=True)
+    pdf_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        verbose_name="PDF fingerprint",
+        help_text='Content hash of the data the stored PDF was rendered from'
+    )
     retention_date = models.DateField(
         null=True,
         blank=True,
@@ -206,38 +494,80 @@ class Invoice(TimeStampedModel):
         verbose_name="Retention until",
         help_text=f'ATO requires {RECORD_RETENTION_YEARS} years retention'
     )
+    subtotal_ex_gst = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name="Subtotal (ex GST)"
+    )
+    gst_total = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name="GST total"
+    )
+    grand_total = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name="Total (inc GST)",
+        db_index=True
+    )
+
+    objects = InvoiceQuerySet.as_manager()
 
+    # Saved invoices read the stored totals, so every view, PDF and report
+    # shows the same once-rounded GST; unsaved ones have no items yet.
     @property
     def subtotal(self):
-        return sum(item.subtotal for item in self.items.all())
+        return self.subtotal_ex_gst if self.pk else self.calculate_totals()['subtotal_ex_gst']
 
     @property
     def gst_amount(self):
-        return sum(item.gst_amount for item in self.items.all())
+        return self.gst_total if self.pk else self.calculate_totals()['gst_total']
 
     @property
     def total_amount(self):
-        return self.subtotal + self.gst_amount
+        return self.grand_total if self.pk else self.calculate_totals()['grand_total']
 
     @property
     def is_tax_invoice(self):
         return self.company.gst_registered and self.total_amount >= TAX_INVOICE_THRESHOLD
 
+    def calculate_totals(self):
+        if not self.pk:
+            return calculate_invoice_totals([])
+        return calculate_invoice_totals(
+            self.items.values_list('quantity', 'unit_price', 'gst_treatment')
+        )
+
+    def refresh_totals(self):
+        totals = self.calculate_totals()
+        Invoice.objects.filter(pk=self.pk).update(**totals)
+        for field, value in totals.items():
+            setattr(self, field, value)
+        return totals
+
     def generate_reference(self):
         if not self.issue_date:
             self.issue_date = date.today()
-        year = self.issue_date.year % 100
-        
-        from django.db import transaction
-        with transaction.atomic():
-            company = Company.objects.select_for_update().get(pk=self.company.pk)
-            company.current_number += 1
-            company.save()
-            return f"{company.invoice_prefix}{company.current_number:04d}/{year}"
+        return InvoiceReferenceCounter.allocate(self.company.invoice_prefix, self.issue_date.year)[0]
 
     def assign_reference_if_needed(self):
         if not self.reference and self.status != 'DRAFT' and self.company:
             self.reference = self.generate_reference()
+
+    def finalise_reference(self):
+        # Called as the last write of a transaction that saved the invoice
+        # with defer_reference, so the counter row is locked only briefly.
+        if self.reference or self.status == 'DRAFT':
+            return
+        self.assign_reference_if_needed()
+        self.payment_reference = self.payment_reference or self.generate_payment_reference()
+        self.save(update_fields=['reference', 'payment_reference'])
     
     def generate_payment_reference(self):
         if not self.reference:
@@ -288,7 +618,7 @@ class Invoice(TimeStampedModel):
             return False
         if not self.due_date:
             return False
-        return date.today() > self.due_date
+        return timezone.localdate() > self.due_date
 
     def get_tax_invoice_note(self):
         if not self.company.gst_registered:
@@ -299,15 +629,32 @@ class Invoice(TimeStampedModel):
         
         return ""
 
+    def is_in_closed_bas_period(self):
+        if self.status not in BAS_REPORTABLE_STATUSES or not self.issue_date:
+            return False
+        return BASPeriodSnapshot.objects.covering(self.issue_date).exists()
+
     def clean(self):
         super().clean()
         if self.client_type == 'BUSINESS' and not self.client_abn:
             raise ValidationError({
                 'client_abn': 'ABN is required for business clients'
             })
+        
+        original = Invoice.objects.filter(pk=self.pk).first() if self.pk else None
+        if original and original.is_in_closed_bas_period():
+            if original.issue_date != self.issue_date or self.status not in BAS_REPORTABLE_STATUSES:
+                raise ValidationError(
+                    'This invoice belongs to a closed BAS period. Its issue date and status cannot be changed.'
+                )
+        elif self.is_in_closed_bas_period():
+            raise ValidationError({
+                'issue_date': 'This date falls in a closed BAS period.'
+            })
 
-    def save(self, *args, **kwargs):
-        self.assign_reference_if_needed()
+    def save(self, *args, defer_reference=False, **kwargs):
+        if not defer_reference:
+            self.assign_reference_if_needed()
         
         if not self.payment_reference and self.reference:
             self.payment_reference = self.generate_payment_reference()
@@ -321,6 +668,10 @@ class Invoice(TimeStampedModel):
         if self.status == 'SENT' and self.is_overdue():
             self.status = 'OVERDUE'
         
+        if self.pk and not kwargs.get('update_fields'):
+            for field, value in self.calculate_totals().items():
+                setattr(self, field, value)
+        
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -335,6 +686,11 @@ class Invoice(TimeStampedModel):
             models.Index(fields=['issue_date', 'status'], name='invoicing_i_issue_status_idx'),
             models.Index(fields=['client_abn', 'status'], name='invoicing_i_abn_status_idx'),
             models.Index(fields=['-issue_date', '-id'], name='invoicing_i_issue_id_desc_idx'),
+            models.Index(
+                fields=['status', 'due_date'],
+                name='invoicing_i_open_st_due_idx',
+                condition=models.Q(status__in=OPEN_INVOICE_STATUSES)
+            ),
         ]
         constraints = [
             models.CheckConstraint(
@@ -347,6 +703,11 @@ class Invoice(TimeStampedModel):
                 check=models.Q(due_date__gte=models.F('issue_date')),
                 name='due_date_after_issue_date'
             ),
+            models.UniqueConstraint(
+                fields=['recurring_template', 'recurring_period'],
+                condition=models.Q(recurring_template__isnull=False),
+                name='invoicing_invoice_recurring_unique'
+            ),
         ]
 
 
@@ -407,3 +768,319 @@ class InvoiceItem(models.Model):
                 name='unit_price_positive'
             ),
         ]
+
+
+class BASPeriodSnapshotQuerySet(models.QuerySet):
+    def covering(self, day):
+        return self.filter(start_date__lte=day, end_date__gte=day)
+
+
+class BASPeriodSnapshot(TimeStampedModel):
+    REPORT_FIELDS = {
+        'invoice_count': 'invoice_count',
+        'G1_total_sales_inc_gst': 'g1_total_sales_inc_gst',
+        'G2_export_sales': 'g2_export_sales',
+        'G3_gst_free_sales': 'g3_gst_free_sales',
+        'G4_input_taxed_sales': 'g4_input_taxed_sales',
+        '1A_gst_on_sales': 'gst_on_sales_1a',
+        'taxable_sales_ex_gst': 'taxable_sales_ex_gst',
+        'total_sales_ex_gst': 'total_sales_ex_gst',
+    }
+
+    period_type = models.CharField(
+        max_length=10,
+        choices=BAS_PERIOD_TYPES,
+        verbose_name="Period type"
+    )
+    period = models.CharField(max_length=20, verbose_name="Period")
+    start_date = models.DateField(verbose_name="Start date", db_index=True)
+    end_date = models.DateField(verbose_name="End date", db_index=True)
+    
+    invoice_count = models.PositiveIntegerField(default=0, verbose_name="Invoice count")
+    g1_total_sales_inc_gst = models.DecimalField(max_digits=14, decimal_places=3, verbose_name="G1 Total sales (inc GST)")
+    g2_export_sales = models.DecimalField(max_digits=14, decimal_places=3, verbose_name="G2 Export sales")
+    g3_gst_free_sales = models.DecimalField(max_digits=14, decimal_places=3, verbose_name="G3 GST-free sales")
+    g4_input_taxed_sales = models.DecimalField(max_digits=14, decimal_places=3, verbose_name="G4 Input taxed sales")
+    gst_on_sales_1a = models.DecimalField(max_digits=14, decimal_places=3, verbose_name="1A GST on sales")
+    taxable_sales_ex_gst = models.DecimalField(max_digits=14, decimal_places=3, verbose_name="Taxable sales (ex GST)")
+    total_sales_ex_gst = models.DecimalField(max_digits=14, decimal_places=3, verbose_name="Total sales (ex GST)")
+    
+    closed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Closed by"
+    )
+
+    objects = BASPeriodSnapshotQuerySet.as_manager()
+
+    @classmethod
+    def from_report(cls, period_type, report, closed_by=None):
+        return cls(
+            period_type=period_type,
+            period=report['period'],
+            start_date=report['start_date'],
+            end_date=report['end_date'],
+            closed_by=closed_by,
+            **{field: report[key] for key, field in cls.REPORT_FIELDS.items()}
+        )
+
+    def as_report(self):
+        return {
+            'period': self.period,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            **{key: getattr(self, field) for key, field in self.REPORT_FIELDS.items()},
+            'is_closed': True,
+            'closed_at': self.created,
+        }
+
+    def __str__(self):
+        return f"BAS {self.period} (closed)"
+
+    class Meta:
+        ordering = ['-start_date', 'period_type']
+        verbose_name = "BAS period snapshot"
+        verbose_name_plural = "BAS period snapshots"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period_type', 'start_date'],
+                name='bas_snapshot_unique_period'
+            ),
+            models.CheckConstraint(
+                check=models.Q(end_date__gte=models.F('start_date')),
+                name='bas_snapshot_end_after_start'
+            ),
+        ]
+
+
+class InvoicePDFJobQuerySet(models.QuerySet):
+    def claimable(self, stale_before):
+        now = timezone.now()
+        return self.filter(
+            models.Q(status='PENDING', run_after__lte=now) |
+            models.Q(status='RUNNING', claimed_at__lt=stale_before)
+        )
+
+
+class InvoicePDFJob(TimeStampedModel):
+    invoice = models.OneToOneField(
+        Invoice,
+        on_delete=models.CASCADE,
+        related_name='pdf_job'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=PDF_JOB_STATUS,
+        default='PENDING',
+        verbose_name="Status"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Attempts")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="Run after")
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name="Claimed at")
+    last_error = models.TextField(blank=True, verbose_name="Last error")
+
+    objects = InvoicePDFJobQuerySet.as_manager()
+
+    @classmethod
+    def enqueue(cls, invoice_ids):
+        now = timezone.now()
+        jobs = [cls(invoice_id=invoice_id, run_after=now) for invoice_id in invoice_ids]
+        return cls.objects.bulk_create(
+            jobs,
+            update_conflicts=True,
+            unique_fields=['invoice'],
+            update_fields=['status', 'attempts', 'run_after', 'claimed_at', 'last_error', 'modified'],
+            batch_size=1000,
+        )
+
+    def __str__(self):
+        return f"PDF job for invoice #{self.invoice_id} ({self.status})"
+
+    class Meta:
+        ordering = ['run_after']
+        verbose_name = "Invoice PDF job"
+        verbose_name_plural = "Invoice PDF jobs"
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='invoicing_pdfjob_due_idx'),
+        ]
+
+
+class BankStatementImport(TimeStampedModel):
+    filename = models.CharField(max_length=255, verbose_name="File name")
+    file_format = models.CharField(max_length=10, verbose_name="Format")
+    matched_count = models.PositiveIntegerField(default=0, verbose_name="Matched lines")
+    review_count = models.PositiveIntegerField(default=0, verbose_name="Lines for review")
+    skipped_count = models.PositiveIntegerField(default=0, verbose_name="Skipped lines")
+    imported_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Imported by"
+    )
+
+    def __str__(self):
+        return f"{self.filename} ({self.created:%d/%m/%Y})"
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = "Bank statement import"
+        verbose_name_plural = "Bank statement imports"
+
+
+class BankStatementLine(TimeStampedModel):
+    statement = models.ForeignKey(
+        BankStatementImport,
+        on_delete=models.CASCADE,
+        related_name='lines'
+    )
+    line_number = models.PositiveIntegerField(verbose_name="Line")
+    transaction_date = models.DateField(verbose_name="Transaction date")
+    amount = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Amount")
+    description = models.CharField(max_length=255, blank=True, verbose_name="Description")
+    bank_reference = models.CharField(max_length=100, blank=True, verbose_name="Bank transaction ID")
+    line_hash = models.CharField(max_length=64, unique=True, editable=False)
+    status = models.CharField(
+        max_length=10,
+        choices=BANK_LINE_STATUS,
+        default='REVIEW',
+        verbose_name="Status"
+    )
+    invoice = models.ForeignKey(
+        Invoice,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bank_lines',
+        verbose_name="Invoice"
+    )
+    review_note = models.CharField(max_length=255, blank=True, verbose_name="Review note")
+
+    def __str__(self):
+        return f"{self.transaction_date} {self.amount} {self.description}"
+
+    class Meta:
+        ordering = ['transaction_date', 'line_number']
+        verbose_name = "Bank statement line"
+        verbose_name_plural = "Bank statement lines"
+        indexes = [
+            models.Index(fields=['status', 'transaction_date'], name='invoicing_bankline_status_idx'),
+        ]
+
+
+def add_months(day, months, anchor_day=None):
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(anchor_day or day.day, calendar.monthrange(year, month)[1]))
+
+
+class RecurringInvoiceTemplateQuerySet(models.QuerySet):
+    def due(self, run_date):
+        return self.filter(is_active=True, next_issue_date__lte=run_date).filter(
+            models.Q(end_date__isnull=True) | models.Q(end_date__gte=models.F('next_issue_date'))
+        )
+
+
+class RecurringInvoiceTemplate(TimeStampedModel):
+    FREQUENCY_MONTHS = {'MONTHLY': 1, 'QUARTERLY': 3, 'YEARLY': 12}
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='recurring_templates')
+    name = models.CharField(max_length=200, verbose_name="Name")
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='recurring_templates',
+        verbose_name="Client"
+    )
+    client_type = models.CharField(max_length=20, choices=CLIENT_TYPES, verbose_name="Client type")
+    client_name = models.CharField(max_length=200, verbose_name="Client name")
+    client_abn = models.CharField(max_length=14, blank=True, verbose_name="Client ABN")
+    client_address = models.TextField(verbose_name="Client address")
+    payment_terms = models.TextField(default="Payment due within 30 days", verbose_name="Payment terms")
+    notes = models.TextField(blank=True, verbose_name="Notes for generated invoices")
+    invoice_status = models.CharField(
+        max_length=20,
+        choices=RECURRING_INVOICE_STATUS,
+        default='SENT',
+        verbose_name="Generated invoice status"
+    )
+    frequency = models.CharField(
+        max_length=20,
+        choices=RECURRING_FREQUENCIES,
+        default='MONTHLY',
+        verbose_name="Frequency"
+    )
+    start_date = models.DateField(verbose_name="First issue date")
+    end_date = models.DateField(null=True, blank=True, verbose_name="Last issue date")
+    next_issue_date = models.DateField(
+        editable=False,
+        verbose_name="Next issue date",
+        help_text='Advanced each time an invoice is generated'
+    )
+    is_active = models.BooleanField(default=True, verbose_name="Active")
+
+    objects = RecurringInvoiceTemplateQuerySet.as_manager()
+
+    def following_issue_date(self, issue_date):
+        # Periods are counted from start_date so a template starting on the
+        # 31st issues on the last day of short months and returns to the 31st.
+        elapsed = (issue_date.year - self.start_date.year) * 12 + issue_date.month - self.start_date.month
+        return add_months(self.start_date, elapsed + self.FREQUENCY_MONTHS[self.frequency])
+
+    def clean(self):
+        super().clean()
+        if self.client_type == 'BUSINESS' and not self.client_abn:
+            raise ValidationError({'client_abn': 'ABN is required for business clients'})
+        if self.end_date and self.start_date and self.end_date < self.start_date:
+            raise ValidationError({'end_date': 'Last issue date cannot be before the first issue date.'})
+
+    def save(self, *args, **kwargs):
+        # Until the first invoice is generated the schedule follows start_date.
+        if not self.next_issue_date or (self.pk and not self.invoices.exists()):
+            self.next_issue_date = self.start_date
+        self.client = Client.objects.resolve(
+            self.client_name, self.client_abn, self.client_type, self.client_address
+        )
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.name} ({self.get_frequency_display()})"
+
+    class Meta:
+        ordering = ['next_issue_date', 'name']
+        verbose_name = "Recurring invoice template"
+        verbose_name_plural = "Recurring invoice templates"
+        indexes = [
+            models.Index(fields=['is_active', 'next_issue_date'], name='invoicing_recurring_due_idx'),
+        ]
+
+
+class RecurringInvoiceTemplateItem(models.Model):
+    template = models.ForeignKey(RecurringInvoiceTemplate, on_delete=models.CASCADE, related_name='items')
+    description = models.TextField(verbose_name="Description")
+    quantity = models.PositiveIntegerField(default=1, verbose_name="Quantity")
+    unit_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))],
+        verbose_name="Unit price (ex GST)"
+    )
+    gst_treatment = models.CharField(
+        max_length=20,
+        choices=GST_TREATMENT,
+        default='TAXABLE',
+        verbose_name="GST treatment"
+    )
+
+    def __str__(self):
+        return f"{self.description} - {self.quantity} x ${self.unit_price}"
+
+    class Meta:
+        verbose_name = "Recurring invoice item"
+        verbose_name_plural = "Recurring invoice items"
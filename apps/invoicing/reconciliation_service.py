@@ -0,0 +1,337 @@
+import csv
+import hashlib
+import re
+from collections import Counter, defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.services.ledger_version import LedgerVersion
+
+from .aging_service import ARAgingService
+from .models import OPEN_INVOICE_STATUSES, BankStatementImport, BankStatementLine, Invoice
+
+STATEMENT_FORMATS = {
+    '.csv': 'csv',
+    '.ofx': 'ofx',
+    '.qfx': 'ofx',
+}
+
+STATEMENT_DATE_FORMATS = ['%d/%m/%Y', '%Y-%m-%d', '%d/%m/%y', '%d-%m-%Y', '%d %b %Y', '%Y%m%d']
+
+CSV_HEADERS = {
+    'date': ['date', 'transaction date', 'posted date', 'value date'],
+    'amount': ['amount', 'transaction amount', 'value'],
+    'credit': ['credit', 'credit amount', 'deposits'],
+    'debit': ['debit', 'debit amount', 'withdrawals'],
+    'description': ['description', 'narrative', 'details', 'transaction details', 'reference', 'memo'],
+}
+
+# Headerless exports (e.g. CommBank) are date, amount, description, balance.
+CSV_POSITIONAL_COLUMNS = {'date': [0], 'amount': [1], 'description': [2]}
+
+OFX_TAG_PATTERN = re.compile(r'<(/?[A-Za-z0-9.]+)>([^<]*)')
+REFERENCE_TOKEN_PATTERN = re.compile(r'[A-Z0-9]+')
+
+
+def normalise_reference(value):
+    return re.sub(r'[^A-Z0-9]', '', (value or '').upper())
+
+
+class ReconciliationReport:
+    def __init__(self):
+        self.matched = 0
+        self.review = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.errors = []
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def add_error(self, row, messages):
+        self.errors.append({'row': row, 'errors': list(messages)})
+
+
+class BankReconciliationService:
+    CHUNK_SIZE = 1000
+    # Adjacent description tokens joined when probing the index, so that
+    # "WF0001/25" and "WF000125 JOHN" still hit the normalised keys.
+    MAX_TOKEN_SPAN = 3
+
+    def __init__(self, chunk_size=CHUNK_SIZE, dry_run=False, user=None):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.user = user
+        self.claimed = set()
+
+    @staticmethod
+    def detect_format(filename):
+        for extension, file_format in STATEMENT_FORMATS.items():
+            if filename.lower().endswith(extension):
+                return file_format
+        raise ValueError(f"Unsupported statement file: {filename}")
+
+    def reconcile_stream(self, stream, file_format, filename=''):
+        self._build_index()
+        statement = BankStatementImport(filename=filename, file_format=file_format, imported_by=self.user)
+        if not self.dry_run:
+            statement.save()
+
+        lines = self.iter_csv(stream) if file_format == 'csv' else self.iter_ofx(stream)
+        occurrences = Counter()
+        report = ReconciliationReport()
+        batch = []
+
+        try:
+            for row, data in lines:
+                try:
+                    line = self._build_line(row, data, occurrences)
+                except ValidationError as e:
+                    report.add_error(row, e.messages)
+                    continue
+
+                if line is None:
+                    report.skipped += 1
+                    continue
+
+                batch.append(line)
+                if len(batch) >= self.chunk_size:
+                    self._flush(statement, batch, report)
+                    batch = []
+        except (csv.Error, UnicodeDecodeError) as e:
+            report.add_error(None, [f"Could not parse file: {e}"])
+
+        if batch:
+            self._flush(statement, batch, report)
+
+        if not self.dry_run:
+            statement.matched_count = report.matched
+            statement.review_count = report.review
+            statement.skipped_count = report.skipped + report.duplicates
+            statement.save(update_fields=['matched_count', 'review_count', 'skipped_count', 'modified'])
+        return report
+
+    def _build_index(self):
+        self.by_reference = defaultdict(set)
+        self.by_amount = defaultdict(set)
+        self.totals = {}
+
+        open_invoices = Invoice.objects.filter(
+            status__in=OPEN_INVOICE_STATUSES,
+            reference__isnull=False
+        ).values_list('pk', 'reference', 'payment_reference', 'grand_total')
+
+        for pk, reference, payment_reference, grand_total in open_invoices.iterator(chunk_size=2000):
+            for key in {normalise_reference(reference), normalise_reference(payment_reference)} - {''}:
+                self.by_reference[key].add(pk)
+            self.by_amount[grand_total].add(pk)
+            self.totals[pk] = grand_total
+
+    @classmethod
+    def iter_csv(cls, stream):
+        reader = csv.reader(stream)
+        columns = None
+
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            if columns is None:
+                columns = cls._csv_columns(row)
+                if columns is not None:
+                    continue
+                columns = CSV_POSITIONAL_COLUMNS
+
+            values = {
+                field: [row[index].strip() for index in indexes if index < len(row)]
+                for field, indexes in columns.items()
+            }
+            yield reader.line_num, {
+                'date': next(iter(values.get('date') or []), ''),
+                'amount': next(iter(values.get('amount') or []), ''),
+                'credit': next(iter(values.get('credit') or []), ''),
+                'debit': next(iter(values.get('debit') or []), ''),
+                'description': ' '.join(value for value in values.get('description', []) if value),
+                'bank_reference': '',
+            }
+
+    @staticmethod
+    def _csv_columns(header):
+        names = [cell.strip().lower() for cell in header]
+        columns = {
+            field: [index for index, name in enumerate(names) if name in aliases]
+            for field, aliases in CSV_HEADERS.items()
+        }
+        if not columns['date'] or not (columns['amount'] or columns['credit']):
+            return None
+        return {field: indexes for field, indexes in columns.items() if indexes}
+
+    @staticmethod
+    def iter_ofx(stream, chunk_size=65536):
+        # OFX 1.x is SGML with optional closing tags, so transactions are
+        # read tag by tag from a rolling buffer instead of with an XML parser.
+        buffer = ''
+        transaction_tags = None
+        row = 0
+
+        while True:
+            chunk = stream.read(chunk_size)
+            buffer += chunk
+            end = max(buffer.rfind('<'), 0) if chunk else len(buffer)
+
+            for match in OFX_TAG_PATTERN.finditer(buffer, 0, end):
+                tag, value = match.group(1).upper(), match.group(2).strip()
+                if tag == 'STMTTRN':
+                    transaction_tags = {}
+                elif tag == '/STMTTRN' and transaction_tags is not None:
+                    row += 1
+                    yield row, {
+                        'date': transaction_tags.get('DTPOSTED', '')[:8],
+                        'amount': transaction_tags.get('TRNAMT', ''),
+                        'credit': '',
+                        'debit': '',
+                        'description': ' '.join(
+                            transaction_tags[name] for name in ('NAME', 'MEMO') if transaction_tags.get(name)
+                        ),
+                        'bank_reference': transaction_tags.get('FITID', ''),
+                    }
+                    transaction_tags = None
+                elif transaction_tags is not None and not tag.startswith('/'):
+                    transaction_tags[tag] = value
+
+            buffer = buffer[end:]
+            if not chunk:
+                return
+
+    def _build_line(self, row, data, occurrences):
+        errors = []
+        transaction_date = self._parse_date(data['date'])
+        if transaction_date is None:
+            errors.append(f"date: unrecognised date '{data['date']}'")
+
+        try:
+            if data['amount']:
+                amount = self._parse_amount(data['amount'])
+            else:
+                amount = self._parse_amount(data['credit'] or '0') - self._parse_amount(data['debit'] or '0')
+        except InvalidOperation:
+            errors.append('amount: not a number')
+            amount = None
+
+        if errors:
+            raise ValidationError(errors)
+
+        # Only money coming in can settle an invoice.
+        if amount <= 0:
+            return None
+
+        description = data['description'][:255]
+        identity = [data['bank_reference']] if data['bank_reference'] else [description]
+        identity += [transaction_date.isoformat(), str(amount)]
+        occurrences[tuple(identity)] += 1
+        identity.append(str(occurrences[tuple(identity)]))
+
+        return BankStatementLine(
+            line_number=row,
+            transaction_date=transaction_date,
+            amount=amount,
+            description=description,
+            bank_reference=data['bank_reference'][:100],
+            line_hash=hashlib.sha256('|'.join(identity).encode('utf-8')).hexdigest(),
+        )
+
+    def _flush(self, statement, batch, report):
+        existing = set(BankStatementLine.objects.filter(
+            line_hash__in=[line.line_hash for line in batch]
+        ).values_list('line_hash', flat=True))
+
+        fresh = []
+        payments = {}
+        for line in batch:
+            if line.line_hash in existing:
+                report.duplicates += 1
+                continue
+
+            existing.add(line.line_hash)
+            self._match(line)
+            if line.status == 'MATCHED':
+                payments[line.invoice_id] = line.transaction_date
+                report.matched += 1
+            else:
+                report.review += 1
+            line.statement = statement
+            fresh.append(line)
+
+        if self.dry_run or not fresh:
+            return
+
+        with transaction.atomic():
+            BankStatementLine.objects.bulk_create(fresh)
+            if Invoice.objects.mark_paid(payments):
+                transaction.on_commit(ARAgingService.invalidate)
+                LedgerVersion.bump_on_commit()
+
+    def _match(self, line):
+        tokens = REFERENCE_TOKEN_PATTERN.findall(f"{line.description} {line.bank_reference}".upper())
+        candidates = set()
+        for span in range(1, self.MAX_TOKEN_SPAN + 1):
+            for start in range(len(tokens) - span + 1):
+                candidates |= self.by_reference.get(''.join(tokens[start:start + span]), set())
+
+        available = candidates - self.claimed
+        exact = [pk for pk in available if self.totals[pk] == line.amount]
+
+        if len(exact) == 1:
+            line.invoice_id = exact[0]
+            line.status = 'MATCHED'
+            self.claimed.add(exact[0])
+            return
+
+        line.status = 'REVIEW'
+        if len(exact) > 1:
+            line.review_note = 'Several open invoices match this reference and amount'
+        elif len(available) == 1:
+            line.invoice_id = next(iter(available))
+            line.review_note = f"Amount differs from invoice total ${self.totals[line.invoice_id]}"
+        elif candidates and not available:
+            line.review_note = 'Invoice already settled by an earlier line'
+        elif available:
+            line.review_note = 'Reference matches several open invoices'
+        else:
+            same_amount = self.by_amount.get(line.amount, set()) - self.claimed
+            if len(same_amount) == 1:
+                line.invoice_id = next(iter(same_amount))
+                line.review_note = 'No reference found; suggested by amount only'
+            else:
+                line.review_note = 'No matching invoice'
+
+    @staticmethod
+    def resolve_lines(lines):
+        lines = lines.filter(status='REVIEW', invoice__isnull=False)
+        payments = dict(lines.values_list('invoice_id', 'transaction_date'))
+        with transaction.atomic():
+            paid = Invoice.objects.mark_paid(payments)
+            lines.update(status='RESOLVED', modified=timezone.now())
+            transaction.on_commit(ARAgingService.invalidate)
+            LedgerVersion.bump_on_commit()
+        return paid
+
+    @staticmethod
+    def _parse_date(value):
+        for date_format in STATEMENT_DATE_FORMATS:
+            try:
+                return datetime.strptime(value.strip(), date_format).date()
+            except ValueError:
+                continue
+        return None
+
+    @staticmethod
+    def _parse_amount(value):
+        cleaned = value.replace('$', '').replace(',', '').replace(' ', '')
+        if cleaned.startswith('(') and cleaned.endswith(')'):
+            cleaned = f"-{cleaned[1:-1]}"
+        return Decimal(cleaned).quantize(Decimal('0.01'))
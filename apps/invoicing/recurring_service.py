@@ -0,0 +1,192 @@
+from collections import defaultdict
+from datetime import date
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from apps.core.services.ledger_version import LedgerVersion
+
+from .aging_service import ARAgingService
+from .models import (
+    BAS_REPORTABLE_STATUSES, BASPeriodSnapshot, Client, Invoice, InvoiceItem, InvoiceReferenceCounter,
+    RecurringInvoiceTemplate, RecurringInvoiceTemplateItem, calculate_invoice_totals
+)
+from .services import InvoicePDFQueue
+
+
+class RecurringInvoiceReport:
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        self.templates = 0
+        self.errors = []
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def add_error(self, template, messages):
+        self.errors.append({'template': template, 'errors': list(messages)})
+
+
+class RecurringInvoiceService:
+    CHUNK_SIZE = 500
+
+    def __init__(self, run_date=None, chunk_size=CHUNK_SIZE, queue_pdfs=False, dry_run=False):
+        self.run_date = run_date or timezone.localdate()
+        self.chunk_size = chunk_size
+        self.queue_pdfs = queue_pdfs
+        self.dry_run = dry_run
+        self.closed_periods = list(BASPeriodSnapshot.objects.values_list('start_date', 'end_date'))
+        self.today = date.today()
+
+    def generate(self):
+        report = RecurringInvoiceReport()
+        due = RecurringInvoiceTemplate.objects.due(self.run_date).order_by('pk')
+        last_pk = 0
+
+        while True:
+            template_ids = list(due.filter(pk__gt=last_pk).values_list('pk', flat=True)[:self.chunk_size])
+            if not template_ids:
+                return report
+            last_pk = template_ids[-1]
+            with transaction.atomic():
+                self._generate_chunk(template_ids, report)
+
+    def _generate_chunk(self, template_ids, report):
+        # Locking the templates serialises overlapping runs; the schedule is
+        # re-read under the lock so a concurrent run's progress is respected.
+        templates = list(
+            RecurringInvoiceTemplate.objects.due(self.run_date)
+            .filter(pk__in=template_ids)
+            .select_for_update(of=('self',))
+            .select_related('company')
+            .order_by('pk')
+        )
+        items = defaultdict(list)
+        for item in RecurringInvoiceTemplateItem.objects.filter(template__in=templates).order_by('pk'):
+            items[item.template_id].append(item)
+
+        issued = set(Invoice.objects.filter(recurring_template__in=templates).filter(
+            recurring_period__gte=min((template.next_issue_date for template in templates), default=self.run_date)
+        ).values_list('recurring_template_id', 'recurring_period'))
+
+        batch = []
+        resolved = []
+        for template in templates:
+            report.templates += 1
+            if not items[template.pk]:
+                report.add_error(template, ['Template has no line items'])
+                continue
+            if template.client_id is None:
+                template.client = Client.objects.resolve(
+                    template.client_name, template.client_abn, template.client_type, template.client_address
+                )
+                resolved.append(template)
+
+            while self._is_due(template):
+                period = template.next_issue_date
+                if (template.pk, period) in issued:
+                    report.skipped += 1
+                elif template.invoice_status != 'DRAFT' and self._in_closed_period(period):
+                    report.add_error(template, [f"{period:%d/%m/%Y} falls in a closed BAS period"])
+                    break
+                else:
+                    batch.append((self._build_invoice(template, period), items[template.pk]))
+                template.next_issue_date = template.following_issue_date(period)
+
+        report.created += len(batch)
+        if self.dry_run:
+            transaction.set_rollback(True)
+            return
+
+        self._insert(batch)
+        self._advance(templates)
+        if resolved:
+            RecurringInvoiceTemplate.objects.bulk_update(resolved, ['client'])
+
+    @staticmethod
+    def _advance(templates):
+        # A chunk shares a handful of next issue dates, so one CASE branch
+        # per distinct date is far cheaper than bulk_update's branch per row.
+        by_date = defaultdict(list)
+        for template in templates:
+            by_date[template.next_issue_date].append(template.pk)
+        RecurringInvoiceTemplate.objects.filter(pk__in=[template.pk for template in templates]).update(
+            next_issue_date=models.Case(
+                *[models.When(pk__in=pks, then=models.Value(day)) for day, pks in by_date.items()],
+                output_field=models.DateField()
+            ),
+            modified=timezone.now()
+        )
+
+    def _is_due(self, template):
+        period = template.next_issue_date
+        return period <= self.run_date and (template.end_date is None or period <= template.end_date)
+
+    def _in_closed_period(self, day):
+        return any(start <= day <= end for start, end in self.closed_periods)
+
+    def _build_invoice(self, template, period):
+        invoice = Invoice(
+            company=template.company,
+            issue_date=period,
+            client_id=template.client_id,
+            client_type=template.client_type,
+            client_name=template.client_name,
+            client_abn=template.client_abn,
+            client_address=template.client_address,
+            recurring_template=template,
+            recurring_period=period,
+            status=template.invoice_status,
+            payment_terms=template.payment_terms,
+            notes=template.notes,
+        )
+        invoice.due_date = invoice.calculate_due_date()
+        invoice.retention_date = invoice.calculate_retention_date()
+        if invoice.status == 'SENT' and invoice.due_date < self.today:
+            invoice.status = 'OVERDUE'
+        return invoice
+
+    def _insert(self, batch):
+        if not batch:
+            return
+
+        by_year = defaultdict(list)
+        for invoice, _ in batch:
+            if invoice.status != 'DRAFT':
+                by_year[(invoice.company.invoice_prefix, invoice.issue_date.year)].append(invoice)
+
+        for (prefix, year), year_invoices in by_year.items():
+            references = InvoiceReferenceCounter.allocate(prefix, year, count=len(year_invoices))
+            for invoice, reference in zip(year_invoices, references):
+                invoice.reference = reference
+                invoice.payment_reference = invoice.generate_payment_reference()
+
+        for invoice, template_items in batch:
+            totals = calculate_invoice_totals(
+                (item.quantity, item.unit_price, item.gst_treatment) for item in template_items
+            )
+            for field, value in totals.items():
+                setattr(invoice, field, value)
+
+        invoices = Invoice.objects.bulk_create([invoice for invoice, _ in batch])
+        InvoiceItem.objects.bulk_create([
+            InvoiceItem(
+                invoice=invoice,
+                description=item.description,
+                quantity=item.quantity,
+                unit_price=item.unit_price,
+                gst_treatment=item.gst_treatment
+            )
+            for invoice, template_items in batch
+            for item in template_items
+        ])
+
+        Client.objects.filter(pk__in={invoice.client_id for invoice in invoices}).refresh_stats()
+        transaction.on_commit(ARAgingService.invalidate)
+        LedgerVersion.bump_on_commit()
+        if self.queue_pdfs:
+            InvoicePDFQueue.enqueue_on_commit(
+                invoice.pk for invoice in invoices if invoice.status in BAS_REPORTABLE_STATUSES
+            )
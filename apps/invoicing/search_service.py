@@ -0,0 +1,64 @@
+import re
+
+from django.db import connection
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest, Upper
+
+ABN_SEARCH_PATTERN = re.compile(r'^[\d\s]+$')
+
+
+class InvoiceSearchService:
+    MIN_ABN_DIGITS = 2
+
+    @classmethod
+    def search(cls, queryset, term):
+        term = (term or '').strip()
+        if not term:
+            return queryset
+
+        if connection.vendor == 'postgresql':
+            return cls._search_postgresql(queryset, term)
+        return cls._search_fallback(queryset, term)
+
+    @classmethod
+    def _abn_prefix(cls, term):
+        if not ABN_SEARCH_PATTERN.match(term):
+            return None
+        digits = re.sub(r'\s', '', term)
+        return digits if len(digits) >= cls.MIN_ABN_DIGITS else None
+
+    @staticmethod
+    def _search_fallback(queryset, term):
+        return queryset.filter(
+            Q(reference__icontains=term) |
+            Q(client_name__icontains=term) |
+            Q(client_abn__icontains=term)
+        )
+
+    @classmethod
+    def _search_postgresql(cls, queryset, term):
+        # The trigram GIN indexes are built on UPPER(column), the same
+        # expression Django emits for icontains, so substring matches and
+        # fuzzy client-name matches are both served from the index.
+        from django.contrib.postgres.lookups import TrigramWordSimilar
+        from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+
+        # client_name %> term: the term is similar to some word run of the
+        # name, with the indexed expression on the left.
+        upper_term = Upper(Value(term))
+        matches = (
+            Q(reference__icontains=term) |
+            Q(client_name__icontains=term) |
+            Q(TrigramWordSimilar(Upper(F('client_name')), upper_term))
+        )
+
+        abn_prefix = cls._abn_prefix(term)
+        if abn_prefix:
+            matches |= Q(client_abn__startswith=abn_prefix)
+
+        return queryset.filter(matches).annotate(
+            search_rank=Greatest(
+                TrigramSimilarity(Upper(F('reference')), upper_term),
+                TrigramWordSimilarity(upper_term, Upper(F('client_name'))),
+            )
+        ).order_by('-search_rank', '-issue_date', '-id')
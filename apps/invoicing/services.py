@@ -1,13 +1,23 @@
-from django.http import HttpResponse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db.models import Count, Max, Min, Sum
 from django.utils import timezone
 from datetime import date, datetime, timedelta
 from decimal import Decimal
+import hashlib
+import itertools
+import json
 import zipfile
 import io
 import logging
+import multiprocessing
 
-from .models import Invoice
-from .utils import generate_invoice_pdf
+from .models import Invoice, InvoicePDFJob
+from .utils import build_invoice_render_data, generate_invoice_pdf, get_invoice_renderer
 
 logger = logging.getLogger(__name__)
 
@@ -80,55 +90,312 @@ class InvoicePeriodService:
     
     @staticmethod
     def get_period_summary(invoices):
-        if not invoices:
+        summary = invoices.aggregate(
+            count=Count('id'),
+            total_amount=Sum('grand_total'),
+            start_date=Min('issue_date'),
+            end_date=Max('issue_date')
+        )
+        
+        if not summary['count']:
             return {
                 'count': 0,
                 'total_amount': '0.00',
                 'date_range': 'No invoices'
             }
         
-        total_amount = sum(invoice.total_amount for invoice in invoices)
-        start_date = invoices.first().issue_date
-        end_date = invoices.last().issue_date
-        
         return {
-            'count': invoices.count(),
-            'total_amount': f"{total_amount:.2f}",
-            'date_range': f"{start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}"
+            'count': summary['count'],
+            'total_amount': f"{summary['total_amount']:.2f}",
+            'date_range': f"{summary['start_date'].strftime('%d/%m/%Y')} - {summary['end_date'].strftime('%d/%m/%Y')}"
         }
 
 
-class BulkPDFService:
-    @staticmethod
-    def generate_bulk_pdfs_zip(invoices, filename_prefix):
-        buffer = io.BytesIO()
-        success_count = 0
-        error_count = 0
+class InvoicePDFService:
+    RENDERER_VERSION = 1
+    
+    INVOICE_FIELDS = [
+        'reference', 'issue_date', 'client_type', 'client_name', 'client_abn',
+        'client_address', 'payment_terms',
+    ]
+    ITEM_FIELDS = ['description', 'quantity', 'unit_price', 'gst_treatment']
+    COMPANY_FIELDS = [
+        'legal_form', 'business_name', 'legal_name', 'abn', 'acn', 'gst_registered',
+        'address', 'postal_code', 'city', 'state', 'phone', 'email', 'website',
+        'bank_name', 'bsb', 'account_number',
+    ]
+    
+    @classmethod
+    def get_fingerprint(cls, invoice):
+        payload = {
+            'renderer': [cls.RENDERER_VERSION, settings.INVOICE_PDF_RENDERER],
+            'invoice': [getattr(invoice, field) for field in cls.INVOICE_FIELDS],
+            'items': [
+                [getattr(item, field) for field in cls.ITEM_FIELDS]
+                for item in sorted(invoice.items.all(), key=lambda item: item.pk)
+            ],
+            'company': [getattr(invoice.company, field) for field in cls.COMPANY_FIELDS],
+        }
+        serialized = json.dumps(payload, default=str, separators=(',', ':'))
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def get_pdf(cls, invoice):
+        fingerprint = cls.get_fingerprint(invoice)
         
-        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        pdf_content = cls._read_cached_pdf(invoice, fingerprint)
+        if pdf_content is None:
+            pdf_content = generate_invoice_pdf(invoice)
+            cls._store_pdf(invoice, pdf_content, fingerprint)
+        return pdf_content
+    
+    @classmethod
+    def iter_pdfs(cls, invoices, workers=0):
+        if workers <= 1:
             for invoice in invoices:
                 try:
-                    pdf_content = generate_invoice_pdf(invoice)
-                    pdf_filename = f"{invoice.reference or f'draft_{invoice.id}'}.pdf"
-                    zip_file.writestr(pdf_filename, pdf_content)
-                    success_count += 1
-                    logger.info(f"PDF added to ZIP: {pdf_filename}")
+                    yield invoice, cls.get_pdf(invoice)
                 except Exception as e:
-                    error_count += 1
                     logger.error(f"Error generating PDF for invoice {invoice.id}: {str(e)}")
-                    continue
+                    yield invoice, None
+            return
         
-        zip_content = buffer.getvalue()
-        buffer.close()
+        # Workers are spawned rather than forked so they never inherit the
+        # parent's database connection; they only receive plain render data.
+        renderer = get_invoice_renderer()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            # Only 2 * workers invoices are planned ahead of the one being
+            # yielded, so renders that finish early are bounded in memory
+            # and a slow consumer holds back submission.
+            window = deque()
+            try:
+                for invoice in invoices:
+                    window.append(cls._submit_pdf(executor, renderer, invoice))
+                    if len(window) >= 2 * workers:
+                        yield cls._collect_pdf(*window.popleft())
+                while window:
+                    yield cls._collect_pdf(*window.popleft())
+            finally:
+                for _, _, future in window:
+                    if future:
+                        future.cancel()
+    
+    @classmethod
+    def _submit_pdf(cls, executor, renderer, invoice):
+        try:
+            fingerprint = cls.get_fingerprint(invoice)
+            future = None
+            if not cls._has_cached_pdf(invoice, fingerprint):
+                future = executor.submit(renderer, build_invoice_render_data(invoice))
+            return invoice, fingerprint, future
+        except Exception as e:
+            logger.error(f"Error preparing PDF data for invoice {invoice.id}: {str(e)}")
+            return invoice, None, None
+    
+    @classmethod
+    def _collect_pdf(cls, invoice, fingerprint, future):
+        if fingerprint is None:
+            return invoice, None
+        try:
+            pdf_content = cls._read_cached_pdf(invoice, fingerprint) if future is None else None
+            if pdf_content is None:
+                pdf_content = future.result() if future else generate_invoice_pdf(invoice)
+                cls._store_pdf(invoice, pdf_content, fingerprint)
+            return invoice, pdf_content
+        except Exception as e:
+            logger.error(f"Error generating PDF for invoice {invoice.id}: {str(e)}")
+            return invoice, None
+    
+    @staticmethod
+    def _has_cached_pdf(invoice, fingerprint):
+        return bool(invoice.pdf_file) and invoice.pdf_fingerprint == fingerprint
+    
+    @classmethod
+    def _read_cached_pdf(cls, invoice, fingerprint):
+        if not cls._has_cached_pdf(invoice, fingerprint):
+            return None
+        try:
+            with invoice.pdf_file.open('rb') as pdf_file:
+                return pdf_file.read()
+        except FileNotFoundError:
+            logger.warning(f"Cached PDF missing for invoice {invoice.id}, re-rendering")
+            return None
+    
+    @staticmethod
+    def _store_pdf(invoice, pdf_content, fingerprint):
+        stale_name = invoice.pdf_file.name if invoice.pdf_file else None
+        reference = (invoice.reference or f'draft_{invoice.id}').replace('/', '-')
         
-        if success_count == 0:
+        invoice.pdf_file.save(f"{reference}_{fingerprint[:12]}.pdf", ContentFile(pdf_content), save=False)
+        invoice.pdf_fingerprint = fingerprint
+        Invoice.objects.filter(pk=invoice.pk).update(
+            pdf_file=invoice.pdf_file.name,
+            pdf_fingerprint=fingerprint
+        )
+        
+        if stale_name and stale_name != invoice.pdf_file.name:
+            invoice.pdf_file.storage.delete(stale_name)
+
+
+class InvoicePDFQueue:
+    MAX_ATTEMPTS = 5
+    BACKOFF_SECONDS = 30
+    LEASE_SECONDS = 300
+    
+    @classmethod
+    def enqueue_on_commit(cls, invoice_ids):
+        invoice_ids = list(invoice_ids)
+        if invoice_ids:
+            transaction.on_commit(lambda: InvoicePDFJob.enqueue(invoice_ids))
+    
+    @classmethod
+    def claim(cls, batch_size=10):
+        now = timezone.now()
+        stale_before = now - timedelta(seconds=cls.LEASE_SECONDS)
+        with transaction.atomic():
+            jobs = list(
+                InvoicePDFJob.objects.claimable(stale_before)
+                .select_for_update(skip_locked=True)
+                .order_by('run_after')[:batch_size]
+            )
+            InvoicePDFJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status='RUNNING',
+                claimed_at=now
+            )
+        return jobs
+    
+    @classmethod
+    def run_batch(cls, batch_size=10):
+        jobs = cls.claim(batch_size)
+        invoices = Invoice.objects.select_related('company').prefetch_related('items').in_bulk(
+            [job.invoice_id for job in jobs]
+        )
+        
+        results = {'done': 0, 'retried': 0, 'failed': 0}
+        for job in jobs:
+            try:
+                InvoicePDFService.get_pdf(invoices[job.invoice_id])
+            except Exception as e:
+                logger.error(f"Error pre-rendering PDF for invoice {job.invoice_id}: {str(e)}")
+                results[cls._record_failure(job, e)] += 1
+            else:
+                InvoicePDFJob.objects.filter(pk=job.pk, status='RUNNING').update(status='DONE', last_error='')
+                results['done'] += 1
+        return results
+    
+    @classmethod
+    def _record_failure(cls, job, error):
+        attempts = job.attempts + 1
+        if attempts >= cls.MAX_ATTEMPTS:
+            status = 'FAILED'
+            run_after = timezone.now()
+            outcome = 'failed'
+        else:
+            status = 'PENDING'
+            run_after = timezone.now() + timedelta(seconds=cls.BACKOFF_SECONDS * 2 ** (attempts - 1))
+            outcome = 'retried'
+        InvoicePDFJob.objects.filter(pk=job.pk, status='RUNNING').update(
+            status=status,
+            attempts=attempts,
+            run_after=run_after,
+            claimed_at=None,
+            last_error=str(error)
+        )
+        return outcome
+
+
+class ZipStreamSink(io.RawIOBase):
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self._position
+    
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class BulkPDFArchive:
+    def __init__(self, invoices, workers=None):
+        if workers is None:
+            workers = settings.INVOICE_PDF_WORKERS
+        self.success_count = 0
+        self.error_count = 0
+        self.failed_references = []
+        self._entries = self._iter_entries(invoices, workers)
+        self._first_entry = None
+    
+    def _iter_entries(self, invoices, workers):
+        for invoice, pdf_content in InvoicePDFService.iter_pdfs(invoices, workers=workers):
+            name = invoice.reference or f'draft_{invoice.id}'
+            if pdf_content is None:
+                self.error_count += 1
+                self.failed_references.append(name)
+                continue
+            self.success_count += 1
+            yield f"{name}.pdf", pdf_content
+    
+    def prime(self):
+        self._first_entry = next(self._entries, None)
+        return self._first_entry is not None
+    
+    def stream(self):
+        sink = ZipStreamSink()
+        entries = self._entries
+        if self._first_entry:
+            entries = itertools.chain([self._first_entry], entries)
+        
+        with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for pdf_filename, pdf_content in entries:
+                zip_file.writestr(pdf_filename, pdf_content)
+                logger.info(f"PDF added to ZIP: {pdf_filename}")
+                yield sink.drain()
+            # The download has already started, so failures are reported
+            # inside the archive rather than as a page message.
+            if self.failed_references:
+                zip_file.writestr('ERRORS.txt', self._errors_text())
+        yield sink.drain()
+        
+        logger.info(f"ZIP stream complete: {self.success_count} PDFs, {self.error_count} errors")
+    
+    def _errors_text(self):
+        lines = [f"{self.error_count} invoice PDF(s) could not be generated and are missing from this archive:", '']
+        lines.extend(self.failed_references)
+        return '\n'.join(lines) + '\n'
+
+
+class BulkPDFService:
+    @staticmethod
+    def generate_bulk_pdfs_zip(invoices, filename_prefix, workers=None):
+        archive = BulkPDFArchive(invoices, workers=workers)
+        
+        if not archive.prime():
             logger.warning("No PDFs generated for ZIP file")
-            return None, 0, error_count
+            return None, 0, archive.error_count
         
-        return zip_content, success_count, error_count
+        zip_content = b''.join(archive.stream())
+        return zip_content, archive.success_count, archive.error_count
     
     @staticmethod
     def create_zip_response(zip_content, filename):
         response = HttpResponse(zip_content, content_type='application/zip')
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
+    
+    @staticmethod
+    def create_streaming_zip_response(archive, filename):
+        response = StreamingHttpResponse(archive.stream(), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -0,0 +1,164 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .aging_service import ARAgingService
+from apps.accounting.models import Income
+
+from .models import BAS_REPORTABLE_STATUSES, Client, Company, Invoice, InvoiceItem
+from .services import InvoicePDFQueue, InvoicePDFService
+
+INVOICE_CLIENT_FIELDS = ('client_name', 'client_abn', 'client_type', 'client_address')
+INVOICE_STATS_FIELDS = ('client_id', 'status', 'grand_total', 'issue_date')
+INCOME_CLIENT_FIELDS = ('client_name',)
+INCOME_STATS_FIELDS = ('client_id', 'amount')
+
+_stale_clients = threading.local()
+
+
+def refresh_client_stats_on_commit(client_ids=(), invoice_ids=()):
+    # Writes queue their clients here and one UPDATE refreshes them all when
+    # the transaction commits. Every write registers the flush, because
+    # callbacks from a rolled back savepoint are dropped; once the first one
+    # has run, the rest find nothing queued.
+    if not hasattr(_stale_clients, 'client_ids'):
+        _stale_clients.client_ids, _stale_clients.invoice_ids = set(), set()
+    _stale_clients.client_ids.update(client_ids)
+    _stale_clients.invoice_ids.update(invoice_ids)
+    transaction.on_commit(flush_client_stats)
+
+
+def flush_client_stats():
+    client_ids = getattr(_stale_clients, 'client_ids', set())
+    invoice_ids = getattr(_stale_clients, 'invoice_ids', set())
+    _stale_clients.client_ids, _stale_clients.invoice_ids = set(), set()
+    if invoice_ids:
+        client_ids |= set(Invoice.objects.filter(pk__in=invoice_ids).values_list('client_id', flat=True))
+    client_ids -= {None}
+    if client_ids:
+        Client.objects.filter(pk__in=client_ids).refresh_stats()
+
+
+def changed_fields(instance, fields):
+    # Fields whose saved value differs from the instance; all of them for a
+    # new row.
+    previous = type(instance).objects.filter(pk=instance.pk).values(*fields).first() if instance.pk else None
+    if previous is None:
+        return set(fields), {}
+    return {field for field in fields if previous[field] != getattr(instance, field)}, previous
+
+
+@receiver(post_save, sender=InvoiceItem)
+@receiver(post_delete, sender=InvoiceItem)
+def refresh_invoice_totals(sender, instance, **kwargs):
+    origin = kwargs.get('origin')
+    if isinstance(origin, Invoice) or getattr(origin, 'model', None) is Invoice:
+        return
+
+    if InvoiceItem.invoice.is_cached(instance):
+        instance.invoice.refresh_totals()
+    else:
+        Invoice(pk=instance.invoice_id).refresh_totals()
+    refresh_client_stats_on_commit(invoice_ids=[instance.invoice_id])
+
+
+@receiver(pre_save, sender=Invoice)
+def detect_invoice_finalisation(sender, instance, raw=False, **kwargs):
+    instance._prerender_pdf = False
+    if raw or instance.status not in BAS_REPORTABLE_STATUSES:
+        return
+
+    if instance.pk is None:
+        instance._prerender_pdf = True
+    else:
+        previous_status = Invoice.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        instance._prerender_pdf = previous_status in (None, 'DRAFT')
+
+
+@receiver(post_save, sender=Invoice)
+def queue_invoice_pdf(sender, instance, **kwargs):
+    if getattr(instance, '_prerender_pdf', False):
+        instance._prerender_pdf = False
+        InvoicePDFQueue.enqueue_on_commit([instance.pk])
+
+
+@receiver(pre_save, sender=Company)
+def detect_company_pdf_changes(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._requeue_pdfs = False
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(InvoicePDFService.COMPANY_FIELDS):
+        return
+
+    previous = Company.objects.filter(pk=instance.pk).values(*InvoicePDFService.COMPANY_FIELDS).first()
+    instance._requeue_pdfs = previous is not None and any(
+        previous[field] != getattr(instance, field) for field in InvoicePDFService.COMPANY_FIELDS
+    )
+
+
+@receiver(post_save, sender=Company)
+def requeue_company_pdfs(sender, instance, **kwargs):
+    if getattr(instance, '_requeue_pdfs', False):
+        instance._requeue_pdfs = False
+        InvoicePDFQueue.enqueue_on_commit(
+            instance.invoice_set.filter(status__in=BAS_REPORTABLE_STATUSES).values_list('pk', flat=True)
+        )
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def invalidate_aging_report(sender, instance, **kwargs):
+    transaction.on_commit(ARAgingService.invalidate)
+
+
+@receiver(pre_save, sender=Invoice)
+def assign_invoice_client(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._stale_client_ids = set()
+    if raw:
+        return
+    if update_fields is not None:
+        if set(update_fields) & set(INVOICE_STATS_FIELDS):
+            instance._stale_client_ids = {instance.client_id}
+        return
+
+    changed, previous = changed_fields(instance, INVOICE_CLIENT_FIELDS + INVOICE_STATS_FIELDS)
+    if instance.client_id is None or changed & set(INVOICE_CLIENT_FIELDS):
+        instance.client = Client.objects.resolve(
+            instance.client_name, instance.client_abn, instance.client_type, instance.client_address
+        )
+    if changed & set(INVOICE_STATS_FIELDS) or instance.client_id != previous.get('client_id'):
+        instance._stale_client_ids = {instance.client_id, previous.get('client_id')}
+
+
+@receiver(pre_save, sender=Income)
+def assign_income_client(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._stale_client_ids = set()
+    if raw:
+        return
+    if update_fields is not None:
+        if set(update_fields) & set(INCOME_STATS_FIELDS):
+            instance._stale_client_ids = {instance.client_id}
+        return
+
+    changed, previous = changed_fields(instance, INCOME_CLIENT_FIELDS + INCOME_STATS_FIELDS)
+    if instance.client_id is None or changed & set(INCOME_CLIENT_FIELDS):
+        instance.client = Client.objects.resolve(instance.client_name)
+    if changed & set(INCOME_STATS_FIELDS) or instance.client_id != previous.get('client_id'):
+        instance._stale_client_ids = {instance.client_id, previous.get('client_id')}
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=Income)
+def refresh_client_stats(sender, instance, **kwargs):
+    client_ids = getattr(instance, '_stale_client_ids', set()) - {None}
+    if client_ids:
+        refresh_client_stats_on_commit(client_ids)
+
+
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=Income)
+def refresh_deleted_client_stats(sender, instance, **kwargs):
+    if instance.client_id:
+        refresh_client_stats_on_commit([instance.client_id])
@@ -0,0 +1,860 @@
+import io
+import json
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from datetime import date
+
+from apps.accounting.models import Income
+from apps.invoicing import services, utils
+from apps.invoicing.aging_service import ARAgingService
+from apps.invoicing.bas_service import BASReportingService
+from apps.invoicing.import_service import InvoiceImportService
+from apps.invoicing.models import (
+    BankStatementLine, BASPeriodSnapshot, Client, ClientQuerySet, Company, Invoice, InvoiceItem, InvoicePDFJob,
+    InvoiceReferenceCounter, RecurringInvoiceTemplate
+)
+from apps.invoicing.reconciliation_service import BankReconciliationService
+from apps.invoicing.recurring_service import RecurringInvoiceService
+from apps.invoicing.search_service import InvoiceSearchService
+from apps.invoicing.services import BulkPDFService
+from apps.invoicing.utils import build_invoice_render_data
+
+
+def create_company(**overrides):
+    data = {
+        'legal_form': 'PTY_LTD',
+        'business_name': 'Westforce Removals Company',
+        'legal_name': 'Westforce Removals Company Pty Ltd',
+        'abn': '51824753556',
+        'acn': '123456789',
+        'gst_registered': True,
+        'address': 'Unit 5, 123 Industrial Drive',
+        'postal_code': '6105',
+        'city': 'Kewdale',
+        'state': 'WA',
+        'bank_name': 'Commonwealth Bank',
+        'bsb': '066-123',
+        'account_number': '12345678',
+        'invoice_prefix': 'WF',
+    }
+    data.update(overrides)
+    return Company.objects.create(**data)
+
+
+def create_invoice(company, items=(), **overrides):
+    data = {
+        'company': company,
+        'issue_date': date(2025, 3, 10),
+        'client_type': 'INDIVIDUAL',
+        'client_name': 'John Smith',
+        'client_address': '123 Main St, East Perth WA 6004',
+        'status': 'SENT',
+    }
+    data.update(overrides)
+    invoice = Invoice.objects.create(**data)
+    for quantity, unit_price, gst_treatment in items:
+        InvoiceItem.objects.create(
+            invoice=invoice,
+            description='Removal service',
+            quantity=quantity,
+            unit_price=Decimal(unit_price),
+            gst_treatment=gst_treatment
+        )
+    return invoice
+
+
+class TempMediaRootMixin:
+    """Stores rendered PDFs in a temporary MEDIA_ROOT removed after each test."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class InvoiceStoredTotalsTestCase(TestCase):
+    def setUp(self):
+        self.company = create_company()
+
+    def test_totals_follow_item_changes(self):
+        invoice = create_invoice(self.company, items=[
+            (2, '100.00', 'TAXABLE'),
+            (1, '50.00', 'GST_FREE'),
+        ])
+
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.subtotal_ex_gst, Decimal('250.00'))
+        self.assertEqual(invoice.gst_total, Decimal('20.00'))
+        self.assertEqual(invoice.grand_total, Decimal('270.00'))
+
+        item = invoice.items.get(gst_treatment='TAXABLE')
+        item.quantity = 3
+        item.save()
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.grand_total, Decimal('380.00'))
+
+        item.delete()
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.grand_total, Decimal('50.00'))
+        self.assertEqual(invoice.gst_total, Decimal('0.00'))
+
+    def test_full_save_does_not_overwrite_totals_with_stale_values(self):
+        invoice = create_invoice(self.company, items=[(1, '100.00', 'TAXABLE')])
+        stale = Invoice.objects.get(pk=invoice.pk)
+        InvoiceItem.objects.create(invoice=invoice, description='Packing', unit_price=Decimal('20.00'))
+
+        stale.notes = 'Updated'
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.grand_total, Decimal('132.00'))
+
+
+class InvoiceReferenceCounterTestCase(TestCase):
+    def setUp(self):
+        self.company = create_company()
+
+    def test_references_are_numbered_per_prefix_and_year(self):
+        first = create_invoice(self.company)
+        second = create_invoice(self.company)
+        next_year = create_invoice(self.company, issue_date=date(2026, 1, 5))
+        draft = create_invoice(self.company, status='DRAFT')
+
+        self.assertEqual([first.reference, second.reference], ['WF0001/25', 'WF0002/25'])
+        self.assertEqual(next_year.reference, 'WF0001/26')
+        self.assertIsNone(draft.reference)
+
+    def test_block_allocation_continues_after_existing_references(self):
+        create_invoice(self.company, reference='WF0041/25')
+        create_invoice(self.company, reference='WFX0099/25')
+
+        self.assertEqual(
+            InvoiceReferenceCounter.allocate('WF', 2025, count=3),
+            ['WF0042/25', 'WF0043/25', 'WF0044/25']
+        )
+        self.assertEqual(create_invoice(self.company).reference, 'WF0045/25')
+
+
+    def test_rolled_back_allocation_leaves_no_gap(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                create_invoice(self.company)
+                raise RuntimeError('rollback')
+
+        self.assertEqual(create_invoice(self.company).reference, 'WF0001/25')
+
+    def test_deferred_reference_is_assigned_when_finalised(self):
+        invoice = Invoice(company=self.company, issue_date=date(2025, 3, 10), client_type='INDIVIDUAL', client_name='John Smith', status='SENT')
+        invoice.save(defer_reference=True)
+        self.assertIsNone(invoice.reference)
+
+        invoice.finalise_reference()
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.reference, 'WF0001/25')
+        self.assertTrue(invoice.payment_reference)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'SQLite serialises all writers, so saves cannot overlap')
+class InvoiceReferenceContentionTestCase(TransactionTestCase):
+    def test_open_invoice_transaction_does_not_hold_the_counter(self):
+        company = create_company()
+        saved = threading.Event()
+        release = threading.Event()
+
+        def save_and_hold():
+            # The create view's order: save without a reference, write the
+            # items, and allocate only as the last statement.
+            try:
+                with transaction.atomic():
+                    invoice = Invoice(
+                        company=company, issue_date=date(2025, 3, 10), client_type='INDIVIDUAL', client_name='Slow', status='SENT'
+                    )
+                    invoice.save(defer_reference=True)
+                    InvoiceItem.objects.create(invoice=invoice, description='Removal', unit_price=Decimal('10.00'))
+                    saved.set()
+                    release.wait(10)
+                    invoice.finalise_reference()
+                return invoice.reference
+            finally:
+                connection.close()
+
+        def save_in_transaction():
+            try:
+                with transaction.atomic():
+                    return create_invoice(company, client_name='Fast').reference
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            slow = executor.submit(save_and_hold)
+            self.assertTrue(saved.wait(5))
+            try:
+                fast = executor.submit(save_in_transaction).result(timeout=5)
+            finally:
+                release.set()
+            self.assertEqual([fast, slow.result()], ['WF0001/25', 'WF0002/25'])
+
+
+class InvoiceOverdueTestCase(TestCase):
+    def setUp(self):
+        company = create_company()
+        self.past_due = create_invoice(company, issue_date=date(2025, 1, 1), payment_terms='Payment due within 7 days')
+        self.current = create_invoice(company, issue_date=date(2025, 3, 1), payment_terms='Payment due within 30 days')
+        self.paid = create_invoice(company, issue_date=date(2025, 1, 1), status='PAID')
+        Invoice.objects.filter(pk__in=[self.past_due.pk, self.current.pk]).update(status='SENT')
+
+    def test_overdue_queryset_includes_unswept_invoices(self):
+        today = date(2025, 3, 15)
+        self.assertEqual(list(Invoice.objects.overdue(today)), [self.past_due])
+
+    def test_row_check_agrees_with_the_overdue_queryset(self):
+        # Near midnight the server's date and the local date differ; both
+        # checks use the local date.
+        for today in (date(2025, 1, 8), date(2025, 1, 9), date(2025, 3, 15)):
+            with mock.patch.object(timezone, 'localdate', return_value=today):
+                overdue = set(Invoice.objects.overdue().values_list('pk', flat=True))
+                flagged = {invoice.pk for invoice in Invoice.objects.all() if invoice.is_overdue()}
+            self.assertEqual(flagged, overdue)
+
+    def test_sweep_marks_past_due_invoices_in_one_update(self):
+        today = date(2025, 3, 15)
+        with self.assertNumQueries(1):
+            self.assertEqual(Invoice.objects.sweep_overdue(today), 1)
+
+        self.assertEqual(
+            dict(Invoice.objects.values_list('pk', 'status')),
+            {self.past_due.pk: 'OVERDUE', self.current.pk: 'SENT', self.paid.pk: 'PAID'}
+        )
+        self.assertEqual(list(Invoice.objects.overdue(today)), [self.past_due])
+
+
+class InvoiceTotalPropertiesTestCase(TestCase):
+    def setUp(self):
+        self.company = create_company()
+        create_invoice(self.company, items=[(3, '33.33', 'TAXABLE'), (1, '20.00', 'INPUT_TAXED')])
+        create_invoice(self.company, items=[(1, '12.25', 'TAXABLE')])
+        create_invoice(self.company, items=[(2, '15.50', 'GST_FREE')])
+
+    def test_properties_match_the_stored_columns(self):
+        for invoice in Invoice.objects.all():
+            self.assertEqual(
+                (invoice.subtotal, invoice.gst_amount, invoice.total_amount),
+                (invoice.subtotal_ex_gst, invoice.gst_total, invoice.grand_total)
+            )
+
+        # GST is rounded half up once per invoice, not summed per line.
+        invoice = Invoice.objects.get(subtotal_ex_gst=Decimal('12.25'))
+        self.assertEqual((invoice.gst_amount, invoice.total_amount), (Decimal('1.23'), Decimal('13.48')))
+
+    def test_totals_are_read_in_a_single_query(self):
+        with self.assertNumQueries(1):
+            totals = [invoice.total_amount for invoice in Invoice.objects.all()]
+        self.assertEqual(len(totals), 3)
+
+    def test_unsaved_invoice_has_zero_totals(self):
+        invoice = Invoice(company=self.company, client_name='John Smith')
+        self.assertEqual((invoice.subtotal, invoice.gst_amount, invoice.total_amount), (0, 0, 0))
+
+
+class BASReportingServiceTestCase(TestCase):
+    def setUp(self):
+        self.company = create_company()
+        create_invoice(self.company, items=[(3, '33.33', 'TAXABLE')])
+        create_invoice(self.company, items=[(1, '100.00', 'TAXABLE'), (2, '25.00', 'GST_FREE')])
+        create_invoice(self.company, items=[(1, '40.00', 'INPUT_TAXED')], status='PAID')
+        create_invoice(self.company, items=[(1, '999.00', 'TAXABLE')], status='DRAFT')
+        create_invoice(self.company, items=[(1, '500.00', 'TAXABLE')], issue_date=date(2025, 4, 1))
+
+    def test_open_quarter_is_a_single_aggregate_query(self):
+        # One snapshot lookup plus the aggregate itself
+        with self.assertNumQueries(2):
+            report = BASReportingService.get_quarterly_gst_report(2025, 1)
+
+        self.assertEqual(report['invoice_count'], 3)
+        self.assertEqual(report['1A_gst_on_sales'], Decimal('19.999'))
+        self.assertEqual(report['G1_total_sales_inc_gst'], Decimal('309.989'))
+        self.assertEqual(report['G3_gst_free_sales'], Decimal('50.00'))
+        self.assertEqual(report['G4_input_taxed_sales'], Decimal('40.00'))
+        self.assertEqual(report['taxable_sales_ex_gst'], Decimal('99.99'))
+        self.assertEqual(report['total_sales_ex_gst'], Decimal('189.99'))
+
+    def test_annual_summary_buckets_in_a_single_grouped_query(self):
+        with self.assertNumQueries(2):
+            summary = BASReportingService.get_annual_gst_summary(2025)
+
+        self.assertEqual(len(summary['quarterly_breakdown']), 4)
+        self.assertEqual(len(summary['monthly_breakdown']), 12)
+        self.assertEqual(summary['quarterly_breakdown'], [
+            BASReportingService.get_quarterly_gst_report(2025, quarter) for quarter in range(1, 5)
+        ])
+        self.assertEqual(summary['total_invoice_count'], 4)
+        self.assertEqual(summary['G1_total_sales_inc_gst'], Decimal('859.989'))
+
+
+class BASPeriodSnapshotTestCase(TestCase):
+    def setUp(self):
+        self.service = BASReportingService
+        self.company = create_company()
+        self.invoice = create_invoice(self.company, items=[(1, '100.00', 'TAXABLE')])
+        self.live_report = self.service.get_quarterly_gst_report(2025, 1)
+        self.service.close_period(2025, quarter=1)
+
+    def test_closed_period_is_served_from_snapshot(self):
+        # Saved without full_clean, so nothing stops it landing in the closed quarter.
+        create_invoice(self.company, items=[(1, '500.00', 'TAXABLE')], issue_date=date(2025, 2, 1), status='SENT')
+        live = self.service._build_period_report(
+            'quarterly', 'Q1 2025', date(2025, 1, 1), date(2025, 3, 31), use_snapshot=False
+        )
+        self.assertEqual(live['invoice_count'], 2)
+
+        with self.assertNumQueries(1):
+            report = self.service.get_quarterly_gst_report(2025, 1)
+
+        self.assertTrue(report['is_closed'])
+        self.assertEqual(report['invoice_count'], 1)
+        for key, value in self.live_report.items():
+            self.assertEqual(report[key], value)
+
+    def test_closed_year_keeps_its_monthly_breakdown(self):
+        for quarter in range(2, 5):
+            self.service.close_period(2025, quarter=quarter)
+
+        summary = self.service.get_annual_gst_summary(2025)
+        self.assertTrue(all(report['is_closed'] for report in summary['quarterly_breakdown']))
+        self.assertEqual(len(summary['monthly_breakdown']), 12)
+        self.assertEqual([report['invoice_count'] for report in summary['monthly_breakdown']][:4], [0, 0, 1, 0])
+
+    def test_malformed_year_is_reported_instead_of_failing(self):
+        user = get_user_model().objects.create_user(username='owner', password='secret', email='owner@example.com')
+        self.client.force_login(user)
+        response = self.client.post(reverse('invoicing:bas_close_period'), {'type': 'quarterly', 'year': '20x5', 'quarter': '2'})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(BASPeriodSnapshot.objects.filter(start_date=date(2025, 4, 1)).exists())
+
+    def test_closing_a_period_twice_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            self.service.close_period(2025, quarter=1)
+
+    def test_invoice_edits_in_closed_period_are_rejected(self):
+        self.invoice.issue_date = date(2025, 4, 2)
+        with self.assertRaises(ValidationError):
+            self.invoice.full_clean()
+
+        backdated = Invoice(
+            company=self.company,
+            issue_date=date(2025, 2, 1),
+            client_type='INDIVIDUAL',
+            client_name='Jane Doe',
+            client_address='1 Hay St, Perth WA 6000',
+            status='SENT'
+        )
+        with self.assertRaises(ValidationError):
+            backdated.full_clean()
+
+        self.invoice.refresh_from_db()
+        self.invoice.status = 'PAID'
+        self.invoice.full_clean()
+
+
+class InvoicePDFCacheTestCase(TempMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        self.invoice = create_invoice(self.company, items=[(1, '100.00', 'TAXABLE')])
+
+    def test_pdf_is_rendered_once_and_reused_until_data_changes(self):
+        with mock.patch.object(services, 'generate_invoice_pdf', return_value=b'%PDF-first') as render:
+            self.assertEqual(services.InvoicePDFService.get_pdf(self.invoice), b'%PDF-first')
+            invoice = Invoice.objects.get(pk=self.invoice.pk)
+            self.assertEqual(services.InvoicePDFService.get_pdf(invoice), b'%PDF-first')
+            self.assertEqual(render.call_count, 1)
+
+            item = invoice.items.get()
+            item.unit_price = Decimal('120.00')
+            item.save()
+            invoice = Invoice.objects.get(pk=self.invoice.pk)
+            render.return_value = b'%PDF-second'
+            self.assertEqual(services.InvoicePDFService.get_pdf(invoice), b'%PDF-second')
+            self.assertEqual(render.call_count, 2)
+
+
+class InvoicePDFQueueTestCase(TempMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        self.invoice = create_invoice(self.company, items=[(1, '100.00', 'TAXABLE')], status='DRAFT')
+
+    def test_leaving_draft_queues_a_render_that_the_worker_completes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.invoice.save()
+        self.assertFalse(InvoicePDFJob.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.invoice.status = 'SENT'
+            self.invoice.save()
+        job = InvoicePDFJob.objects.get(invoice=self.invoice)
+        self.assertEqual(job.status, 'PENDING')
+
+        with mock.patch.object(services, 'generate_invoice_pdf', return_value=b'%PDF-queued'):
+            self.assertEqual(services.InvoicePDFQueue.run_batch(), {'done': 1, 'retried': 0, 'failed': 0})
+
+        job.refresh_from_db()
+        self.invoice.refresh_from_db()
+        self.assertEqual(job.status, 'DONE')
+        self.assertTrue(self.invoice.pdf_fingerprint)
+
+    def test_failed_renders_back_off_and_give_up(self):
+        InvoicePDFJob.enqueue([self.invoice.pk])
+        queue = services.InvoicePDFQueue
+
+        with mock.patch.object(services, 'generate_invoice_pdf', side_effect=RuntimeError('boom')):
+            self.assertEqual(queue.run_batch(), {'done': 0, 'retried': 1, 'failed': 0})
+            job = InvoicePDFJob.objects.get()
+            self.assertEqual((job.status, job.attempts, job.last_error), ('PENDING', 1, 'boom'))
+            self.assertGreater(job.run_after, timezone.now())
+            self.assertEqual(queue.run_batch(), {'done': 0, 'retried': 0, 'failed': 0})
+
+            InvoicePDFJob.objects.update(attempts=queue.MAX_ATTEMPTS - 1, run_after=timezone.now())
+            self.assertEqual(queue.run_batch(), {'done': 0, 'retried': 0, 'failed': 1})
+
+        self.assertEqual(InvoicePDFJob.objects.get().status, 'FAILED')
+
+    def test_company_changes_requeue_only_when_printed_details_change(self):
+        sent = create_invoice(self.company, items=[(1, '50.00', 'TAXABLE')])
+        InvoicePDFJob.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.invoice_prefix = 'WFR'
+            self.company.save()
+        self.assertFalse(InvoicePDFJob.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.phone = '08 9000 1234'
+            self.company.save()
+        self.assertEqual(list(InvoicePDFJob.objects.values_list('invoice_id', flat=True)), [sent.pk])
+
+
+class BulkPDFServiceTestCase(TempMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        company = create_company()
+        for day in range(1, 6):
+            create_invoice(company, items=[(day, '80.00', 'TAXABLE')], issue_date=date(2025, 3, day))
+
+    def test_parallel_rendering_keeps_invoice_order(self):
+        invoices = Invoice.objects.select_related('company').prefetch_related('items').order_by('issue_date')
+        zip_content, success_count, error_count = BulkPDFService.generate_bulk_pdfs_zip(invoices, 'test', workers=2)
+
+        self.assertEqual((success_count, error_count), (5, 0))
+        self.assertEqual(
+            zipfile.ZipFile(io.BytesIO(zip_content)).namelist(),
+            [f'{invoice.reference}.pdf' for invoice in invoices]
+        )
+
+    def test_failed_renders_are_listed_in_the_archive(self):
+        invoices = list(Invoice.objects.select_related('company').prefetch_related('items').order_by('issue_date'))
+        broken = invoices[2]
+
+        def render(invoice):
+            if invoice.pk == broken.pk:
+                raise RuntimeError('boom')
+            return b'%PDF-ok'
+
+        with mock.patch.object(services, 'generate_invoice_pdf', side_effect=render), \
+                self.assertLogs('apps.invoicing.services', 'ERROR'):
+            zip_content, success_count, error_count = services.BulkPDFService.generate_bulk_pdfs_zip(
+                invoices, 'test', workers=0
+            )
+
+        self.assertEqual((success_count, error_count), (4, 1))
+        archive = zipfile.ZipFile(io.BytesIO(zip_content))
+        self.assertEqual(archive.namelist()[-1], 'ERRORS.txt')
+        self.assertIn(broken.reference, archive.read('ERRORS.txt').decode())
+        self.assertNotIn(f'{broken.reference}.pdf', archive.namelist())
+
+    def test_archive_keeps_a_bounded_number_of_renders_in_flight(self):
+        in_flight = set()
+        submitted = []
+        peak = 0
+
+        class Render(Future):
+            # Finished at submission, but held until the archive collects it.
+            def result(self, timeout=None):
+                in_flight.discard(self)
+                return super().result(timeout)
+
+        class RecordingExecutor:
+            def __init__(self, **kwargs):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                return False
+
+            def submit(self, fn, render_data):
+                nonlocal peak
+                future = Render()
+                future.set_result(f"%PDF-{render_data['reference']}".encode())
+                submitted.append(future)
+                in_flight.add(future)
+                peak = max(peak, len(in_flight))
+                return future
+
+        company = Invoice.objects.first().company
+        for day in range(6, 13):
+            create_invoice(company, items=[(1, '80.00', 'TAXABLE')], issue_date=date(2025, 3, day))
+        invoices = Invoice.objects.select_related('company').prefetch_related('items').order_by('issue_date')
+
+        with mock.patch.object(services, 'ProcessPoolExecutor', RecordingExecutor):
+            archive = services.BulkPDFArchive(invoices, workers=2)
+            self.assertTrue(archive.prime())
+            self.assertEqual(len(submitted), 4)
+            zip_content = b''.join(archive.stream())
+
+        self.assertEqual((len(submitted), peak, archive.success_count), (12, 4, 12))
+        self.assertEqual(
+            zipfile.ZipFile(io.BytesIO(zip_content)).namelist(),
+            [f'{invoice.reference}.pdf' for invoice in invoices]
+        )
+
+
+class CanvasInvoiceRendererTestCase(TestCase):
+    def setUp(self):
+        company = create_company()
+        invoice = create_invoice(company, items=[(2, '150.00', 'TAXABLE'), (1, '40.00', 'GST_FREE')])
+        self.render_data = build_invoice_render_data(
+            Invoice.objects.select_related('company').prefetch_related('items').get(pk=invoice.pk)
+        )
+
+    def test_short_invoice_is_drawn_on_a_single_canvas_page(self):
+        with mock.patch.object(utils, 'render_invoice_pdf') as platypus:
+            pdf = utils.render_invoice_pdf_canvas(self.render_data, max_items=3)
+
+        platypus.assert_not_called()
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertEqual(pdf.count(b'/Type /Page\n'), 1)
+
+    def test_long_invoice_falls_back_to_platypus(self):
+        with mock.patch.object(utils, 'render_invoice_pdf', return_value=b'%PDF-platypus') as platypus:
+            self.assertEqual(utils.render_invoice_pdf_canvas(self.render_data, max_items=1), b'%PDF-platypus')
+            self.render_data['items'] = self.render_data['items'] * 40
+            self.assertEqual(utils.render_invoice_pdf_canvas(self.render_data, max_items=100), b'%PDF-platypus')
+
+        self.assertEqual(platypus.call_count, 2)
+
+
+class InvoiceImportServiceTestCase(TestCase):
+    CSV_HEADER = (
+        'invoice_id,issue_date,client_type,client_name,client_abn,client_address,status,'
+        'payment_terms,payment_date,notes,description,quantity,unit_price,gst_treatment\n'
+    )
+
+    def setUp(self):
+        self.company = create_company()
+
+    def test_csv_rows_are_grouped_into_invoices_and_bad_rows_reported(self):
+        csv_content = self.CSV_HEADER + (
+            'J1,2025-03-10,BUSINESS,Acme Pty Ltd,51 824 753 556,1 Hay St,SENT,Payment due within 14 days,,,Truck,2,150.00,TAXABLE\n'
+            'J1,2025-03-10,BUSINESS,Acme Pty Ltd,51 824 753 556,1 Hay St,SENT,Payment due within 14 days,,,Boxes,1,40.00,GST_FREE\n'
+            'J2,2025-03-11,BUSINESS,Bad Abn Co,12345678901,2 Hay St,SENT,,,,Truck,1,100.00,TAXABLE\n'
+            'J3,2025-03-12,INDIVIDUAL,Jane Citizen,,3 Hay St,DRAFT,,,,Packing,1,80.00,TAXABLE\n'
+        )
+        report = InvoiceImportService(self.company).import_stream(io.StringIO(csv_content), 'csv')
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual(report.errors, [{'row': 4, 'errors': ['client_abn: Invalid ABN checksum']}])
+
+        invoice = Invoice.objects.get(client_name='Acme Pty Ltd')
+        self.assertEqual(invoice.reference, 'WF0001/25')
+        self.assertEqual(invoice.client_abn, '51824753556')
+        self.assertEqual(invoice.due_date, date(2025, 3, 24))
+        self.assertEqual(invoice.retention_date, date(2030, 3, 10))
+        self.assertEqual(invoice.items.count(), 2)
+        self.assertEqual(invoice.grand_total, Decimal('370.00'))
+        self.assertIsNone(Invoice.objects.get(client_name='Jane Citizen').reference)
+
+    def test_json_array_is_decoded_incrementally(self):
+        invoices = [
+            {
+                'issue_date': '2025-04-0%d' % day,
+                'client_type': 'INDIVIDUAL',
+                'client_name': f'Client {day}',
+                'client_address': '1 Hay St',
+                'status': 'PAID',
+                'items': [{'description': 'Move', 'quantity': 1, 'unit_price': '99.00'}],
+            }
+            for day in range(1, 6)
+        ]
+        stream = io.StringIO(json.dumps(invoices))
+        service = InvoiceImportService(self.company, chunk_size=2)
+
+        records = list(InvoiceImportService.iter_json(io.StringIO(json.dumps(invoices)), chunk_size=16))
+        self.assertEqual([row for row, _ in records], [1, 2, 3, 4, 5])
+
+        report = service.import_stream(stream, 'json')
+        self.assertEqual((report.created, report.failed), (5, 0))
+        self.assertEqual(
+            list(Invoice.objects.order_by('reference').values_list('reference', flat=True)),
+            ['WF0001/25', 'WF0002/25', 'WF0003/25', 'WF0004/25', 'WF0005/25']
+        )
+
+
+class InvoiceSearchServiceTestCase(TestCase):
+    def setUp(self):
+        company = create_company()
+        self.acme = create_invoice(company, client_type='BUSINESS', client_name='Acme Pty Ltd', client_abn='51824753556')
+        self.smith = create_invoice(company, client_name='John Smith')
+
+    def test_fallback_matches_reference_name_and_abn(self):
+        invoices = Invoice.objects.all()
+        self.assertEqual(list(InvoiceSearchService.search(invoices, 'acme')), [self.acme])
+        self.assertEqual(list(InvoiceSearchService.search(invoices, '753')), [self.acme])
+        self.assertEqual(list(InvoiceSearchService.search(invoices, self.smith.reference)), [self.smith])
+        self.assertEqual(InvoiceSearchService.search(invoices, '  ').count(), 2)
+
+    def test_abn_prefix_is_normalised(self):
+        self.assertEqual(InvoiceSearchService._abn_prefix('51 824 753'), '51824753')
+        self.assertIsNone(InvoiceSearchService._abn_prefix('5'))
+        self.assertIsNone(InvoiceSearchService._abn_prefix('WF0001'))
+
+    @skipUnless(connection.vendor == 'postgresql', 'Trigram matching needs pg_trgm')
+    def test_misspelt_client_name_matches_on_postgresql(self):
+        invoices = Invoice.objects.all()
+        self.assertEqual(list(InvoiceSearchService.search(invoices, 'acmee')), [self.acme])
+        self.assertEqual(list(InvoiceSearchService.search(invoices, 'jon smith')), [self.smith])
+
+
+class BankReconciliationServiceTestCase(TestCase):
+    def setUp(self):
+        company = create_company()
+        self.first = create_invoice(company, items=[(1, '100.00', 'TAXABLE')])
+        self.second = create_invoice(company, client_name='Acme Pty Ltd', items=[(2, '60.00', 'TAXABLE')])
+        self.third = create_invoice(company, client_name='Jane Citizen', items=[(1, '80.00', 'GST_FREE')])
+        Invoice.objects.update(status='SENT')
+        for invoice in (self.first, self.second, self.third):
+            invoice.refresh_from_db()
+
+    def reconcile(self, content, file_format='csv'):
+        return BankReconciliationService().reconcile_stream(io.StringIO(content), file_format, filename='statement')
+
+    def test_csv_lines_are_matched_and_paid_in_bulk(self):
+        content = (
+            'Date,Amount,Description\n'
+            f'03/04/2025,110.00,TRANSFER FROM J SMITH {self.first.reference}\n'
+            f'04/04/2025,"110.00",PAYMENT {self.second.payment_reference}\n'
+            '05/04/2025,-45.00,FUEL\n'
+            '06/04/2025,80.00,DIRECT CREDIT JANE\n'
+            'not a date,10.00,??\n'
+        )
+        report = self.reconcile(content)
+
+        self.assertEqual((report.matched, report.review, report.skipped, report.failed), (1, 2, 1, 1))
+        self.first.refresh_from_db()
+        self.assertEqual((self.first.status, self.first.payment_date), ('PAID', date(2025, 4, 3)))
+
+        review = {line.invoice_id: line.review_note for line in BankStatementLine.objects.filter(status='REVIEW')}
+        self.assertEqual(review[self.second.pk], 'Amount differs from invoice total $132.00')
+        self.assertEqual(review[self.third.pk], 'No reference found; suggested by amount only')
+
+        self.assertEqual(self.reconcile(content).duplicates, 3)
+
+    def test_ofx_transactions_and_review_resolution(self):
+        content = (
+            'OFXHEADER:100\nDATA:OFXSGML\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n'
+            f'<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250407120000<TRNAMT>132.00<FITID>A1'
+            f'<NAME>ACME PTY LTD<MEMO>INV {self.second.reference}</STMTTRN>\n'
+            '<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250408<TRNAMT>80.00<FITID>A2<NAME>J CITIZEN</STMTTRN>\n'
+            '</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n'
+        )
+        report = self.reconcile(content, 'ofx')
+        self.assertEqual((report.matched, report.review), (1, 1))
+
+        with self.assertNumQueries(7):
+            paid = BankReconciliationService.resolve_lines(BankStatementLine.objects.all())
+        self.assertEqual(paid, 1)
+        self.assertEqual(
+            dict(Invoice.objects.values_list('pk', 'payment_date')),
+            {self.first.pk: None, self.second.pk: date(2025, 4, 7), self.third.pk: date(2025, 4, 8)}
+        )
+
+
+class ARAgingServiceTestCase(TestCase):
+    def setUp(self):
+        company = create_company()
+        create_invoice(company, issue_date=date(2025, 3, 1), payment_terms='Payment due within 30 days', items=[(1, '100.00', 'GST_FREE')])
+        create_invoice(company, issue_date=date(2025, 1, 10), payment_terms='Payment due within 7 days', items=[(1, '200.00', 'GST_FREE')])
+        create_invoice(company, client_name='Acme Pty Ltd', issue_date=date(2024, 11, 1), items=[(1, '50.00', 'TAXABLE')])
+        create_invoice(company, client_name='Acme Pty Ltd', status='PAID', items=[(1, '999.00', 'TAXABLE')])
+        Invoice.objects.exclude(status='PAID').update(status='SENT')
+
+    def test_buckets_are_computed_in_one_query(self):
+        with self.assertNumQueries(1):
+            report = ARAgingService.build_report(date(2025, 3, 15))
+
+        john, acme = report['clients']
+        self.assertEqual((john['client_name'], john['invoice_count']), ('John Smith', 2))
+        self.assertEqual((john['current'], john['days_31_60'], john['total']), (Decimal('100.00'), Decimal('200.00'), Decimal('300.00')))
+        self.assertEqual(acme['days_90_plus'], Decimal('55.00'))
+        self.assertEqual(report['totals']['total'], Decimal('355.00'))
+        self.assertEqual(report['totals']['days_1_30'], Decimal('0.00'))
+
+    def test_invoices_issued_after_as_of_are_excluded(self):
+        create_invoice(Invoice.objects.first().company, issue_date=date(2025, 3, 20), items=[(1, '40.00', 'GST_FREE')])
+
+        self.assertEqual(ARAgingService.build_report(date(2025, 3, 15))['totals']['total'], Decimal('355.00'))
+        self.assertEqual(ARAgingService.build_report(date(2025, 3, 20))['totals']['total'], Decimal('395.00'))
+
+    def test_cached_report_is_invalidated_on_payment(self):
+        ARAgingService.invalidate()
+        as_of = date(2025, 3, 15)
+        self.assertEqual(ARAgingService.get_report(as_of)['totals']['total'], Decimal('355.00'))
+        with self.assertNumQueries(0):
+            ARAgingService.get_report(as_of)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Invoice.objects.get(client_name='Acme Pty Ltd', status='SENT').mark_as_paid()
+        self.assertEqual(ARAgingService.get_report(as_of)['totals']['total'], Decimal('300.00'))
+
+
+class ClientStatsTestCase(TestCase):
+    def setUp(self):
+        self.company = create_company()
+
+    def test_clients_are_deduplicated_by_abn_then_name(self):
+        first = create_invoice(self.company, client_type='BUSINESS', client_name='Acme Pty Ltd', client_abn='51 824 753 556')
+        second = create_invoice(self.company, client_type='BUSINESS', client_name='ACME Removals', client_abn='51824753556')
+        third = create_invoice(self.company, client_name='acme')
+        fourth = create_invoice(self.company, client_name='john  smith')
+        fifth = create_invoice(self.company)
+
+        self.assertEqual(first.client_id, second.client_id)
+        self.assertEqual(first.client_id, third.client_id)
+        self.assertEqual(fourth.client_id, fifth.client_id)
+        self.assertEqual(Client.objects.count(), 2)
+
+    def test_stats_follow_invoice_and_income_writes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice = create_invoice(self.company, items=[(1, '100.00', 'TAXABLE')])
+            create_invoice(self.company, status='DRAFT', items=[(1, '500.00', 'TAXABLE')])
+            Income.objects.create(
+                service_type='LOCAL_MOVE', amount=Decimal('40.00'), date=date(2025, 3, 12),
+                payment_method='CARD', client_name='John Smith'
+            )
+
+        client = invoice.client
+        client.refresh_from_db()
+        self.assertEqual((client.invoice_count, client.income_count), (1, 1))
+        self.assertEqual(client.invoice_revenue, Decimal('110.00'))
+        self.assertEqual(client.lifetime_revenue, Decimal('150.00'))
+        self.assertEqual(client.open_balance, Decimal('110.00'))
+        self.assertEqual(client.last_invoice_date, date(2025, 3, 10))
+
+        Invoice.objects.mark_paid({invoice.pk: date(2025, 3, 20)})
+        client.refresh_from_db()
+        self.assertEqual(client.open_balance, Decimal('0.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice.delete()
+        client.refresh_from_db()
+        self.assertEqual((client.invoice_count, client.lifetime_revenue), (0, Decimal('40.00')))
+
+    def test_renamed_invoice_moves_stats_to_new_client(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice = create_invoice(self.company, items=[(1, '100.00', 'GST_FREE')])
+        old_client = invoice.client
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice.client_name = 'Jane Doe'
+            invoice.save()
+        old_client.refresh_from_db()
+        invoice.client.refresh_from_db()
+
+        self.assertEqual(old_client.invoice_count, 0)
+        self.assertEqual((invoice.client.name, invoice.client.invoice_revenue), ('Jane Doe', Decimal('100.00')))
+
+    def test_notes_edit_neither_resolves_nor_refreshes_the_client(self):
+        invoice = create_invoice(self.company, items=[(1, '100.00', 'GST_FREE')])
+
+        invoice.notes = 'Leave keys with the neighbour'
+        with mock.patch.object(Client.objects, 'resolve') as resolve, \
+                self.captureOnCommitCallbacks() as callbacks:
+            invoice.save()
+        resolve.assert_not_called()
+        self.assertFalse([callback for callback in callbacks if callback.__name__ == 'flush_client_stats'])
+
+    def test_item_writes_refresh_the_client_once_per_transaction(self):
+        invoice = create_invoice(self.company)
+
+        with mock.patch.object(ClientQuerySet, 'refresh_stats', autospec=True) as refresh_stats, \
+                self.captureOnCommitCallbacks(execute=True):
+            for price in ('10.00', '20.00', '30.00'):
+                InvoiceItem.objects.create(invoice=invoice, description='Packing', unit_price=Decimal(price))
+        self.assertEqual(refresh_stats.call_count, 1)
+
+
+class RecurringInvoiceServiceTestCase(TestCase):
+    def setUp(self):
+        self.company = create_company()
+        self.template = RecurringInvoiceTemplate.objects.create(
+            company=self.company,
+            name='Storage unit 12',
+            client_type='INDIVIDUAL',
+            client_name='Michael Chen',
+            client_address='12 Kings Park Road, West Perth WA 6005',
+            payment_terms='Payment due within 14 days',
+            start_date=date(2025, 1, 31),
+        )
+        self.template.items.create(description='Storage rental services', quantity=1, unit_price=Decimal('200.00'))
+
+    def generate(self, run_date, **kwargs):
+        return RecurringInvoiceService(run_date=run_date, **kwargs).generate()
+
+    def test_catches_up_missed_periods_with_block_references(self):
+        report = self.generate(date(2025, 3, 31))
+
+        self.assertEqual((report.created, report.templates), (3, 1))
+        invoices = list(Invoice.objects.order_by('issue_date'))
+        self.assertEqual(
+            [invoice.issue_date for invoice in invoices],
+            [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)]
+        )
+        self.assertEqual([invoice.reference for invoice in invoices], ['WF0001/25', 'WF0002/25', 'WF0003/25'])
+        self.assertTrue(all(invoice.grand_total == Decimal('220.00') for invoice in invoices))
+        self.assertEqual(invoices[0].items.get().unit_price, Decimal('200.00'))
+        self.assertEqual(invoices[0].client.invoice_count, 3)
+
+        self.template.refresh_from_db()
+        self.assertEqual(self.template.next_issue_date, date(2025, 4, 30))
+
+    def test_reruns_do_not_duplicate_periods(self):
+        self.generate(date(2025, 2, 28))
+        self.assertEqual(self.generate(date(2025, 2, 28)).created, 0)
+
+        RecurringInvoiceTemplate.objects.update(next_issue_date=date(2025, 1, 31))
+        report = self.generate(date(2025, 3, 31))
+        self.assertEqual((report.created, report.skipped), (1, 2))
+        self.assertEqual(Invoice.objects.count(), 3)
+
+    def test_dry_run_writes_nothing(self):
+        report = self.generate(date(2025, 3, 31), dry_run=True)
+
+        self.assertEqual(report.created, 3)
+        self.assertFalse(Invoice.objects.exists())
+        self.template.refresh_from_db()
+        self.assertEqual(self.template.next_issue_date, date(2025, 1, 31))
@@ -6,6 +6,7 @@ app_name = 'invoicing'
 urlpatterns = [
     path('', views.InvoiceListView.as_view(), name='invoice_list'),
     path('create/', views.InvoiceCreateView.as_view(), name='invoice_create'),
+    path('import/', views.InvoiceImportView.as_view(), name='invoice_import'),
     path('<int:pk>/', views.InvoiceDetailView.as_view(), name='invoice_detail'),
     path('<int:pk>/edit/', views.InvoiceUpdateView.as_view(), name='invoice_edit'),
     path('<int:pk>/pdf/', views.generate_pdf_view, name='invoice_pdf'),
@@ -16,6 +17,9 @@ urlpatterns = [
     
     path('bas/', views.bas_report_view, name='bas_report'),
     path('bas/pdf/', views.bas_pdf_view, name='bas_pdf'),
+    path('bas/close/', views.bas_close_period_view, name='bas_close_period'),
+
+    path('aging/', views.ar_aging_report_view, name='ar_aging'),
     
     path('company/setup/', views.CompanyCreateView.as_view(), name='company_create'),
     path('company/edit/', views.CompanyUpdateView.as_view(), name='company_edit'),
@@ -1,9 +1,13 @@
+from django.conf import settings
 from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm, mm
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_RIGHT, TA_CENTER
+from functools import partial
 from io import BytesIO
 
 
@@ -22,59 +26,99 @@ class PDFStyles:
         }
 
 
+class InvoiceLayout:
+    _compiled = None
+    
+    def __init__(self):
+        self.styles = PDFStyles.get_styles()
+        self.table_styles = {
+            'header': TableStyle([
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ('LEFTPADDING', (0, 0), (-1, -1), 0),
+                ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ]),
+            'client': TableStyle([
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ]),
+            'items': TableStyle([
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+                ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ]),
+            'totals': TableStyle([
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+                ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ]),
+            'final': TableStyle([
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ]),
+        }
+        self.spacers = {height: Spacer(1, height*mm) for height in (5, 8, 10, 12)}
+    
+    @classmethod
+    def get(cls):
+        if cls._compiled is None:
+            cls._compiled = cls()
+        return cls._compiled
+
+
 class InvoiceHeaderBuilder:
     @staticmethod
-    def build(invoice, styles):
-        company_info = InvoiceHeaderBuilder._get_company_info(invoice.company)
+    def build(invoice, layout):
+        company_info = InvoiceHeaderBuilder._get_company_info(invoice['company'])
         invoice_info = InvoiceHeaderBuilder._get_invoice_info(invoice)
         
         header_data = [[
-            Paragraph("<br/>".join(company_info), styles['company']),
-            Paragraph("<br/>".join(invoice_info), styles['invoice_data'])
+            Paragraph("<br/>".join(company_info), layout.styles['company']),
+            Paragraph("<br/>".join(invoice_info), layout.styles['invoice_data'])
         ]]
         
         header_table = Table(header_data, colWidths=[11*cm, 6*cm])
-        header_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ]))
+        header_table.setStyle(layout.table_styles['header'])
         
         return header_table
 
     @staticmethod
     def _get_company_info(company):
-        info = [f"<b>{company.business_name}</b>"]
+        info = [f"<b>{company['business_name']}</b>"]
         
-        if company.legal_name and company.legal_name != company.business_name:
-            info.append(company.legal_name)
+        if company['legal_name'] and company['legal_name'] != company['business_name']:
+            info.append(company['legal_name'])
         
         info.extend([
-            f"ABN: {company.get_formatted_abn()}",
-            f"{company.address}",
-            f"{company.city} {company.state} {company.postal_code}"
+            f"ABN: {company['abn']}",
+            f"{company['address']}",
+            f"{company['city']} {company['state']} {company['postal_code']}"
         ])
         
-        if company.acn:
-            info.append(f"ACN: {company.get_formatted_acn()}")
+        if company['acn']:
+            info.append(f"ACN: {company['acn']}")
         
-        if company.phone:
-            info.append(f"Phone: {company.phone}")
-        if company.email:
-            info.append(f"Email: {company.email}")
-        if company.website:
-            info.append(f"Web: {company.website}")
+        if company['phone']:
+            info.append(f"Phone: {company['phone']}")
+        if company['email']:
+            info.append(f"Email: {company['email']}")
+        if company['website']:
+            info.append(f"Web: {company['website']}")
         
         return info
 
     @staticmethod
     def _get_invoice_info(invoice):
-        title = "<b>TAX INVOICE</b>" if invoice.is_tax_invoice else "<b>INVOICE</b>"
+        title = "<b>TAX INVOICE</b>" if invoice['is_tax_invoice'] else "<b>INVOICE</b>"
         
         info = [
             title,
-            f"Number: {invoice.reference or 'DRAFT'}",
-            f"Date: {invoice.issue_date.strftime('%d/%m/%Y')}"
+            f"Number: {invoice['reference'] or 'DRAFT'}",
+            f"Date: {invoice['issue_date'].strftime('%d/%m/%Y')}"
         ]
         
         return info
@@ -82,118 +126,163 @@ class InvoiceHeaderBuilder:
 
 class InvoiceClientSection:
     @staticmethod
-    def build(invoice, styles):
+    def build(invoice, layout):
         client_info = [
             "<b>BILL TO:</b>",
-            f"{invoice.client_name}",
-            f"{invoice.client_address}"
+            f"{invoice['client_name']}",
+            f"{invoice['client_address']}"
         ]
         
-        if invoice.client_abn:
-            client_info.append(f"ABN: {invoice.client_abn}")
+        if invoice['client_abn']:
+            client_info.append(f"ABN: {invoice['client_abn']}")
         
-        client_data = [[Paragraph("<br/>".join(client_info), styles['client'])]]
+        client_data = [[Paragraph("<br/>".join(client_info), layout.styles['client'])]]
         
         client_table = Table(client_data, colWidths=[17*cm])
-        client_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ]))
+        client_table.setStyle(layout.table_styles['client'])
         
         return client_table
 
 
 class InvoiceItemsTable:
     @staticmethod
-    def build(invoice, styles):
+    def build(invoice, layout):
         headers = ['Description', 'Qty', 'Unit Price', 'GST', 'Amount']
         item_data = [headers]
         
-        for item in invoice.items.all():
+        for item in invoice['items']:
             item_data.append([
-                Paragraph(item.description.replace('\n', '<br/>'), styles['table_content']),
-                str(item.quantity),
-                f"${item.unit_price:.2f}",
-                f"{item.gst_rate:.0f}%",
-                f"${item.total:.2f}"
+                Paragraph(item['description'].replace('\n', '<br/>'), layout.styles['table_content']),
+                str(item['quantity']),
+                f"${item['unit_price']:.2f}",
+                f"{item['gst_rate']:.0f}%",
+                f"${item['total']:.2f}"
             ])
         
         items_table = Table(item_data, colWidths=[8*cm, 1.5*cm, 2*cm, 1.5*cm, 2*cm])
-        items_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ]))
+        items_table.setStyle(layout.table_styles['items'])
         
         return items_table
 
 
 class InvoiceTotalsSection:
     @staticmethod
-    def build(invoice, styles):
+    def build(invoice, layout):
         payment_info = InvoiceTotalsSection._get_payment_info(invoice)
-        totals_table = InvoiceTotalsSection._get_totals_table(invoice)
+        totals_table = InvoiceTotalsSection._get_totals_table(invoice, layout)
         
         final_data = [[
-            Paragraph("<br/>".join(payment_info), styles['table_content']),
+            Paragraph("<br/>".join(payment_info), layout.styles['table_content']),
             totals_table
         ]]
         
         final_table = Table(final_data, colWidths=[10.5*cm, 6.5*cm])
-        final_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ]))
+        final_table.setStyle(layout.table_styles['final'])
         
         return final_table
 
     @staticmethod
     def _get_payment_info(invoice):
         info = []
-        if invoice.payment_terms:
+        company = invoice['company']
+        if invoice['payment_terms']:
             info.extend([
                 "<b>PAYMENT TERMS</b>",
-                invoice.payment_terms,
+                invoice['payment_terms'],
                 ""
             ])
         
-        if invoice.company.bank_name:
+        if company['bank_name']:
             info.extend([
                 "<b>Bank Details:</b>",
-                f"Bank: {invoice.company.bank_name}",
-                f"BSB: {invoice.company.get_formatted_bsb()}",
-                f"Account: {invoice.company.account_number}"
+                f"Bank: {company['bank_name']}",
+                f"BSB: {company['bsb']}",
+                f"Account: {company['account_number']}"
             ])
         
         return info
 
     @staticmethod
-    def _get_totals_table(invoice):
+    def _get_totals_table(invoice, layout):
         totals_data = [
-            ["Subtotal (excl. GST)", f"${invoice.subtotal:.2f}"]
+            ["Subtotal (excl. GST)", f"${invoice['subtotal']:.2f}"]
         ]
         
-        if invoice.gst_amount > 0:
-            totals_data.append(["GST (10%)", f"${invoice.gst_amount:.2f}"])
+        if invoice['gst_amount'] > 0:
+            totals_data.append(["GST (10%)", f"${invoice['gst_amount']:.2f}"])
         
-        totals_data.append(["TOTAL (inc. GST)", f"${invoice.total_amount:.2f}"])
+        totals_data.append(["TOTAL (inc. GST)", f"${invoice['total_amount']:.2f}"])
         
         totals_table = Table(totals_data, colWidths=[4*cm, 2.5*cm])
-        totals_table.setStyle(TableStyle([
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ]))
+        totals_table.setStyle(layout.table_styles['totals'])
         
         return totals_table
 
 
+def build_invoice_render_data(invoice):
+    company = invoice.company
+    return {
+        'reference': invoice.reference,
+        'issue_date': invoice.issue_date,
+        'is_tax_invoice': invoice.is_tax_invoice,
+        'tax_invoice_note': invoice.get_tax_invoice_note(),
+        'client_name': invoice.client_name,
+        'client_address': invoice.client_address,
+        'client_abn': invoice.client_abn,
+        'payment_terms': invoice.payment_terms,
+        'subtotal': invoice.subtotal,
+        'gst_amount': invoice.gst_amount,
+        'total_amount': invoice.total_amount,
+        'items': [
+            {
+                'description': item.description,
+                'quantity': item.quantity,
+                'unit_price': item.unit_price,
+                'gst_rate': item.gst_rate,
+                'total': item.total,
+            }
+            for item in invoice.items.all()
+        ],
+        'company': {
+            'business_name': company.business_name,
+            'legal_name': company.legal_name,
+            'legal_form_display': company.get_legal_form_display(),
+            'abn': company.get_formatted_abn(),
+            'acn': company.get_formatted_acn(),
+            'gst_registered': company.gst_registered,
+            'address': company.address,
+            'city': company.city,
+            'state': company.state,
+            'postal_code': company.postal_code,
+            'phone': company.phone,
+            'email': company.email,
+            'website': company.website,
+            'bank_name': company.bank_name,
+            'bsb': company.get_formatted_bsb(),
+            'account_number': company.account_number,
+        },
+    }
+
+
 def generate_invoice_pdf(invoice):
+    return get_invoice_renderer()(build_invoice_render_data(invoice))
+
+
+def get_invoice_renderer():
+    if settings.INVOICE_PDF_RENDERER == 'canvas':
+        return partial(render_invoice_pdf_canvas, max_items=settings.INVOICE_PDF_CANVAS_MAX_ITEMS)
+    return render_invoice_pdf
+
+
+def render_invoice_pdf_canvas(invoice, layout=None, max_items=3):
+    pdf = None
+    if len(invoice['items']) <= max_items:
+        pdf = CanvasInvoiceRenderer(invoice).render()
+    return pdf or render_invoice_pdf(invoice, layout)
+
+
+def render_invoice_pdf(invoice, layout=None):
+    layout = layout or InvoiceLayout.get()
     buffer = BytesIO()
     doc = SimpleDocTemplate(
         buffer,
@@ -204,28 +293,27 @@ def generate_invoice_pdf(invoice):
         bottomMargin=30*mm
     )
     
-    styles = PDFStyles.get_styles()
     story = []
     
-    story.append(InvoiceHeaderBuilder.build(invoice, styles))
-    story.append(Spacer(1, 12*mm))
+    story.append(InvoiceHeaderBuilder.build(invoice, layout))
+    story.append(layout.spacers[12])
     
-    story.append(InvoiceClientSection.build(invoice, styles))
-    story.append(Spacer(1, 8*mm))
+    story.append(InvoiceClientSection.build(invoice, layout))
+    story.append(layout.spacers[8])
     
-    story.append(InvoiceItemsTable.build(invoice, styles))
-    story.append(Spacer(1, 8*mm))
+    story.append(InvoiceItemsTable.build(invoice, layout))
+    story.append(layout.spacers[8])
     
-    story.append(InvoiceTotalsSection.build(invoice, styles))
-    story.append(Spacer(1, 10*mm))
+    story.append(InvoiceTotalsSection.build(invoice, layout))
+    story.append(layout.spacers[10])
     
-    legal_note = invoice.get_tax_invoice_note()
+    legal_note = invoice['tax_invoice_note']
     if legal_note:
-        story.append(Paragraph(legal_note, styles['legal']))
-        story.append(Spacer(1, 5*mm))
+        story.append(Paragraph(legal_note, layout.styles['legal']))
+        story.append(layout.spacers[5])
     
     footer_text = _build_footer_text(invoice)
-    story.append(Paragraph(footer_text, styles['footer']))
+    story.append(Paragraph(footer_text, layout.styles['footer']))
     
     doc.build(story)
     pdf = buffer.getvalue()
@@ -235,10 +323,228 @@ def generate_invoice_pdf(invoice):
 
 def _build_footer_text(invoice):
     footer_parts = []
+    company = invoice['company']
     
-    if invoice.company.gst_registered:
+    if company['gst_registered']:
         footer_parts.append("GST registered")
     
-    footer_parts.append(f"{invoice.company.get_legal_form_display()} | ABN: {invoice.company.get_formatted_abn()}")
+    footer_parts.append(f"{company['legal_form_display']} | ABN: {company['abn']}")
     
     return " | ".join(footer_parts)
+
+
+class CanvasInvoiceRenderer:
+    """Draws a one-page invoice straight onto a canvas at the coordinates the
+    platypus layout would produce, skipping flowable wrapping and frame flow."""
+    
+    FONT = 'Helvetica'
+    BOLD_FONT = 'Helvetica-Bold'
+    LEADING = 12
+    CELL_PADDING = 6
+    CELL_VPADDING = 3
+    GRID_WIDTH = 0.5
+    
+    def __init__(self, invoice):
+        self.invoice = invoice
+        page_width, page_height = A4
+        self.frame_left = 20*mm + 6
+        self.frame_width = page_width - 40*mm - 12
+        self.frame_top = page_height - 20*mm - 6
+        self.frame_bottom = 30*mm + 6
+    
+    def render(self):
+        blocks = [
+            self._header_block(), 12*mm,
+            self._client_block(), 8*mm,
+            self._items_block(), 8*mm,
+            self._totals_block(), 10*mm,
+        ]
+        legal_note = self.invoice['tax_invoice_note']
+        if legal_note:
+            blocks.extend([3, self._centered_block(legal_note, 7), 6 + 5*mm])
+        blocks.append(self._centered_block(_build_footer_text(self.invoice), 8))
+        
+        height = sum(block if isinstance(block, (int, float)) else block[0] for block in blocks)
+        if self.frame_top - height < self.frame_bottom:
+            return None
+        
+        buffer = BytesIO()
+        pdf_canvas = canvas.Canvas(buffer, pagesize=A4)
+        top = self.frame_top
+        for block in blocks:
+            if isinstance(block, (int, float)):
+                top -= block
+                continue
+            block_height, draw = block
+            draw(pdf_canvas, top)
+            top -= block_height
+        pdf_canvas.showPage()
+        pdf_canvas.save()
+        pdf = buffer.getvalue()
+        buffer.close()
+        return pdf
+    
+    def _table_left(self, width):
+        return self.frame_left + (self.frame_width - width) / 2
+    
+    def _paragraph_lines(self, parts, font_size, width):
+        lines = []
+        for text, bold in parts:
+            font = self.BOLD_FONT if bold else self.FONT
+            wrapped = simpleSplit(" ".join(str(text).split()), font, font_size, width)
+            lines.extend((line, font) for line in wrapped or [''])
+        return lines
+    
+    def _draw_lines(self, pdf_canvas, lines, font_size, x, top, width=None, align='left'):
+        for index, (text, font) in enumerate(lines):
+            if not text:
+                continue
+            baseline = top - font_size - index * self.LEADING
+            pdf_canvas.setFont(font, font_size)
+            if align == 'right':
+                pdf_canvas.drawRightString(x + width, baseline, text)
+            elif align == 'center':
+                pdf_canvas.drawCentredString(x + width / 2, baseline, text)
+            else:
+                pdf_canvas.drawString(x, baseline, text)
+    
+    def _draw_grid(self, pdf_canvas, x, top, col_widths, row_heights):
+        width = sum(col_widths)
+        height = sum(row_heights)
+        pdf_canvas.saveState()
+        pdf_canvas.setLineWidth(self.GRID_WIDTH)
+        pdf_canvas.setLineCap(1)
+        pdf_canvas.setLineJoin(1)
+        y = top
+        pdf_canvas.line(x, y, x + width, y)
+        for row_height in row_heights:
+            y -= row_height
+            pdf_canvas.line(x, y, x + width, y)
+        col_x = x
+        pdf_canvas.line(col_x, top, col_x, top - height)
+        for col_width in col_widths:
+            col_x += col_width
+            pdf_canvas.line(col_x, top, col_x, top - height)
+        pdf_canvas.restoreState()
+    
+    def _fill_row(self, pdf_canvas, x, top, width, height):
+        pdf_canvas.saveState()
+        pdf_canvas.setFillColor(colors.lightgrey)
+        pdf_canvas.rect(x, top - height, width, height, stroke=0, fill=1)
+        pdf_canvas.restoreState()
+    
+    def _header_block(self):
+        company_lines = InvoiceHeaderBuilder._get_company_info(self.invoice['company'])
+        invoice_lines = InvoiceHeaderBuilder._get_invoice_info(self.invoice)
+        left = self._paragraph_lines(self._split_markup(company_lines), 10, 11*cm)
+        right = self._paragraph_lines(self._split_markup(invoice_lines), 10, 6*cm)
+        height = max(len(left), len(right)) * self.LEADING + 2 * self.CELL_VPADDING
+        x = self._table_left(17*cm)
+        
+        def draw(pdf_canvas, top):
+            self._draw_lines(pdf_canvas, left, 10, x, top - self.CELL_VPADDING)
+            self._draw_lines(pdf_canvas, right, 10, x + 11*cm, top - self.CELL_VPADDING, 6*cm, 'right')
+        
+        return height, draw
+    
+    def _client_block(self):
+        client_lines = ["<b>BILL TO:</b>", self.invoice['client_name'], self.invoice['client_address']]
+        if self.invoice['client_abn']:
+            client_lines.append(f"ABN: {self.invoice['client_abn']}")
+        lines = self._paragraph_lines(self._split_markup(client_lines), 9, 17*cm - self.CELL_PADDING)
+        height = len(lines) * self.LEADING + 2 * self.CELL_VPADDING
+        x = self._table_left(17*cm)
+        
+        def draw(pdf_canvas, top):
+            self._draw_lines(pdf_canvas, lines, 9, x, top - self.CELL_VPADDING)
+        
+        return height, draw
+    
+    def _items_block(self):
+        col_widths = [8*cm, 1.5*cm, 2*cm, 1.5*cm, 2*cm]
+        header_height = self.LEADING + 2 * self.CELL_VPADDING
+        rows = []
+        for item in self.invoice['items']:
+            description = self._paragraph_lines(
+                [(line, False) for line in item['description'].split('\n')],
+                9, col_widths[0] - 2 * self.CELL_PADDING
+            )
+            values = [
+                str(item['quantity']),
+                f"${item['unit_price']:.2f}",
+                f"{item['gst_rate']:.0f}%",
+                f"${item['total']:.2f}",
+            ]
+            rows.append((description, values, max(len(description), 1) * self.LEADING + 2 * self.CELL_VPADDING))
+        height = header_height + sum(row_height for _, _, row_height in rows)
+        x = self._table_left(sum(col_widths))
+        headers = ['Description', 'Qty', 'Unit Price', 'GST', 'Amount']
+        
+        def draw_values(pdf_canvas, values, font, top):
+            col_x = x + col_widths[0]
+            pdf_canvas.setFont(font, 9)
+            for value, col_width in zip(values, col_widths[1:]):
+                col_x += col_width
+                pdf_canvas.drawRightString(col_x - self.CELL_PADDING, top - self.CELL_VPADDING - 9, value)
+        
+        def draw(pdf_canvas, top):
+            self._fill_row(pdf_canvas, x, top, sum(col_widths), header_height)
+            pdf_canvas.setFont(self.BOLD_FONT, 9)
+            pdf_canvas.drawString(x + self.CELL_PADDING, top - self.CELL_VPADDING - 9, headers[0])
+            draw_values(pdf_canvas, headers[1:], self.BOLD_FONT, top)
+            row_top = top - header_height
+            for description, values, row_height in rows:
+                self._draw_lines(pdf_canvas, description, 9, x + self.CELL_PADDING, row_top - self.CELL_VPADDING)
+                draw_values(pdf_canvas, values, self.FONT, row_top)
+                row_top -= row_height
+            self._draw_grid(pdf_canvas, x, top, col_widths, [header_height] + [row[2] for row in rows])
+        
+        return height, draw
+    
+    def _totals_block(self):
+        payment_info = InvoiceTotalsSection._get_payment_info(self.invoice)
+        payment = self._paragraph_lines(self._split_markup(payment_info), 9, 10.5*cm - self.CELL_PADDING)
+        totals = [("Subtotal (excl. GST)", f"${self.invoice['subtotal']:.2f}")]
+        if self.invoice['gst_amount'] > 0:
+            totals.append(("GST (10%)", f"${self.invoice['gst_amount']:.2f}"))
+        totals.append(("TOTAL (inc. GST)", f"${self.invoice['total_amount']:.2f}"))
+        
+        row_height = self.LEADING + 2 * self.CELL_VPADDING
+        totals_widths = [4*cm, 2.5*cm]
+        totals_height = len(totals) * row_height
+        height = max(len(payment) * self.LEADING, totals_height) + 2 * self.CELL_VPADDING
+        x = self._table_left(17*cm)
+        
+        def draw(pdf_canvas, top):
+            self._draw_lines(pdf_canvas, payment, 9, x, top - self.CELL_VPADDING)
+            totals_x = x + 10.5*cm
+            totals_top = top - self.CELL_VPADDING
+            self._fill_row(pdf_canvas, totals_x, totals_top - totals_height + row_height, sum(totals_widths), row_height)
+            for index, (label, amount) in enumerate(totals):
+                font = self.BOLD_FONT if index == len(totals) - 1 else self.FONT
+                baseline = totals_top - index * row_height - self.CELL_VPADDING - 9
+                pdf_canvas.setFont(font, 9)
+                pdf_canvas.drawString(totals_x + self.CELL_PADDING, baseline, label)
+                pdf_canvas.drawRightString(totals_x + sum(totals_widths) - self.CELL_PADDING, baseline, amount)
+            self._draw_grid(pdf_canvas, totals_x, totals_top, totals_widths, [row_height] * len(totals))
+        
+        return height, draw
+    
+    def _centered_block(self, text, font_size):
+        lines = self._paragraph_lines([(text, False)], font_size, self.frame_width)
+        
+        def draw(pdf_canvas, top):
+            self._draw_lines(pdf_canvas, lines, font_size, self.frame_left, top, self.frame_width, 'center')
+        
+        return len(lines) * self.LEADING, draw
+    
+    @staticmethod
+    def _split_markup(lines):
+        parts = []
+        for line in lines:
+            line = str(line)
+            if line.startswith('<b>') and line.endswith('</b>'):
+                parts.append((line[3:-4], True))
+            else:
+                parts.append((line, False))
+        return parts
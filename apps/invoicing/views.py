@@ -1,20 +1,27 @@
 from django.shortcuts import redirect, get_object_or_404, render
-from django.views.generic import CreateView, ListView, DetailView, UpdateView
+from django.views.generic import CreateView, ListView, DetailView, UpdateView, FormView
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.urls import reverse_lazy
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.urls import reverse, reverse_lazy
+from django.utils.http import urlencode
+from django.views.decorators.http import require_POST
+from django.core.exceptions import ValidationError
 from django.http import HttpResponse, Http404, JsonResponse
-from django.db.models import Q
 from django.db import transaction
 from datetime import datetime, date, timedelta
 from django.utils import timezone
+import codecs
 import logging
 
 from .models import Company, Invoice, InvoiceItem
-from .forms import CompanyForm, InvoiceForm, InvoiceItemFormSet
-from .utils import generate_invoice_pdf
-from .services import BulkPDFService, InvoicePeriodService
+from .forms import CompanyForm, InvoiceForm, InvoiceImportForm, InvoiceItemFormSet
+from .services import BulkPDFArchive, BulkPDFService, InvoicePDFService, InvoicePeriodService
+from .aging_service import AGING_BUCKETS, ARAgingService
 from .bas_service import BASReportingService
+from .import_service import InvoiceImportService
+from .search_service import InvoiceSearchService
+from apps.core.mixins import KeysetPaginationMixin
 from apps.core.services.temporal_service import get_available_years
 
 logger = logging.getLogger(__name__)
@@ -84,12 +91,21 @@ class CompanyUpdateView(CompanyFormMixin, UpdateView):
         return super().get(request, *args, **kwargs)
 
 
-class InvoiceListView(ListView):
+class InvoiceListView(KeysetPaginationMixin, ListView):
     model = Invoice
     template_name = 'invoicing/invoice_list.html'
     context_object_name = 'invoices'
     paginate_by = 20
     ordering = ['-issue_date', '-id']
+    keyset_ordering = ['-issue_date', '-id']
+    keyset_count = 'estimate'
+
+    def get_keyset_ordering(self):
+        # Search results are ranked by similarity, which has no stable
+        # seek key, so they keep the numbered pages.
+        if self.request.GET.get('search'):
+            return None
+        return super().get_keyset_ordering()
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -98,13 +114,13 @@ class InvoiceListView(ListView):
         period = self.request.GET.get('period', 'current_month')
         
         if search:
-            queryset = queryset.filter(
-                Q(reference__icontains=search) |
-                Q(client_name__icontains=search) |
-                Q(client_abn__icontains=search)
-            )
+            queryset = InvoiceSearchService.search(queryset, search)
         
-        if status:
+        if status == 'OVERDUE':
+            queryset = queryset.overdue()
+        elif status == 'SENT':
+            queryset = queryset.filter(status='SENT').exclude(due_date__lt=timezone.localdate())
+        elif status:
             queryset = queryset.filter(status=status)
             
         queryset = self._apply_period_filter(queryset, period)
@@ -166,6 +182,9 @@ class InvoiceDetailView(DetailView):
     template_name = 'invoicing/invoice_detail.html'
     context_object_name = 'invoice'
 
+    def get_queryset(self):
+        return Invoice.objects.select_related('company').prefetch_related('items')
+
 
 class InvoiceCreateView(CompanyMixin, CreateView):
     model = Invoice
@@ -200,9 +219,12 @@ class InvoiceCreateView(CompanyMixin, CreateView):
         
         with transaction.atomic():
             form.instance.company = self.get_company()
-            self.object = form.save()
+            self.object = form.save(commit=False)
+            self.object.save(defer_reference=True)
+            form.save_m2m()
             formset.instance = self.object
             formset.save()
+            self.object.finalise_reference()
             
             logger.info(f"Invoice created: {self.object.reference or 'DRAFT'} for {self.object.client_name}")
             messages.success(
@@ -240,15 +262,13 @@ class InvoiceUpdateView(UpdateView):
         formset = context['formset']
         
         with transaction.atomic():
-            old_status = self.object.status if self.object else None
-            self.object = form.save()
+            self.object = form.save(commit=False)
+            self.object.save(defer_reference=True)
+            form.save_m2m()
             
             if formset.is_valid():
                 formset.save()
-                
-                if old_status == 'DRAFT' and self.object.status != 'DRAFT':
-                    self.object.assign_reference_if_needed()
-                    self.object.save(update_fields=['reference'])
+                self.object.finalise_reference()
                 
                 logger.info(f"Invoice updated: {self.object.reference or 'DRAFT'} for {self.object.client_name}")
                 messages.success(
@@ -263,10 +283,42 @@ class InvoiceUpdateView(UpdateView):
         return reverse_lazy('invoicing:invoice_detail', kwargs={'pk': self.object.pk})
 
 
+class InvoiceImportView(LoginRequiredMixin, CompanyMixin, FormView):
+    form_class = InvoiceImportForm
+    template_name = 'invoicing/invoice_import.html'
+    max_errors_shown = 100
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not self.get_company():
+            return redirect('invoicing:company_create')
+        return super().dispatch(request, *args, **kwargs)
+
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        service = InvoiceImportService(self.get_company(), dry_run=form.cleaned_data['dry_run'])
+        report = service.import_stream(codecs.getreader('utf-8-sig')(upload), form.cleaned_data['file_format'])
+
+        action = 'validated' if form.cleaned_data['dry_run'] else 'imported'
+        logger.info(f"Invoice import from {upload.name}: {report.created} {action}, {report.failed} rejected")
+        if report.created:
+            messages.success(self.request, f'{report.created} invoices {action} from {upload.name}.')
+        if report.failed:
+            messages.warning(self.request, f'{report.failed} rows were rejected.')
+
+        return self.render_to_response(self.get_context_data(
+            form=form,
+            report=report,
+            shown_errors=report.errors[:self.max_errors_shown]
+        ))
+
+
 def generate_pdf_view(request, pk):
-    invoice = get_object_or_404(Invoice, pk=pk)
+    invoice = get_object_or_404(
+        Invoice.objects.select_related('company').prefetch_related('items'),
+        pk=pk
+    )
     try:
-        pdf_content = generate_invoice_pdf(invoice)
+        pdf_content = InvoicePDFService.get_pdf(invoice)
         
         response = HttpResponse(pdf_content, content_type='application/pdf')
         filename = f'invoice_{invoice.reference or "draft"}.pdf'
@@ -320,19 +372,17 @@ def _handle_bulk_download(request, period_type, year, month, quarter, status):
         
         zip_prefix, filename, period_label = _get_file_info(period_type, year, month, quarter)
         
-        zip_content, success_count, error_count = BulkPDFService.generate_bulk_pdfs_zip(
-            invoices,
-            zip_prefix
+        archive = BulkPDFArchive(
+            invoices.select_related('company').prefetch_related('items')
         )
         
-        if not zip_content:
+        if not archive.prime():
             messages.error(request, 'Error generating ZIP file')
             return redirect('invoicing:invoice_list')
         
-        _add_download_message(request, success_count, error_count, period_label)
-        logger.info(f"Bulk {period_type} download: {success_count} invoices for {period_label}")
+        logger.info(f"Bulk {period_type} download started for {period_label}")
         
-        return BulkPDFService.create_zip_response(zip_content, filename)
+        return BulkPDFService.create_streaming_zip_response(archive, filename)
         
     except Exception as e:
         logger.error(f"Error in bulk {period_type} download: {str(e)}")
@@ -411,19 +461,6 @@ def _get_status_text(status):
     return status_texts.get(status, ' sent or paid')
 
 
-def _add_download_message(request, success_count, error_count, period):
-    if error_count > 0:
-        messages.warning(
-            request,
-            f'Download complete: {success_count} invoices generated, {error_count} errors'
-        )
-    else:
-        messages.success(
-            request,
-            f'Download complete: {success_count} invoices for {period}'
-        )
-
-
 @login_required
 def bas_report_view(request):
     period_type = request.GET.get('type', 'quarterly')
@@ -468,6 +505,64 @@ def bas_report_view(request):
         return redirect('invoicing:invoice_list')
 
 
+@login_required
+def ar_aging_report_view(request):
+    try:
+        as_of = date.fromisoformat(request.GET['as_of']) if request.GET.get('as_of') else timezone.localdate()
+    except ValueError:
+        messages.error(request, 'Invalid report date')
+        return redirect('invoicing:ar_aging')
+
+    report = ARAgingService.get_report(as_of)
+
+    if request.GET.get('format') == 'csv':
+        response = HttpResponse(content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="ar_aging_{as_of:%Y%m%d}.csv"'
+        ARAgingService.write_csv(report, response)
+        return response
+
+    context = {
+        'report': report,
+        'as_of': as_of,
+        'bucket_labels': [label for _, label in AGING_BUCKETS],
+        'client_rows': [
+            {**row, 'amounts': [row[key] for key, _ in AGING_BUCKETS]}
+            for row in report['clients']
+        ],
+        'total_amounts': [report['totals'][key] for key, _ in AGING_BUCKETS],
+        'bucket_totals': [(label, report['totals'][key]) for key, label in AGING_BUCKETS],
+    }
+    return render(request, 'invoicing/ar_aging_report.html', context)
+
+
+@login_required
+@require_POST
+def bas_close_period_view(request):
+    period_type = request.POST.get('type')
+    params = {'type': period_type}
+    
+    try:
+        year = params['year'] = int(request.POST.get('year', timezone.now().year))
+        if period_type == 'monthly':
+            params['month'] = int(request.POST.get('month'))
+            snapshot = BASReportingService.close_period(year, month=params['month'], closed_by=request.user)
+        elif period_type == 'quarterly':
+            params['quarter'] = int(request.POST.get('quarter'))
+            snapshot = BASReportingService.close_period(year, quarter=params['quarter'], closed_by=request.user)
+        else:
+            messages.error(request, 'Only monthly or quarterly periods can be closed')
+            return redirect('invoicing:bas_report')
+        
+        logger.info(f"BAS period closed: {snapshot.period} by {request.user}")
+        messages.success(request, f'BAS period {snapshot.period} closed.')
+    except ValidationError as e:
+        messages.error(request, e.messages[0])
+    except (TypeError, ValueError) as e:
+        messages.error(request, f'Invalid period: {str(e)}')
+    
+    return redirect(f"{reverse('invoicing:bas_report')}?{urlencode(params)}")
+
+
 @login_required
 def bas_pdf_view(request):
     from reportlab.lib.pagesizes import A4
@@ -562,6 +657,29 @@ def bas_pdf_view(request):
         elements.append(summary_table)
         elements.append(Spacer(1, 1*cm))
         
+        if report_data.get('quarterly_breakdown'):
+            breakdown_data = [['Period', 'Invoices', 'G1 Total Sales', '1A GST on Sales']]
+            for q_data in report_data['quarterly_breakdown']:
+                breakdown_data.append([
+                    q_data['period'],
+                    str(q_data['invoice_count']),
+                    f"${q_data['G1_total_sales_inc_gst']:,.2f}",
+                    f"${q_data['1A_gst_on_sales']:,.2f}",
+                ])
+            
+            breakdown_table = Table(breakdown_data, colWidths=[4*cm, 3*cm, 4.5*cm, 4.5*cm])
+            breakdown_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+            ]))
+            
+            elements.append(Paragraph('Quarterly Breakdown', styles['Heading2']))
+            elements.append(breakdown_table)
+            elements.append(Spacer(1, 1*cm))
+        
         footer_style = ParagraphStyle('Footer', parent=styles['Normal'], fontSize=8, textColor=colors.grey)
         elements.append(Paragraph(f'Generated: {timezone.now().strftime("%d/%m/%Y %H:%M")}', footer_style))
         
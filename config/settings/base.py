@@ -150,6 +150,19 @@ LOGOUT_REDIRECT_URL = 'landing_page'
 COMPANY_NAME = config('COMPANY_NAME', default='Westforce Removals Company')
 COMPANY_TAGLINE = config('COMPANY_TAGLINE', default='Professional Australian Removals Company Management System')
 
+# Worker processes used to render bulk invoice ZIPs (0 or 1 renders in the request process)
+INVOICE_PDF_WORKERS = config('INVOICE_PDF_WORKERS', default=0, cast=int)
+
+# Threads used to compute dashboard widgets concurrently (0 or 1 computes them one after another)
+DASHBOARD_WORKERS = config('DASHBOARD_WORKERS', default=0, cast=int)
+# Seconds a widget may run in concurrent mode, counted from when a worker starts it,
+# before it is shown as unavailable
+DASHBOARD_WIDGET_TIMEOUT = config('DASHBOARD_WIDGET_TIMEOUT', default=5.0, cast=float)
+
+# Invoice PDF renderer: 'platypus' (flow layout) or 'canvas' (fixed layout for short invoices)
+INVOICE_PDF_RENDERER = config('INVOICE_PDF_RENDERER', default='platypus')
+INVOICE_PDF_CANVAS_MAX_ITEMS = config('INVOICE_PDF_CANVAS_MAX_ITEMS', default=3, cast=int)
+
 GOOGLE_ANALYTICS_ID = config('GOOGLE_ANALYTICS_ID', default='')
 GOOGLE_TAG_MANAGER_ID = config('GOOGLE_TAG_MANAGER_ID', default='')
 GOOGLE_ADS_ID = config('GOOGLE_ADS_ID', default='')